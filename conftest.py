@@ -0,0 +1,34 @@
+# conftest.py
+#
+# Shared test fixtures.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_bars(n: int = 1000, seed: int = 0, base: float = 1.1, volatility: float = 0.0004, wick: float = 0.5,
+              bursts: float = 0.0, open_jitter: float = 0.0, bar_minutes: int = 5) -> pd.DataFrame:
+    """
+    Random-walk OHLCV bars from 2024-03-04 00:00 UTC (time index, MT5 column
+    names). Steps are base * volatility, times 4 on a `bursts` fraction of
+    bars; wicks are exponential with mean `wick` steps; `open_jitter` moves
+    opens off the previous close (in steps) so gaps and dojis occur.
+    """
+    rng = np.random.default_rng(seed)
+    scale = base * volatility * np.where(rng.random(n) < bursts, 4.0, 1.0)
+    close = base + np.cumsum(rng.normal(0, 1, n) * scale)
+    open_ = np.r_[close[0], close[:-1]] + rng.normal(0, open_jitter, n) * scale
+    high = np.maximum(open_, close) + rng.exponential(wick, n) * scale
+    low = np.minimum(open_, close) - rng.exponential(wick, n) * scale
+    volume = rng.integers(20, 500, n).astype(float)
+    index = pd.date_range("2024-03-04", periods=n, freq=f"{bar_minutes}min", name="time")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "tick_volume": volume}, index=index)
+
+
+@pytest.fixture
+def synthetic_bars():
+    """
+    make_bars, for tests that need a bar history.
+    """
+    return make_bars
@@ -0,0 +1,309 @@
+# core/armed_orders.py
+
+import logging
+
+import MetaTrader5 as mt5
+
+from core.config_loader import get_armed_orders_settings
+from core.order_analytics import OrderTrace, order_analytics
+from core.trade_executor import prepare_trade, min_stop_distance, strategy_magic
+from utils.helpers import round_safe
+from utils import clock
+
+MARKET = "market"
+ORDER_NAMES = {
+    mt5.ORDER_TYPE_BUY_LIMIT: "buy limit", mt5.ORDER_TYPE_SELL_LIMIT: "sell limit",
+    mt5.ORDER_TYPE_BUY_STOP: "buy stop", mt5.ORDER_TYPE_SELL_STOP: "sell stop",
+}
+# Final order states that mean the order will never fill
+UNFILLED_STATES = {mt5.ORDER_STATE_CANCELED, mt5.ORDER_STATE_EXPIRED, mt5.ORDER_STATE_REJECTED}
+# The signal fields the performance tracker keeps once the order fills
+TRADE_FIELDS = ("symbol", "entry", "sl", "tp", "strategy", "confidence", "volume_spike", "trend")
+
+
+class ArmedOrders:
+    """
+    Turns signals of the configured strategies into pending orders resting
+    at the signal's entry, so the fill happens at the broker when price gets
+    there instead of at market on the next scan. One order per (symbol,
+    strategy), kept in sync with the signal:
+
+        new signal          buy/sell limit or stop at the entry, whichever
+                            side of the current price it is on; a market
+                            order if the entry is within the stops distance
+        same signal         left alone (entry, SL and TP all within
+                            reprice_tolerance_points)
+        moved signal        modified in place, or replaced if it changes
+                            side or order type
+        no signal           removed after max_misses evaluations in a row
+        expiry_minutes      the order's expiration at the broker (and here)
+
+    sync() picks up fills from the deal history, since a filled order's
+    ticket is its position id. Fills are handed back to the engine, which
+    records them and starts the cooldown. An order that left the pending
+    list without an entry deal is only dropped once the order history shows
+    it cancelled, expired or rejected; until then (deal not in history yet,
+    terminal error) it is kept and looked up again on the next sync.
+    """
+
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", False)
+        self.strategies = set(settings.get("strategies", []))
+        self.expiry_seconds = settings.get("expiry_minutes", 60) * 60
+        self.tolerance_points = settings.get("reprice_tolerance_points", 5)
+        self.max_misses = settings.get("max_misses", 2)
+        self.armed = {}
+        self.stats = {"armed": 0, "repriced": 0, "market": 0, "cancelled": 0, "expired": 0, "filled": 0,
+                      "rejected": 0}
+        self.slippage_total = 0.0
+
+    def handles(self, trade: dict) -> bool:
+        return self.arms(trade.get("strategy"))
+
+    def arms(self, strategy_name: str) -> bool:
+        return self.enabled and strategy_name in self.strategies
+
+    # ------------------------------------------------------------------
+    # Signals
+    # ------------------------------------------------------------------
+    def arm(self, trade: dict) -> str:
+        """
+        Places or updates the order for an approved signal. Returns MARKET
+        when the entry is already at the price, so the caller should place
+        the trade at market instead; otherwise "armed", "repriced",
+        "unchanged" or "rejected".
+        """
+        key = f"{trade['symbol']}_{trade['strategy']}"
+        record = self.armed.get(key)
+        if record is not None:
+            record["misses"] = 0
+            if self._unchanged(record, trade):
+                return "unchanged"
+
+        trace = OrderTrace(trade["symbol"], trade["strategy"], trade["entry"])
+        try:
+            outcome = self._arm(key, record, trade, trace)
+            trace.set(status=outcome)
+            return outcome
+        except Exception as e:
+            trace.set(status="error", reason=str(e))
+            raise
+        finally:
+            order_analytics.record(trace)
+
+    def _unchanged(self, record: dict, trade: dict) -> bool:
+        tolerance = self.tolerance_points * record["point"]
+        return ((trade["tp"] > trade["entry"]) == record["is_buy"]
+                and all(abs(trade[field] - record[field]) <= tolerance for field in ("entry", "sl", "tp")))
+
+    def _arm(self, key: str, record: dict, trade: dict, trace: OrderTrace) -> str:
+        symbol, entry = trade["symbol"], trade["entry"]
+        context, rejection = prepare_trade(trade, trace, price=entry)
+        if rejection is not None:
+            if record is not None:
+                self._remove(key, rejection.get("reason", "rejected"))  # Kept for sync() if this fails
+            self.stats["rejected"] += 1
+            return "rejected"
+        info, tick, is_buy, lot = context["info"], context["tick"], context["is_buy"], context["lot"]
+
+        order_type = self._order_type(is_buy, entry, tick, min_stop_distance(symbol, info))
+        if order_type is None:
+            if record is not None and not self._remove(key, "entry reached"):
+                # The order may have just filled; a market order on top would double the position
+                self.stats["rejected"] += 1
+                return "rejected"
+            self.stats["market"] += 1
+            return MARKET
+
+        digits = info.digits
+        expiration = int(tick.time) + self.expiry_seconds  # broker server time
+        trace.set(direction="buy" if is_buy else "sell", volume=lot, order_type=ORDER_NAMES[order_type],
+                  entry_drift_points=round(((tick.ask if is_buy else tick.bid) - entry) / info.point, 1))
+
+        if record is not None and record["type"] == order_type:
+            request = {
+                "action": mt5.TRADE_ACTION_MODIFY,
+                "order": record["ticket"],
+                "price": round(entry, digits),
+                "sl": round(trade["sl"], digits),
+                "tp": round(trade["tp"], digits),
+                "type_time": mt5.ORDER_TIME_SPECIFIED,
+                "expiration": expiration,
+            }
+            if self._send(request, trace) is None:
+                self.stats["rejected"] += 1
+                return "rejected"
+            record.update(entry=entry, sl=trade["sl"], tp=trade["tp"], expires_at=clock.time() + self.expiry_seconds,
+                          trade={field: trade.get(field) for field in TRADE_FIELDS})
+            self.stats["repriced"] += 1
+            logging.info(f"🎯 Repriced {ORDER_NAMES[order_type]} #{record['ticket']} for {key} to {entry:.5f}")
+            return "repriced"
+
+        if record is not None and not self._remove(key, "signal changed side"):
+            self.stats["rejected"] += 1
+            return "rejected"
+
+        request = {
+            "action": mt5.TRADE_ACTION_PENDING,
+            "symbol": symbol,
+            "volume": lot,
+            "type": order_type,
+            "price": round(entry, digits),
+            "sl": round(trade["sl"], digits),
+            "tp": round(trade["tp"], digits),
+            "magic": strategy_magic(trade["strategy"]),
+            "comment": f"DCRAI_{trade['strategy']}_ARMED",
+            "type_time": mt5.ORDER_TIME_SPECIFIED,
+            "type_filling": mt5.ORDER_FILLING_RETURN,
+            "expiration": expiration,
+        }
+        result = self._send(request, trace)
+        if result is None:
+            self.stats["rejected"] += 1
+            return "rejected"
+        self.armed[key] = {
+            "ticket": result.order,
+            "type": order_type,
+            "is_buy": is_buy,
+            "entry": entry,
+            "sl": trade["sl"],
+            "tp": trade["tp"],
+            "volume": lot,
+            "point": info.point,
+            "expires_at": clock.time() + self.expiry_seconds,
+            "misses": 0,
+            "trade": {field: trade.get(field) for field in TRADE_FIELDS},
+        }
+        self.stats["armed"] += 1
+        logging.info(f"🎯 Armed {ORDER_NAMES[order_type]} #{result.order} for {key}: {lot} @ {entry:.5f}")
+        return "armed"
+
+    @staticmethod
+    def _order_type(is_buy: bool, entry: float, tick, min_distance: float):
+        """
+        Limit below the ask / above the bid, stop on the other side; None
+        when the entry is closer to the price than the broker allows.
+        """
+        price = tick.ask if is_buy else tick.bid
+        if abs(entry - price) <= min_distance:
+            return None
+        if is_buy:
+            return mt5.ORDER_TYPE_BUY_LIMIT if entry < price else mt5.ORDER_TYPE_BUY_STOP
+        return mt5.ORDER_TYPE_SELL_LIMIT if entry > price else mt5.ORDER_TYPE_SELL_STOP
+
+    def _send(self, request: dict, trace: OrderTrace = None):
+        if trace is None:
+            result = mt5.order_send(request)
+        else:
+            with trace.span("order_send"):
+                result = mt5.order_send(request)
+            trace.set(retcode=getattr(result, "retcode", None))
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            reason = mt5.last_error() if result is None else f"[{result.retcode}] {result.comment}"
+            logging.error(f"❌ Pending order request failed: {reason}")
+            return None
+        return result
+
+    def missed(self, symbol: str, strategy_name: str):
+        """
+        The strategy was evaluated and gave no signal; its order is removed
+        once that has happened max_misses times in a row.
+        """
+        key = f"{symbol}_{strategy_name}"
+        record = self.armed.get(key)
+        if record is None:
+            return
+        record["misses"] += 1
+        if record["misses"] >= self.max_misses:
+            self._remove(key, "signal gone")
+
+    def _remove(self, key: str, reason: str) -> bool:
+        """
+        Cancels the order at the broker and forgets it. If the broker refuses
+        (typically because the order has just filled or expired) the record
+        is kept, so sync() resolves it from the deal history.
+        """
+        record = self.armed[key]
+        if self._send({"action": mt5.TRADE_ACTION_REMOVE, "order": record["ticket"]}) is None:
+            return False
+        del self.armed[key]
+        self.stats["cancelled"] += 1
+        logging.info(f"🗑️ Removed pending order #{record['ticket']} for {key}: {reason}")
+        return True
+
+    # ------------------------------------------------------------------
+    # Broker state
+    # ------------------------------------------------------------------
+    def sync(self) -> list:
+        """
+        Drops orders that are no longer pending and returns the filled ones
+        as (trade, result) pairs, result shaped like execute_trade's.
+        """
+        if not self.armed:
+            return []
+        orders = mt5.orders_get()
+        if orders is None:
+            logging.warning(f"⚠️ Could not read pending orders: {mt5.last_error()}")
+            return []
+        pending = {order.ticket for order in orders}
+
+        filled = []
+        for key, record in list(self.armed.items()):
+            if record["ticket"] in pending:
+                if clock.time() >= record["expires_at"]:
+                    self._remove(key, "expired")
+                continue
+            deals = mt5.history_deals_get(position=record["ticket"])
+            if deals is None:
+                logging.warning(f"⚠️ Could not read deals of pending order #{record['ticket']}: {mt5.last_error()}")
+                continue
+            deal = next((d for d in deals if d.entry == mt5.DEAL_ENTRY_IN), None)
+            if deal is None:
+                orders = mt5.history_orders_get(ticket=record["ticket"])
+                if not orders or orders[0].state not in UNFILLED_STATES:
+                    continue  # Not in the history yet, or filled and its deal still on the way
+                del self.armed[key]
+                self.stats["expired"] += 1
+                logging.info(f"⌛ Pending order #{record['ticket']} for {key} expired at the broker")
+                continue
+
+            del self.armed[key]
+
+            # Positive slippage is adverse, as in the order analytics
+            slippage = (deal.price - record["entry"]) / record["point"] * (1 if record["is_buy"] else -1)
+            self.stats["filled"] += 1
+            self.slippage_total += slippage
+            logging.info(f"✅ Pending order #{record['ticket']} for {key} filled @ {deal.price:.5f} "
+                         f"({slippage:+.1f} pts from entry)")
+            trade = dict(record["trade"])
+            filled.append((trade, {
+                "status": "success",
+                "symbol": trade["symbol"],
+                "strategy": trade["strategy"],
+                "order_id": record["ticket"],
+                "ticket": record["ticket"],
+                "price": round_safe(deal.price, 3),
+                "sl": round_safe(record["sl"], 3),
+                "tp": round_safe(record["tp"], 3),
+                "filled_price": deal.price,
+                "sl_final": record["sl"],
+                "volume": deal.volume,
+            }))
+        return filled
+
+    def export(self) -> dict:
+        return self.armed
+
+    def restore(self, exported: dict):
+        self.armed = dict(exported)
+
+    def get_summary(self) -> str:
+        if not self.enabled:
+            return "🎯 Armed orders: off"
+        counts = ", ".join(f"{name} {count}" for name, count in self.stats.items())
+        slippage = self.slippage_total / self.stats["filled"] if self.stats["filled"] else 0.0
+        return f"🎯 Armed orders: {len(self.armed)} pending ({counts}), avg fill {slippage:+.1f} pts from entry"
+
+
+armed_orders = ArmedOrders(get_armed_orders_settings())
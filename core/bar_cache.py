@@ -0,0 +1,101 @@
+# core/bar_cache.py
+
+import logging
+
+import MetaTrader5 as mt5
+import numpy as np
+import pandas as pd
+
+from core.history_backfill import TIMEFRAMES
+from utils import clock
+
+TIMEFRAME_SECONDS = {
+    mt5.TIMEFRAME_M1: 60,
+    mt5.TIMEFRAME_M5: 300,
+    mt5.TIMEFRAME_M15: 900,
+    mt5.TIMEFRAME_M30: 1800,
+    mt5.TIMEFRAME_H1: 3600,
+    mt5.TIMEFRAME_H4: 14400,
+    mt5.TIMEFRAME_D1: 86400,
+}
+TIMEFRAME_NAMES = {value: name for name, value in TIMEFRAMES.items()}
+
+
+class BarCache:
+    """
+    Keeps the most recent bars per (symbol, timeframe) between cycles.
+    After the first fetch only the bars since the cached tail are pulled
+    from the terminal and merged in, instead of the whole window.
+    """
+
+    def __init__(self, bar_store=None):
+        self.frames = {}
+        self.fetched_at = {}
+        self.bar_store = bar_store
+
+    def get_bars(self, symbol: str, timeframe, bars: int) -> pd.DataFrame:
+        key = (symbol, timeframe)
+        cached = self.frames.get(key)
+
+        if cached is None and self.bar_store is not None and timeframe in TIMEFRAME_NAMES:
+            cached = self.bar_store.frame(symbol, TIMEFRAME_NAMES[timeframe], bars=bars)
+            if cached.empty:
+                cached = None
+            else:
+                # Best guess until the first live fetch; the overlap check below covers clock skew
+                self.fetched_at[key] = cached.index[-1].timestamp()
+
+        if cached is not None and len(cached) >= bars:
+            # Bar times are broker server time, so elapsed time is measured locally
+            step = TIMEFRAME_SECONDS.get(timeframe, 60)
+            elapsed = clock.time() - self.fetched_at.get(key, 0)
+            missing = int(elapsed // step) + 2
+            if missing < bars:
+                rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, missing)
+                fresh = _to_frame(rates)
+                # The fetch must overlap the cached tail, otherwise bars are missing in between
+                if fresh is not None and fresh.index[0] <= cached.index[-1]:
+                    merged = pd.concat([cached[cached.index < fresh.index[0]], fresh])
+                    self.frames[key] = merged.iloc[-bars:]
+                    self.fetched_at[key] = clock.time()
+                    return self.frames[key]
+                logging.info("♻️ Bar cache gap for %s, refetching %d bars", symbol, bars)
+
+        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, bars)
+        df = _to_frame(rates)
+        if df is None:
+            return None
+        self.frames[key] = df
+        self.fetched_at[key] = clock.time()
+        return df
+
+    def export(self) -> dict:
+        """
+        Serialises cached frames for a state snapshot.
+        """
+        exported = {}
+        for (symbol, timeframe), df in self.frames.items():
+            columns = {col: df[col].tolist() for col in df.columns}
+            columns["time"] = (df.index.astype("datetime64[s]").astype(np.int64)).tolist()
+            columns["fetched_at"] = self.fetched_at.get((symbol, timeframe), 0)
+            exported[f"{symbol}|{timeframe}"] = columns
+        return exported
+
+    def restore(self, exported: dict):
+        for key, columns in exported.items():
+            symbol, timeframe = key.rsplit("|", 1)
+            fetched_at = columns.pop("fetched_at", 0)
+            df = pd.DataFrame({col: values for col, values in columns.items() if col != "time"})
+            df.index = pd.to_datetime(columns["time"], unit="s")
+            df.index.name = "time"
+            self.frames[(symbol, int(timeframe))] = df
+            self.fetched_at[(symbol, int(timeframe))] = fetched_at
+
+
+def _to_frame(rates):
+    if rates is None or len(rates) == 0:
+        return None
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    df.set_index('time', inplace=True)
+    return df
@@ -69,9 +69,8 @@ def filter_trade_by_confidence(trade_signal: dict, threshold: int = default_thre
     passed = score >= threshold
     if verbose:
         label = "✅ PASSED" if passed else "❌ REJECTED"
-        logging.info(f"[Confidence Filter] {label} | Score: {score}/{sum(score_weights.values())}")
-        for item in log:
-            logging.info(f"  - {item}")
+        logging.info("[Confidence Filter] %s | Score: %s/%s%s", label, score, sum(score_weights.values()),
+                     "".join(f"\n  - {item}" for item in log))
 
     return {
         "passed": passed,
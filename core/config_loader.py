@@ -25,3 +25,54 @@ def get_confidence_threshold(strategy: str) -> int:
 
 def get_risk_settings():
     return CONFIG.get("risk_management", {})
+
+def get_trade_management_settings():
+    return CONFIG.get("trade_management", {})
+
+def get_bar_store_settings():
+    return CONFIG.get("bar_store", {})
+
+def get_state_settings():
+    return CONFIG.get("state", {})
+
+def get_logging_settings():
+    return CONFIG.get("logging", {})
+
+def get_strategy_cache_settings():
+    return CONFIG.get("strategy_cache", {})
+
+def get_history_sync_settings():
+    return CONFIG.get("history_sync", {})
+
+def get_runtime_settings():
+    return CONFIG.get("runtime", {})
+
+def get_order_analytics_settings():
+    return CONFIG.get("order_analytics", {})
+
+def get_order_routing_settings():
+    return CONFIG.get("order_routing", {})
+
+def get_profiling_settings():
+    return CONFIG.get("profiling", {})
+
+def get_monte_carlo_settings():
+    return CONFIG.get("monte_carlo", {})
+
+def get_fanout_settings():
+    return CONFIG.get("fanout", {})
+
+def get_prescan_settings():
+    return CONFIG.get("prescan", {})
+
+def get_watchdog_settings():
+    return CONFIG.get("strategy_watchdog", {})
+
+def get_session_scheduler_settings():
+    return CONFIG.get("session_scheduler", {})
+
+def get_armed_orders_settings():
+    return CONFIG.get("armed_orders", {})
+
+def get_backtest_cache_settings():
+    return CONFIG.get("backtest_cache", {})
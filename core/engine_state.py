@@ -0,0 +1,68 @@
+# core/engine_state.py
+
+import logging
+from datetime import datetime
+
+import MetaTrader5 as mt5
+
+from core.config_loader import get_state_settings
+from utils.state_store import StateStore
+
+
+def open_state_store() -> StateStore:
+    """
+    Builds a StateStore from the `state` config section.
+    """
+    settings = get_state_settings()
+    return StateStore(settings.get("path", "state"), enabled=settings.get("enabled", False))
+
+
+def export_cooldowns(cooldown_tracker: dict) -> dict:
+    return {key: when.isoformat() for key, when in cooldown_tracker.items()}
+
+
+def restore_cooldowns(cooldown_tracker: dict, exported: dict):
+    for key, when in exported.items():
+        cooldown_tracker[key] = datetime.fromisoformat(when)
+
+
+def strategy_from_comment(comment: str):
+    """
+    Recovers the strategy name from a 'DCRAI_<strategy>_<trade_id>' order comment.
+    """
+    if not comment or not comment.startswith("DCRAI_"):
+        return None
+    body = comment[len("DCRAI_"):]
+    strategy, _, _ = body.rpartition("_")
+    return strategy or body
+
+
+def reconcile_with_positions(cooldown_tracker: dict, known_strategies) -> int:
+    """
+    Makes restored cooldowns consistent with what is actually open on the account:
+    an open DCRAI position keeps its setup in cooldown from the position's open time,
+    even if the snapshot predates the entry.
+    Returns the number of cooldowns that were added or moved forward.
+    """
+    if not mt5.initialize():
+        logging.error("❌ Failed to initialize MT5")
+        return 0
+
+    positions = mt5.positions_get()
+    if positions is None:
+        logging.warning("⚠️ Could not read positions for state reconciliation.")
+        return 0
+
+    updated = 0
+    for pos in positions:
+        strategy = strategy_from_comment(pos.comment)
+        if strategy not in known_strategies:
+            continue
+        key = f"{pos.symbol}_{strategy}"
+        opened = datetime.fromtimestamp(pos.time)
+        if cooldown_tracker.get(key) is None or cooldown_tracker[key] < opened:
+            cooldown_tracker[key] = opened
+            updated += 1
+
+    logging.info(f"🔁 Reconciled {len(positions)} open positions, {updated} cooldowns updated.")
+    return updated
@@ -0,0 +1,281 @@
+# core/fanout.py
+#
+# Fan-out mode: one signal process fetches bars and runs the strategies once,
+# then publishes every approved trade to one executor process per account.
+# Each executor logs into its own terminal, sizes the trade from its own
+# balance (utils.risk_engine, inside execute_trade) and manages its own
+# positions, so market-data and strategy cost stay flat as accounts are added.
+# Armed-order strategies (core.armed_orders) keep their pending orders in the
+# executors: the signal process also publishes "missed" evaluations for them
+# and leaves their cooldown to the executor's fill.
+#
+#   python -m core.fanout signal
+#   python -m core.fanout executor --account demo-1
+#
+# Both sides authenticate with a shared key taken from $DCRAI_FANOUT_AUTHKEY
+# or the untracked file at fanout.authkey_file (state/fanout.key by default).
+
+import argparse
+import itertools
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+
+from core.config_loader import CONFIG, get_fanout_settings
+from utils import clock
+
+# How often blocking waits wake up to check for shutdown
+POLL_SECONDS = 1.0
+AUTHKEY_ENV = "DCRAI_FANOUT_AUTHKEY"
+
+
+def _address(settings: dict) -> tuple:
+    address = settings.get("address", {})
+    return address.get("host", "127.0.0.1"), address.get("port", 6010)
+
+
+def _authkey(settings: dict) -> bytes:
+    """
+    The shared connection key, never from the committed config: refuses to
+    start without one rather than fall back to a guessable default.
+    """
+    key = os.environ.get(AUTHKEY_ENV, "").strip()
+    path = settings.get("authkey_file", "state/fanout.key")
+    if not key and os.path.exists(path):
+        with open(path) as f:
+            key = f.read().strip()
+    if not key:
+        raise SystemExit(f"No fan-out authkey: set {AUTHKEY_ENV} or write one to {path} "
+                         f"(e.g. python -c \"import secrets; print(secrets.token_hex(32))\" > {path})")
+    return key.encode()
+
+
+class SignalPublisher:
+    """
+    Accepts executor connections on a local socket and sends each approved
+    trade to all of them. Connections that fail on send are dropped; an
+    executor that reconnects only sees signals published after it is back.
+    """
+
+    def __init__(self, address: tuple, authkey: bytes):
+        self.listener = Listener(address, authkey=authkey)
+        self.connections = []
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.published = 0
+        self.deliveries = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._accept, name="fanout-accept", daemon=True)
+        self.thread.start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return  # listener closed
+            except Exception as e:
+                logging.warning(f"⚠️ Rejected executor connection: {e}")
+                continue
+            with self.lock:
+                self.connections.append(conn)
+            logging.info(f"🔌 Executor connected ({len(self.connections)} total)")
+
+    def publish(self, trade: dict) -> bool:
+        """
+        Sends the trade to every connected executor. Returns True if at least
+        one received it, so the caller only starts a cooldown for a trade
+        that can actually be placed.
+        """
+        message = {"kind": "signal", "id": next(self.ids), "sent_at": clock.time(), "signal": trade}
+        delivered = self._broadcast(message)
+        self.published += 1
+        if not delivered:
+            logging.error(f"❌ No executor connected; signal {message['id']} for {trade.get('symbol')} not placed.")
+        return delivered > 0
+
+    def publish_missed(self, symbol: str, strategy: str):
+        """
+        Tells the executors an armed strategy was evaluated without a signal,
+        so their pending orders are invalidated as in a single process.
+        """
+        self._broadcast({"kind": "missed", "id": next(self.ids), "sent_at": clock.time(),
+                         "symbol": symbol, "strategy": strategy})
+
+    def _broadcast(self, message: dict) -> int:
+        delivered = 0
+        with self.lock:
+            for conn in self.connections[:]:
+                try:
+                    conn.send(message)
+                    delivered += 1
+                except (OSError, EOFError):
+                    self.connections.remove(conn)
+                    conn.close()
+                    self.dropped += 1
+                    logging.warning("⚠️ Executor connection lost; dropped it")
+        self.deliveries += delivered
+        return delivered
+
+    def close(self):
+        self.listener.close()
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+
+    def get_summary(self) -> str:
+        return (
+            f"📡 Fan-out: {self.published} signals published, {self.deliveries} deliveries, "
+            f"{len(self.connections)} executors connected, {self.dropped} dropped"
+        )
+
+
+class SignalSubscriber:
+    """
+    Executor side of the channel; reconnects after the signal process restarts.
+    """
+
+    def __init__(self, address: tuple, authkey: bytes, retry_seconds: float = 5.0):
+        self.address = address
+        self.authkey = authkey
+        self.retry_seconds = retry_seconds
+        self.conn = None
+
+    def receive(self, stop_event: threading.Event):
+        """
+        Next message, or None once stop_event is set.
+        """
+        while not stop_event.is_set():
+            if self.conn is None:
+                try:
+                    self.conn = Client(self.address, authkey=self.authkey)
+                    logging.info(f"🔌 Connected to signal process at {self.address[0]}:{self.address[1]}")
+                except OSError as e:
+                    logging.warning(f"⚠️ Signal process unreachable ({e}); retrying in {self.retry_seconds}s")
+                    stop_event.wait(self.retry_seconds)
+                    continue
+            try:
+                if self.conn.poll(POLL_SECONDS):
+                    return self.conn.recv()
+            except (OSError, EOFError):
+                logging.warning("⚠️ Lost connection to signal process")
+                self.conn.close()
+                self.conn = None
+        return None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def scope_to_account(account: dict):
+    """
+    Points per-process files (state snapshots, order analytics, log file) at
+    an account subdirectory. Must run before main is imported, since its
+    singletons read these paths at import time.
+    """
+    name = account["name"]
+    state = CONFIG.setdefault("state", {})
+    state["path"] = os.path.join(state.get("path", "state"), name)
+    analytics = CONFIG.setdefault("order_analytics", {})
+    path = analytics.get("path", os.path.join("logs", "order_analytics.jsonl"))
+    analytics["path"] = os.path.join(os.path.dirname(path), name, os.path.basename(path))
+    log_settings = CONFIG.setdefault("logging", {})
+    if log_settings.get("file"):
+        root, ext = os.path.splitext(log_settings["file"])
+        log_settings["file"] = f"{root}-{name}{ext}"
+
+
+def run_signal():
+    """
+    Fetches, evaluates and publishes; places no orders and manages no positions.
+    """
+    settings = get_fanout_settings()
+    import main
+
+    publisher = SignalPublisher(_address(settings), _authkey(settings))
+    main.signal_publisher = publisher
+    logging.info(f"📡 Publishing signals on {_address(settings)[0]}:{_address(settings)[1]}")
+    try:
+        main.run_bot(engine=True, trading=False)
+    finally:
+        logging.info(publisher.get_summary())
+        publisher.close()
+
+
+def run_executor(account_name: str):
+    """
+    Logs into one account and places every fresh signal it receives, while
+    running the usual trade manager and history sync for that account.
+    """
+    settings = get_fanout_settings()
+    accounts = {account["name"]: account for account in settings.get("accounts", [])}
+    if account_name not in accounts:
+        raise SystemExit(f"Unknown fan-out account {account_name!r}; configured: {', '.join(accounts) or 'none'}")
+    account = accounts[account_name]
+    scope_to_account(account)
+
+    import MetaTrader5 as mt5
+    import main
+
+    credentials = {key: account[key] for key in ("path", "login", "password", "server") if account.get(key)}
+    if not mt5.initialize(**credentials):
+        raise SystemExit(f"MT5 initialization failed for {account_name}: {mt5.last_error()}")
+
+    max_age = settings.get("max_signal_age_seconds", 30)
+    subscriber = SignalSubscriber(_address(settings), _authkey(settings), settings.get("retry_seconds", 5))
+    counts = {"received": 0, "placed": 0, "stale": 0}
+
+    def consume():
+        while True:
+            message = subscriber.receive(main.runtime.stop_event)
+            if message is None:
+                return
+            if message.get("kind") == "missed":
+                # 🎯 Armed orders live here, so invalidations are applied here too
+                with main.state_lock:
+                    main.armed_orders.missed(message["symbol"], message["strategy"])
+                continue
+            if message.get("kind") != "signal":
+                continue
+            counts["received"] += 1
+            trade = message["signal"]
+            age = clock.time() - message["sent_at"]
+            if age > max_age:
+                counts["stale"] += 1
+                logging.warning(f"⚠️ Skipping stale signal {message['id']} for {trade.get('symbol')} ({age:.0f}s old)")
+                continue
+            # Armed strategies start their cooldown here, on the fill, not in the signal process
+            if main.in_cooldown(trade["symbol"], trade["strategy"]):
+                continue
+            if main.place_trade(trade):
+                counts["placed"] += 1
+
+    def start_consumer():
+        threading.Thread(target=consume, name=f"fanout-{account_name}", daemon=True).start()
+
+    logging.info(f"🧾 Executor for account {account_name} ({account.get('login', 'terminal default')}) starting")
+    try:
+        main.run_bot(engine=False, trading=True, on_start=start_consumer)
+    finally:
+        subscriber.close()
+        logging.info(
+            f"📡 Executor {account_name}: {counts['received']} signals received, "
+            f"{counts['placed']} placed, {counts['stale']} stale"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the DCRAI bot as a fan-out signal or executor process.")
+    parser.add_argument("role", choices=["signal", "executor"])
+    parser.add_argument("--account", help="executor account name from config fanout.accounts")
+    args = parser.parse_args()
+    if args.role == "signal":
+        run_signal()
+    elif not args.account:
+        parser.error("executor needs --account")
+    else:
+        run_executor(args.account)
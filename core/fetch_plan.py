@@ -0,0 +1,63 @@
+# core/fetch_plan.py
+
+import logging
+
+# Assumed for strategies that do not declare REQUIREMENTS: the original full fetch
+DEFAULT_REQUIREMENTS = {
+    "timeframe": "M5",
+    "bars": 500,
+    "fair_value_gaps": True,
+    "volume_series": True,
+    "ohlcv": False,
+    "ohlcv_tz": False,
+    "indicators": False,  # streaming EMA/RSI/ATR/volume/VWAP values (utils/indicators.py)
+    "uses_clock": False,  # answer depends on wall-clock time, not only on the bars (see core/strategy_cache.py)
+    "session": None,  # daily active window; evaluated only inside it (see core/session_scheduler.py)
+}
+FEATURE_FLAGS = ("fair_value_gaps", "volume_series", "ohlcv", "ohlcv_tz", "indicators")
+
+
+def strategy_requirements(strategy) -> dict:
+    return {**DEFAULT_REQUIREMENTS, **getattr(strategy, "REQUIREMENTS", {})}
+
+
+def build_fetch_plan(strategy_map: dict, strategy_lookup: dict) -> dict:
+    """
+    Turns symbol_strategy_map into one fetch per (symbol, timeframe):
+        {symbol: {timeframe: {"bars": int, <feature>: bool, "strategies": [names]}}}
+    Bars are the max over the strategies sharing the fetch, features their union,
+    so every symbol/timeframe is fetched and parsed once per cycle.
+    """
+    plan = {}
+    for symbol, strategy_names in strategy_map.items():
+        for name in strategy_names:
+            strategy = strategy_lookup.get(name)
+            if strategy is None:
+                logging.warning(f"⚠️ Unknown strategy '{name}' mapped to {symbol}, skipping.")
+                continue
+
+            req = strategy_requirements(strategy)
+            spec = plan.setdefault(symbol, {}).setdefault(req["timeframe"], {
+                "bars": 0,
+                **{flag: False for flag in FEATURE_FLAGS},
+                "strategies": []
+            })
+            spec["bars"] = max(spec["bars"], req["bars"])
+            for flag in FEATURE_FLAGS:
+                spec[flag] = spec[flag] or bool(req.get(flag))
+            spec["strategies"].append(name)
+    return plan
+
+
+def iter_fetches(plan: dict):
+    """
+    Yields (symbol, timeframe, spec) for every planned fetch.
+    """
+    for symbol, timeframes in plan.items():
+        for timeframe, spec in timeframes.items():
+            yield symbol, timeframe, spec
+
+
+def describe_fetch_plan(plan: dict) -> str:
+    fetches = sum(len(timeframes) for timeframes in plan.values())
+    return f"🗺️ Fetch plan: {len(plan)} symbols, {fetches} fetches"
@@ -0,0 +1,117 @@
+# core/history_backfill.py
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+import MetaTrader5 as mt5
+
+from core.config_loader import get_bar_store_settings, get_strategy_map
+from utils.bar_store import BarStore
+
+TIMEFRAMES = {
+    "M1": mt5.TIMEFRAME_M1,
+    "M5": mt5.TIMEFRAME_M5,
+    "M15": mt5.TIMEFRAME_M15,
+    "M30": mt5.TIMEFRAME_M30,
+    "H1": mt5.TIMEFRAME_H1,
+    "H4": mt5.TIMEFRAME_H4,
+    "D1": mt5.TIMEFRAME_D1,
+}
+
+
+def open_bar_store() -> BarStore:
+    """
+    Builds a BarStore from the `bar_store` config section.
+    """
+    settings = get_bar_store_settings()
+    return BarStore(settings.get("path", "data/bars"), settings.get("float32_prices", False))
+
+
+def backfill(store: BarStore, symbol: str, timeframe: str, start: datetime, end: datetime = None,
+             chunk_days: int = None) -> int:
+    """
+    Fills the store with [start, end] in chunks of `chunk_days`.
+    Progress is saved in meta.json after every chunk, so an interrupted
+    backfill resumes from the last completed chunk.
+    """
+    if not mt5.initialize():
+        logging.error("❌ Failed to initialize MT5")
+        return 0
+
+    chunk_days = chunk_days or get_bar_store_settings().get("backfill_chunk_days", 30)
+    end = end or datetime.now(timezone.utc)
+    meta = store.read_meta(symbol, timeframe)
+    cursor = meta.get("backfill_cursor")
+    chunk_start = datetime.fromtimestamp(cursor, timezone.utc) if cursor else _utc(start)
+
+    # The store is append-only: without a cursor, continue from the stored tail
+    if meta.get("last_time") and not cursor:
+        chunk_start = datetime.fromtimestamp(meta["last_time"], timezone.utc)
+
+    total = 0
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+        rates = mt5.copy_rates_range(symbol, TIMEFRAMES[timeframe], chunk_start, chunk_end)
+        if rates is None:
+            logging.warning(f"⚠️ Backfill chunk failed for {symbol} {timeframe}: {mt5.last_error()}")
+            break
+
+        if len(rates) == 0:
+            chunk_start = chunk_end
+            continue
+
+        total += store.append(symbol, timeframe, rates)
+        meta = store.read_meta(symbol, timeframe) or {"count": 0, "first_time": None, "last_time": None,
+                                                      "float32_prices": store.float32_prices}
+        meta["backfill_cursor"] = int(chunk_end.timestamp())
+        store.write_meta(symbol, timeframe, meta)
+        chunk_start = chunk_end
+
+    logging.info(f"📦 Backfilled {total} bars for {symbol} {timeframe}")
+    return total
+
+
+def sync_recent(store: BarStore, symbol: str, timeframe: str, lookback_days: int = 365) -> int:
+    """
+    Appends bars newer than the stored tail. Falls back to a full backfill
+    of `lookback_days` when nothing is stored yet.
+    """
+    last_time = store.last_time(symbol, timeframe)
+    now = datetime.now(timezone.utc)
+    if last_time is None:
+        return backfill(store, symbol, timeframe, now - timedelta(days=lookback_days), now)
+
+    if not mt5.initialize():
+        logging.error("❌ Failed to initialize MT5")
+        return 0
+
+    rates = mt5.copy_rates_range(symbol, TIMEFRAMES[timeframe], datetime.fromtimestamp(last_time, timezone.utc), now)
+    if rates is None:
+        logging.warning(f"⚠️ Incremental sync failed for {symbol} {timeframe}: {mt5.last_error()}")
+        return 0
+    return store.append(symbol, timeframe, rates)
+
+
+def sync_mapped_symbols(store: BarStore = None) -> dict:
+    """
+    Brings every symbol in symbol_strategy_map up to date for the configured timeframes.
+    """
+    settings = get_bar_store_settings()
+    store = store or open_bar_store()
+    added = {}
+    for symbol in get_strategy_map():
+        for timeframe in settings.get("timeframes", ["M5"]):
+            try:
+                added[(symbol, timeframe)] = sync_recent(store, symbol, timeframe, settings.get("backfill_days", 365))
+            except Exception as e:
+                logging.error(f"❌ Bar store sync failed for {symbol} {timeframe}: {e}")
+    return added
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+    sync_mapped_symbols()
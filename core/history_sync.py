@@ -0,0 +1,145 @@
+# core/history_sync.py
+
+import logging
+from datetime import datetime, timezone
+
+import MetaTrader5 as mt5
+
+from core.trade_executor import strategy_magic, MAGIC_BASE, MAGIC_SPAN
+from utils import clock
+
+CLOSING_ENTRIES = {mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_OUT_BY, mt5.DEAL_ENTRY_INOUT}
+EXIT_BY_REASON = {mt5.DEAL_REASON_SL: "sl", mt5.DEAL_REASON_TP: "tp", mt5.DEAL_REASON_SO: "stop_out"}
+# Broker server time can run ahead of the local clock; the query window reaches past "now"
+SERVER_AHEAD_SECONDS = 86400
+
+
+class HistorySync:
+    """
+    Pulls new deals from the terminal's history after a persisted
+    (time_msc, ticket) cursor and turns closed positions into trade outcomes.
+
+    Deals belong to the bot when their magic is one of strategy_magic(s);
+    they are grouped by position_id, which is the ticket of the opening order
+    that execute_trade records. Entry costs and partial closes accumulate
+    until the closed volume reaches the opened volume, then the outcome (net
+    PnL, volume-weighted exit price, exit time and reason) is handed to
+    tracker.apply_outcomes in batches of batch_size. Only deals after the
+    cursor are requested; the first sync starts lookback_days back.
+
+    Orders placed before strategy_magic() used crc32 carry
+    MAGIC_BASE + hash(strategy) % MAGIC_SPAN, and hash() was salted per
+    process, so their magic cannot be recomputed. With legacy_magics every
+    magic in the bot's block is accepted, so positions still open from
+    before the switch get their outcomes synced; turn it off once they
+    have all closed.
+    """
+
+    def __init__(self, tracker, strategies, lookback_days: float = 7, batch_size: int = 50, on_batch=None,
+                 legacy_magics: bool = False):
+        self.tracker = tracker
+        self.magics = {strategy_magic(strategy): strategy for strategy in strategies}
+        self.legacy_magics = legacy_magics
+        self.lookback_days = lookback_days
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.cursor = None
+        self.opened = {}
+        self.pending = {}
+        self.deals_seen = 0
+        self.outcomes_applied = 0
+        self.unmatched = 0
+
+    def sync(self) -> int:
+        """
+        Processes deals since the cursor; returns the number of outcomes applied.
+        """
+        now = clock.time()
+        start = self.cursor["time_msc"] // 1000 if self.cursor else now - self.lookback_days * 86400
+        deals = mt5.history_deals_get(
+            datetime.fromtimestamp(start, timezone.utc),
+            datetime.fromtimestamp(now + SERVER_AHEAD_SECONDS, timezone.utc)
+        )
+        if deals is None:
+            logging.warning(f"⚠️ Could not read deal history: {mt5.last_error()}")
+            return 0
+
+        after = (self.cursor["time_msc"], self.cursor["ticket"]) if self.cursor else (-1, -1)
+        fresh = sorted((d for d in deals if (d.time_msc, d.ticket) > after), key=lambda d: (d.time_msc, d.ticket))
+        outcomes = []
+        applied = 0
+        for deal in fresh:
+            self.cursor = {"time_msc": deal.time_msc, "ticket": deal.ticket}
+            self.deals_seen += 1
+            outcome = self._apply_deal(deal)
+            if outcome is not None:
+                outcomes.append(outcome)
+            if len(outcomes) >= self.batch_size:
+                applied += self._flush(outcomes)
+                outcomes = []
+        applied += self._flush(outcomes)
+        return applied
+
+    def _apply_deal(self, deal):
+        if deal.magic not in self.magics and not (
+                self.legacy_magics and MAGIC_BASE <= deal.magic < MAGIC_BASE + MAGIC_SPAN):
+            return None
+        position = deal.position_id
+        totals = self.pending.setdefault(position, {"profit": 0.0, "volume": 0.0, "value": 0.0})
+        totals["profit"] += deal.profit + deal.commission + deal.swap + getattr(deal, "fee", 0.0)
+
+        if deal.entry == mt5.DEAL_ENTRY_IN:
+            self.opened[position] = self.opened.get(position, 0.0) + deal.volume
+            return None
+        if deal.entry not in CLOSING_ENTRIES:
+            return None
+
+        totals["volume"] += deal.volume
+        totals["value"] += deal.price * deal.volume
+        opened = self.opened.get(position) or self.tracker.volume_of(position)
+        if opened and totals["volume"] < opened - 1e-9:
+            return None  # partial close, the rest is still open
+
+        self.pending.pop(position)
+        self.opened.pop(position, None)
+        pnl = round(totals["profit"], 2)
+        reason = EXIT_BY_REASON.get(deal.reason)
+        if reason is None:
+            reason = "max_duration" if (deal.comment or "").startswith("Auto-close") else "manual"
+        return {
+            "ticket": position,
+            "pnl": pnl,
+            "result": "win" if pnl > 0 else "loss" if pnl < 0 else "breakeven",
+            "exit_price": totals["value"] / totals["volume"],
+            "exit_time": str(datetime.fromtimestamp(deal.time, timezone.utc).replace(tzinfo=None)),
+            "exit_reason": reason,
+        }
+
+    def _flush(self, outcomes: list) -> int:
+        if not outcomes:
+            return 0
+        matched = self.tracker.apply_outcomes(outcomes)
+        self.unmatched += len(outcomes) - matched
+        self.outcomes_applied += matched
+        if self.on_batch is not None:
+            self.on_batch(outcomes)
+        logging.info(f"🧾 History sync: {matched}/{len(outcomes)} closed trades matched to recorded entries")
+        return matched
+
+    def export(self) -> dict:
+        return {
+            "cursor": self.cursor,
+            "opened": {str(position): volume for position, volume in self.opened.items()},
+            "pending": {str(position): totals for position, totals in self.pending.items()},
+        }
+
+    def restore(self, exported: dict):
+        self.cursor = exported.get("cursor")
+        self.opened = {int(position): volume for position, volume in exported.get("opened", {}).items()}
+        self.pending = {int(position): totals for position, totals in exported.get("pending", {}).items()}
+
+    def get_summary(self) -> str:
+        return (
+            f"🧾 History sync: {self.deals_seen} deals read, {self.outcomes_applied} outcomes applied, "
+            f"{self.unmatched} unmatched, {len(self.opened)} positions open"
+        )
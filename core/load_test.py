@@ -0,0 +1,273 @@
+# core/load_test.py
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+from utils.clock import VirtualClock, set_clock
+from utils.replay_broker import ReplayBroker
+
+STRATEGIES = ["fib_fvg", "inversion_fvg", "volume_liquidity", "doji_confirmation",
+              "london_open_breakout", "ten_am_manipulation"]
+# Bars the strategies need before the first engine cycle (500 M5 bars), in M1 bars
+WARMUP_MINUTES = 500 * 5 + 60
+
+
+def synthetic_source(symbols: list, minutes: int, start="2024-03-04", seed: int = 11) -> dict:
+    """
+    M1 random walks per symbol in the ReplayBroker source layout, with
+    volatility regimes (quiet stretches and bursts) so gaps, dojis and
+    breakouts occur, and spreads that widen with volatility.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=minutes, freq="1min", name="time")
+    source = {}
+    for symbol in symbols:
+        base = rng.uniform(0.8, 2.0)
+        regime = np.repeat(rng.choice([0.5, 1.0, 3.0], size=minutes // 60 + 1, p=[0.3, 0.55, 0.15]), 60)[:minutes]
+        step = base * 0.00015 * regime
+        close = base * np.exp(np.cumsum(rng.normal(0, 1, minutes) * step / base))
+        open_ = np.r_[close[0], close[:-1]] + rng.normal(0, 0.3, minutes) * step
+        high = np.maximum(open_, close) + rng.exponential(0.5, minutes) * step
+        low = np.minimum(open_, close) - rng.exponential(0.5, minutes) * step
+        source[symbol] = {"M1": pd.DataFrame({
+            "open": open_, "high": high, "low": low, "close": close,
+            "tick_volume": rng.integers(10, 200, minutes) * regime.astype(int).clip(1),
+            "spread": (rng.integers(5, 15, minutes) * regime).astype(int),
+            "real_volume": np.zeros(minutes, dtype=int),
+        }, index=index)}
+    return source
+
+
+class LoadTestBroker(ReplayBroker):
+    """
+    ReplayBroker over synthetic bars that counts every terminal call made
+    through the installed module and adds latency: order_latency_ms to
+    order_send/order_check, call_latency_ms to everything else (the
+    terminal's IPC round trip).
+    """
+
+    def __init__(self, source, symbols: list, order_latency_ms: float = 0.0, call_latency_ms: float = 0.0, **kwargs):
+        super().__init__(source, symbols, **kwargs)
+        self.order_latency = order_latency_ms / 1000.0
+        self.call_latency = call_latency_ms / 1000.0
+        self.calls = Counter()
+
+    def instrument(self, module):
+        """
+        Wraps the functions of the installed `MetaTrader5` module.
+        """
+        for name in dir(module):
+            fn = getattr(module, name)
+            if name.startswith("_") or name.isupper() or not callable(fn) or name == "broker":
+                continue
+            setattr(module, name, self._counted(name, fn))
+        return module
+
+    def _counted(self, name: str, fn):
+        latency = self.order_latency if name in ("order_send", "order_check") else self.call_latency
+
+        @wraps(fn)
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            if latency:
+                time.sleep(latency)
+            return fn(*args, **kwargs)
+
+        return counted
+
+    def seed_positions(self, count: int, strategy_map: dict, seed: int = 5):
+        """
+        Opens `count` positions spread over the mapped symbols, tagged with
+        their strategies' magic numbers so the trade manager handles them.
+        Stops sit far away, so they stay open for the whole run.
+        """
+        from core.trade_executor import strategy_magic
+
+        rng = np.random.default_rng(seed)
+        symbols = list(strategy_map)
+        for i in range(count):
+            symbol = symbols[i % len(symbols)]
+            strategy = strategy_map[symbol][i % len(strategy_map[symbol])]
+            quote = self._quote(symbol)
+            buy = bool(rng.integers(0, 2))
+            price = quote.ask if buy else quote.bid
+            self.order_send({
+                "action": self.TRADE_ACTION_DEAL, "symbol": symbol, "volume": 0.01,
+                "type": self.ORDER_TYPE_BUY if buy else self.ORDER_TYPE_SELL,
+                "sl": price * (0.9 if buy else 1.1), "tp": price * (1.1 if buy else 0.9),
+                "magic": strategy_magic(strategy), "comment": f"DCRAI_{strategy}_LOAD",
+            })
+
+
+def _peak_memory_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def _timing(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(samples),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+def run_load_test(symbols: int = 50, positions: int = 20, cycles: int = 4, strategies_per_symbol: int = 2,
+                  order_latency_ms: float = 20.0, call_latency_ms: float = 0.0, engine_minutes: int = 15,
+                  manager_minutes: int = 1, balance: float = 10000.0, seed: int = 11) -> dict:
+    """
+    Drives main's strategy engine and trade manager over `symbols`
+    synthetic symbols with `positions` open positions. Installs the broker
+    as `MetaTrader5` before importing main, so it has to run in a fresh
+    process (see sweep). The first engine cycle is reported apart, since it
+    fetches every symbol's full window.
+    """
+    if sys.platform == "win32":
+        import tracemalloc
+        tracemalloc.start()
+
+    from core.config_loader import CONFIG
+    from core.replay import load_bot
+
+    names = [f"SYN{i:04d}" for i in range(symbols)]
+    strategy_map = {
+        name: [STRATEGIES[(i + k) % len(STRATEGIES)] for k in range(strategies_per_symbol)]
+        for i, name in enumerate(names)
+    }
+    CONFIG["symbol_strategy_map"] = strategy_map
+
+    minutes = WARMUP_MINUTES + cycles * engine_minutes + 5
+    source = synthetic_source(names, minutes, seed=seed)
+    clock = VirtualClock(source[names[0]]["M1"].index[WARMUP_MINUTES])
+    set_clock(clock)
+    broker = LoadTestBroker(source, names, order_latency_ms=order_latency_ms, call_latency_ms=call_latency_ms,
+                            balance=balance, clock=clock)
+    main = load_bot(broker)
+    broker.seed_positions(positions, strategy_map, seed=seed)
+    broker.instrument(sys.modules["MetaTrader5"])
+
+    engine_times, engine_cpu, manager_times, manager_cpu, engine_calls = [], [], [], [], []
+    session_time = 0.0
+    next_engine = next_manager = clock.time()
+    end = clock.time() + cycles * engine_minutes * 60
+    while clock.time() < end:
+        if clock.time() >= next_engine:
+            calls_before = sum(broker.calls.values())
+            wall, cpu = time.perf_counter(), time.process_time()
+            main.run_dcrai_strategy_engine()
+            engine_times.append(time.perf_counter() - wall)
+            engine_cpu.append(time.process_time() - cpu)
+            engine_calls.append(sum(broker.calls.values()) - calls_before)
+            next_engine += engine_minutes * 60
+        if clock.time() >= next_manager:
+            wall, cpu = time.perf_counter(), time.process_time()
+            main.run_trade_manager()
+            manager_times.append(time.perf_counter() - wall)
+            manager_cpu.append(time.process_time() - cpu)
+            next_manager += manager_minutes * 60
+        wall = time.perf_counter()
+        main.run_session_strategies()
+        session_time += time.perf_counter() - wall
+        clock.advance(60)
+
+    return {
+        "symbols": symbols,
+        "positions": positions,
+        "strategies_per_symbol": strategies_per_symbol,
+        "order_latency_ms": order_latency_ms,
+        "call_latency_ms": call_latency_ms,
+        "engine_first_cycle_s": engine_times[0],
+        "engine_cycle_s": _timing(engine_times[1:]),
+        "engine_cpu_s": statistics.fmean(engine_cpu[1:]) if len(engine_cpu) > 1 else engine_cpu[0],
+        "engine_broker_calls": statistics.fmean(engine_calls[1:]) if len(engine_calls) > 1 else engine_calls[0],
+        "manager_cycle_s": _timing(manager_times),
+        "manager_cpu_s": statistics.fmean(manager_cpu),
+        "session_pass_total_s": session_time,
+        "broker_calls": dict(broker.calls.most_common()),
+        "open_positions": len(broker.positions),
+        "orders": len(main.performance_tracker.trades),
+        "peak_memory_mb": _peak_memory_mb(),
+    }
+
+
+def sweep(configs: list) -> list:
+    """
+    Runs each configuration (keyword arguments of run_load_test) in its own
+    process, so imports and peak memory do not carry over between them.
+    """
+    results = []
+    for config in configs:
+        args = [sys.executable, "-m", "core.load_test", "--json"]
+        for key, value in config.items():
+            args += [f"--{key.replace('_', '-')}", str(value)]
+        completed = subprocess.run(args, capture_output=True, text=True, cwd=os.getcwd())
+        if completed.returncode != 0:
+            logging.error(f"❌ Load test {config} failed:\n{completed.stderr[-2000:]}")
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def format_report(results: list) -> str:
+    lines = [
+        "🏋️ Load test",
+        f"{'symbols':>8} {'pos':>5} {'first':>8} {'cycle':>8} {'p95':>8} {'cpu':>7} "
+        f"{'calls':>7} {'manager':>8} {'peak MB':>8}",
+    ]
+    for r in results:
+        cycle = r["engine_cycle_s"] or {"mean": r["engine_first_cycle_s"], "p95": r["engine_first_cycle_s"]}
+        lines.append(
+            f"{r['symbols']:>8} {r['positions']:>5} {r['engine_first_cycle_s']:>7.2f}s {cycle['mean']:>7.2f}s "
+            f"{cycle['p95']:>7.2f}s {r['engine_cpu_s']:>6.2f}s {r['engine_broker_calls']:>7.0f} "
+            f"{r['manager_cycle_s']['mean']:>7.3f}s {r['peak_memory_mb']:>8.0f}"
+        )
+    for r in results:
+        top = ", ".join(f"{name} {count}" for name, count in list(r["broker_calls"].items())[:6])
+        lines.append(f"   {r['symbols']} symbols / {r['positions']} positions: {top}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m core.load_test --grid "50x20,200x100,500x300"
+    parser = argparse.ArgumentParser(description="Load-test the engine and trade manager on a synthetic broker")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--cycles", type=int, default=4)
+    parser.add_argument("--strategies-per-symbol", type=int, default=2)
+    parser.add_argument("--order-latency-ms", type=float, default=20.0)
+    parser.add_argument("--call-latency-ms", type=float, default=0.0)
+    parser.add_argument("--grid", help="comma separated SYMBOLSxPOSITIONS configurations, each in its own process")
+    parser.add_argument("--json", action="store_true", help="print the result of a single run as JSON")
+    args = parser.parse_args()
+
+    if args.grid:
+        logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+        common = {"cycles": args.cycles, "strategies_per_symbol": args.strategies_per_symbol,
+                  "order_latency_ms": args.order_latency_ms, "call_latency_ms": args.call_latency_ms}
+        grid = [dict(zip(("symbols", "positions"), map(int, item.split("x"))), **common)
+                for item in args.grid.split(",")]
+        print(format_report(sweep(grid)))
+    else:
+        logging.disable(logging.ERROR)  # per-symbol logging would dominate the timings
+        result = run_load_test(args.symbols, args.positions, args.cycles, args.strategies_per_symbol,
+                               args.order_latency_ms, args.call_latency_ms)
+        print(json.dumps(result) if args.json else format_report([result]))
@@ -0,0 +1,124 @@
+# core/order_analytics.py
+
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from core.config_loader import get_order_analytics_settings
+
+
+class OrderTrace:
+    """
+    Timing spans and price data for a single execute_trade call.
+    """
+
+    def __init__(self, symbol: str, strategy: str, requested_price: float):
+        self.symbol = symbol
+        self.strategy = strategy
+        self.requested_price = requested_price
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.fields = {}
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Repeated spans (order retries) add up
+            self.spans[name] = round(self.spans.get(name, 0.0) + (time.perf_counter() - t0) * 1000, 3)
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def to_record(self) -> dict:
+        return {
+            "time": datetime.now().isoformat(),
+            "symbol": self.symbol,
+            "strategy": self.strategy,
+            "requested_price": self.requested_price,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans_ms": self.spans,
+            **self.fields,
+        }
+
+
+class OrderAnalytics:
+    """
+    Writes one JSON line per order attempt and keeps per (symbol, strategy) aggregates.
+    """
+
+    def __init__(self, path: str = None, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.stats = defaultdict(lambda: {
+            "orders": 0,
+            "retcodes": Counter(),
+            "span_total_ms": Counter(),
+            "span_max_ms": {},
+            "slippage_total": 0.0,
+            "slippage_max": 0.0,
+            "fills": 0,
+            "spread_total": 0.0,
+        })
+
+    def record(self, trace: OrderTrace):
+        if not self.enabled:
+            return
+        record = trace.to_record()
+        self._aggregate(record)
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+            except OSError as e:
+                logging.warning(f"⚠️ Could not write order analytics: {e}")
+
+    def _aggregate(self, record: dict):
+        stats = self.stats[(record["symbol"], record["strategy"])]
+        stats["orders"] += 1
+        stats["retcodes"][record.get("retcode", record.get("status"))] += 1
+        for name, ms in record["spans_ms"].items():
+            stats["span_total_ms"][name] += ms
+            stats["span_max_ms"][name] = max(stats["span_max_ms"].get(name, 0), ms)
+        if record.get("slippage_points") is not None:
+            stats["fills"] += 1
+            stats["slippage_total"] += record["slippage_points"]
+            stats["slippage_max"] = max(stats["slippage_max"], record["slippage_points"])
+        if record.get("spread_points") is not None:
+            stats["spread_total"] += record["spread_points"]
+
+    def get_summary(self) -> str:
+        """
+        Returns a formatted per symbol/strategy latency and slippage summary.
+        """
+        if not self.stats:
+            return "📉 No orders to analyse."
+
+        lines = ["⏱️ **Order Path Analytics**"]
+        for (symbol, strategy), stats in sorted(self.stats.items()):
+            orders = stats["orders"]
+            spans = ", ".join(
+                f"{name} {total / orders:.1f}/{stats['span_max_ms'][name]:.1f}ms"
+                for name, total in stats["span_total_ms"].items()
+            )
+            avg_slip = stats["slippage_total"] / stats["fills"] if stats["fills"] else 0.0
+            avg_spread = stats["spread_total"] / orders
+            retcodes = ", ".join(f"{code}: {count}" for code, count in stats["retcodes"].items())
+            lines.append(f"• {symbol} / {strategy}: {orders} orders | retcodes [{retcodes}]")
+            lines.append(f"   - slippage avg {avg_slip:.1f} pts, max {stats['slippage_max']:.1f} pts | spread avg {avg_spread:.1f} pts")
+            lines.append(f"   - spans avg/max: {spans}")
+        return "\n".join(lines)
+
+
+_settings = get_order_analytics_settings()
+order_analytics = OrderAnalytics(
+    path=_settings.get("path", os.path.join("logs", "order_analytics.jsonl")),
+    enabled=_settings.get("enabled", True)
+)
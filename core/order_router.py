@@ -0,0 +1,173 @@
+# core/order_router.py
+
+import logging
+import time
+from contextlib import nullcontext
+
+import MetaTrader5 as mt5
+
+from core.config_loader import get_order_routing_settings
+from utils import clock
+
+RETRY_RETCODES = {mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_PRICE_CHANGED, mt5.TRADE_RETCODE_PRICE_OFF}
+FILLING_NAMES = {mt5.ORDER_FILLING_FOK: "FOK", mt5.ORDER_FILLING_IOC: "IOC", mt5.ORDER_FILLING_RETURN: "RETURN"}
+
+
+class OrderRouter:
+    """
+    Sends market orders with a filling mode the symbol accepts, a deviation
+    sized to current spread and volatility, an order_check pre-flight, and
+    retries on requotes / price changes / off quotes with a fresh tick while
+    the latency budget lasts.
+    """
+
+    def __init__(self, max_attempts: int = 4, latency_budget_ms: float = 1500, base_deviation_points: int = 10,
+                 spread_multiplier: float = 1.5, atr_fraction: float = 0.1, retry_deviation_growth: float = 1.5,
+                 max_deviation_points: int = 200, preflight: bool = True, atr_refresh_seconds: int = 60):
+        self.max_attempts = max_attempts
+        self.latency_budget_ms = latency_budget_ms
+        self.base_deviation_points = base_deviation_points
+        self.spread_multiplier = spread_multiplier
+        self.atr_fraction = atr_fraction
+        self.retry_deviation_growth = retry_deviation_growth
+        self.max_deviation_points = max_deviation_points
+        self.preflight = preflight
+        self.atr_refresh_seconds = atr_refresh_seconds
+        self.working_mode = {}
+        self.rejected_modes = {}
+        self.atr_points = {}
+
+    def filling_modes(self, symbol: str, info) -> list:
+        """
+        Candidate ORDER_FILLING_* modes for a symbol, best first: the last mode
+        that filled, then what symbol_info.filling_mode advertises, then RETURN.
+        """
+        flags = getattr(info, "filling_mode", 0) or 0
+        modes = []
+        if flags & mt5.SYMBOL_FILLING_IOC:
+            modes.append(mt5.ORDER_FILLING_IOC)
+        if flags & mt5.SYMBOL_FILLING_FOK:
+            modes.append(mt5.ORDER_FILLING_FOK)
+        modes.append(mt5.ORDER_FILLING_RETURN)
+
+        rejected = self.rejected_modes.get(symbol, set())
+        modes = [m for m in modes if m not in rejected] or modes
+        working = self.working_mode.get(symbol)
+        if working in modes:
+            modes.remove(working)
+            modes.insert(0, working)
+        return modes
+
+    def _atr_points(self, symbol: str, point: float) -> float:
+        cached = self.atr_points.get(symbol)
+        if cached and clock.time() - cached[0] < self.atr_refresh_seconds:
+            return cached[1]
+        rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M1, 0, 15)
+        if rates is None or len(rates) < 2:
+            return cached[1] if cached else 0.0
+        prev_close = rates["close"][:-1]
+        high, low = rates["high"][1:], rates["low"][1:]
+        true_range = [max(h - l, abs(h - c), abs(l - c)) for h, l, c in zip(high, low, prev_close)]
+        atr = sum(true_range) / len(true_range) / point
+        self.atr_points[symbol] = (clock.time(), atr)
+        return atr
+
+    def deviation_points(self, symbol: str, info, tick, attempt: int = 1) -> int:
+        """
+        Max accepted slippage: the larger of the base deviation and a multiple of
+        the current spread plus a fraction of M1 ATR, widened on each retry.
+        """
+        spread = (tick.ask - tick.bid) / info.point
+        adaptive = self.spread_multiplier * spread + self.atr_fraction * self._atr_points(symbol, info.point)
+        deviation = max(self.base_deviation_points, adaptive) * self.retry_deviation_growth ** (attempt - 1)
+        return int(min(round(deviation), self.max_deviation_points))
+
+    def send(self, request: dict, info, tick, trace=None):
+        """
+        Fills in price, deviation and type_filling and sends the order.
+        Returns (result, price sent on the final attempt); result is the
+        order_send (or failing order_check) result, or None if the terminal
+        returned nothing.
+        """
+        symbol = request["symbol"]
+        is_buy = request["type"] == mt5.ORDER_TYPE_BUY
+        modes = self.filling_modes(symbol, info)
+        deadline = time.perf_counter() + self.latency_budget_ms / 1000
+        retcodes = []
+        result = None
+        price = tick.ask if is_buy else tick.bid
+        checked_mode = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                with _span(trace, "symbol_info_tick"):
+                    tick = mt5.symbol_info_tick(symbol) or tick
+            price = tick.ask if is_buy else tick.bid
+            request.update(
+                price=price,
+                deviation=self.deviation_points(symbol, info, tick, attempt),
+                type_filling=modes[0]
+            )
+
+            if self.preflight and checked_mode != modes[0]:
+                checked_mode = modes[0]
+                with _span(trace, "order_check"):
+                    check = mt5.order_check(request)
+                if check is not None and check.retcode not in (0, mt5.TRADE_RETCODE_DONE):
+                    retcodes.append(check.retcode)
+                    if check.retcode == mt5.TRADE_RETCODE_INVALID_FILL and len(modes) > 1:
+                        self._reject_mode(symbol, modes.pop(0))
+                        continue
+                    if check.retcode not in RETRY_RETCODES:
+                        logging.info(f"🧾 order_check rejected {symbol}: [{check.retcode}] {check.comment}")
+                        result = check
+                        break
+
+            with _span(trace, "order_send"):
+                result = mt5.order_send(request)
+            if result is None:
+                break
+            retcodes.append(result.retcode)
+
+            if result.retcode == mt5.TRADE_RETCODE_DONE:
+                self.working_mode[symbol] = modes[0]
+                break
+            if result.retcode == mt5.TRADE_RETCODE_INVALID_FILL and len(modes) > 1:
+                self._reject_mode(symbol, modes.pop(0))
+                checked_mode = None
+                continue
+            if result.retcode not in RETRY_RETCODES or time.perf_counter() >= deadline:
+                break
+            logging.info(f"🔁 Retrying {symbol} after [{result.retcode}] {result.comment} (attempt {attempt})")
+
+        if trace:
+            trace.set(
+                attempts=len(retcodes) or 1,
+                attempt_retcodes=retcodes,
+                filling_mode=FILLING_NAMES.get(request.get("type_filling")),
+                deviation_points=request.get("deviation")
+            )
+        return result, price
+
+    def _reject_mode(self, symbol: str, mode: int):
+        logging.info(f"🧩 {symbol} does not accept {FILLING_NAMES.get(mode, mode)} filling, trying next mode")
+        self.rejected_modes.setdefault(symbol, set()).add(mode)
+        if self.working_mode.get(symbol) == mode:
+            del self.working_mode[symbol]
+
+
+def _span(trace, name: str):
+    return trace.span(name) if trace else nullcontext()
+
+
+_settings = get_order_routing_settings()
+order_router = OrderRouter(
+    max_attempts=_settings.get("max_attempts", 4),
+    latency_budget_ms=_settings.get("latency_budget_ms", 1500),
+    base_deviation_points=_settings.get("base_deviation_points", 10),
+    spread_multiplier=_settings.get("spread_multiplier", 1.5),
+    atr_fraction=_settings.get("atr_fraction", 0.1),
+    retry_deviation_growth=_settings.get("retry_deviation_growth", 1.5),
+    max_deviation_points=_settings.get("max_deviation_points", 200),
+    preflight=_settings.get("preflight", True)
+)
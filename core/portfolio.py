@@ -0,0 +1,78 @@
+# core/portfolio.py
+
+import logging
+
+import MetaTrader5 as mt5
+import pandas as pd
+
+from core.config_loader import get_risk_settings
+from utils.portfolio_risk import PortfolioRisk
+
+_settings = get_risk_settings()
+portfolio_risk = PortfolioRisk(
+    max_total_risk_percent=_settings.get("max_total_risk_percent", 5.0),
+    max_correlated_risk_percent=_settings.get("max_correlated_risk_percent", 3.0),
+    max_currency_exposure_percent=_settings.get("max_currency_exposure_percent", 300.0),
+    min_margin_level_percent=_settings.get("min_margin_level_percent", 200.0)
+)
+
+_symbol_info_cache = {}
+
+
+def cached_symbol_info(symbol: str):
+    """
+    Contract specs barely change intraday, so one symbol_info call per symbol is enough.
+    """
+    info = _symbol_info_cache.get(symbol)
+    if info is None:
+        info = mt5.symbol_info(symbol)
+        if info is not None:
+            _symbol_info_cache[symbol] = info
+    return info
+
+
+def position_risk(symbol: str, info, volume: float, price_open: float, sl: float, current_price: float):
+    """
+    Returns (money at risk, notional) in account currency for a position or order.
+    Positions without a stop count a fraction of their notional as risk.
+    """
+    value_per_price = info.trade_tick_value / info.trade_tick_size if info.trade_tick_size else 0.0
+    notional = volume * current_price * value_per_price
+    if sl:
+        risk = abs(price_open - sl) * value_per_price * volume
+    else:
+        risk = notional * _settings.get("no_sl_risk_fraction", 0.01)
+    return risk, notional
+
+
+def sync_portfolio() -> bool:
+    """
+    Rebuilds the exposure vectors from the account's open positions.
+    """
+    positions = mt5.positions_get()
+    if positions is None:
+        logging.warning("⚠️ Could not read positions for portfolio sync.")
+        return False
+
+    portfolio_risk.reset()
+    for pos in positions:
+        info = cached_symbol_info(pos.symbol)
+        if info is None:
+            continue
+        risk, notional = position_risk(pos.symbol, info, pos.volume, pos.price_open, pos.sl, pos.price_current)
+        portfolio_risk.add_position(pos.symbol, "buy" if pos.type == 0 else "sell", risk, notional)
+    return True
+
+
+def refresh_correlation(frames: dict):
+    """
+    Updates the correlation matrix from cached bar frames {(symbol, timeframe): DataFrame}
+    once it is older than `correlation_refresh_minutes`.
+    """
+    if portfolio_risk.correlation_age() < _settings.get("correlation_refresh_minutes", 60) * 60:
+        return
+    closes = pd.DataFrame({symbol: df["close"] for (symbol, _), df in frames.items() if len(df)})
+    if closes.shape[1] < 2:
+        return
+    portfolio_risk.update_correlation(closes.ffill().dropna(), _settings.get("correlation_lookback_bars", 200))
+    logging.info(f"🔗 Correlation matrix refreshed for {closes.shape[1]} symbols")
@@ -0,0 +1,115 @@
+# core/prescan.py
+
+import logging
+
+import MetaTrader5 as mt5
+
+from core.config_loader import get_prescan_settings
+from utils import clock
+
+GATES = ("no_quote", "market_closed", "stale_tick", "wide_spread", "cooldown")
+
+
+class PreScan:
+    """
+    Rules symbols out before any bar fetch or DataFrame work. One
+    symbols_get call per engine cycle gives every mapped symbol's trade mode,
+    spread and last quote time; each symbol is then checked in O(1):
+
+        no_quote       the terminal returned nothing for the symbol
+        market_closed  trading disabled or close-only
+        stale_tick     the quote time has not moved for max_tick_age_seconds
+        wide_spread    spread above max_spread_points[symbol], or above
+                       spread_multiplier x its running average
+        cooldown       every strategy mapped to the fetch is in cooldown
+
+    Quote times are broker server time, so staleness is measured locally:
+    how long the same quote time has been seen, not how old it is.
+    """
+
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+        self.max_tick_age = settings.get("max_tick_age_seconds", 300)
+        self.spread_multiplier = settings.get("spread_multiplier", 3.0)
+        self.max_spread_points = settings.get("max_spread_points", {})
+        self.min_spread_samples = settings.get("min_spread_samples", 10)
+        self.spread_alpha = 2.0 / (settings.get("spread_baseline_samples", 50) + 1)
+        self.snapshot = {}
+        self.quote_seen = {}
+        self.spread_baseline = {}
+        self.spread_samples = {}
+        self.counts = {gate: 0 for gate in GATES}
+        self.checked = 0
+
+    def refresh(self, symbols):
+        """
+        Takes this cycle's snapshot of the given symbols in a single call.
+        """
+        if not self.enabled:
+            return
+        infos = mt5.symbols_get(group=",".join(symbols))
+        if infos is None:
+            logging.warning(f"⚠️ Pre-scan snapshot failed: {mt5.last_error()}")
+            infos = ()
+        wanted = set(symbols)
+        self.snapshot = {info.name: info for info in infos if info.name in wanted}
+
+        now = clock.time()
+        for name, info in self.snapshot.items():
+            quote_time = getattr(info, "time", None)
+            seen = self.quote_seen.get(name)
+            if seen is None or seen[0] != quote_time:
+                self.quote_seen[name] = (quote_time, now)
+            self._track_spread(name, info.spread)
+
+    def _track_spread(self, symbol: str, spread: float):
+        if spread <= 0:
+            # Closed or quote-less symbols report 0; a zero baseline would gate every later quote
+            return
+        baseline = self.spread_baseline.get(symbol)
+        if baseline is None:
+            self.spread_baseline[symbol] = float(spread)
+        elif spread <= baseline * self.spread_multiplier:
+            # Spikes stay out of the average, so a long one cannot become the norm
+            self.spread_baseline[symbol] = baseline + self.spread_alpha * (spread - baseline)
+        self.spread_samples[symbol] = self.spread_samples.get(symbol, 0) + 1
+
+    def gate(self, symbol: str, strategies: list, in_cooldown) -> str:
+        """
+        Name of the first gate that rules the fetch out, or None to go ahead.
+        in_cooldown(strategy_name) is the engine's cooldown check.
+        """
+        if not self.enabled:
+            return None
+        self.checked += 1
+        reason = self._gate(symbol, strategies, in_cooldown)
+        if reason is not None:
+            self.counts[reason] += 1
+        return reason
+
+    def _gate(self, symbol: str, strategies: list, in_cooldown) -> str:
+        if all(in_cooldown(strategy) for strategy in strategies):
+            return "cooldown"
+        info = self.snapshot.get(symbol)
+        if info is None:
+            return "no_quote"
+        if info.trade_mode in (mt5.SYMBOL_TRADE_MODE_DISABLED, mt5.SYMBOL_TRADE_MODE_CLOSEONLY):
+            return "market_closed"
+        quote_time, first_seen = self.quote_seen[symbol]
+        if quote_time is not None and clock.time() - first_seen > self.max_tick_age:
+            return "stale_tick"
+        limit = self.max_spread_points.get(symbol)
+        if limit is not None and info.spread > limit:
+            return "wide_spread"
+        if (self.spread_samples.get(symbol, 0) >= self.min_spread_samples
+                and info.spread > self.spread_baseline[symbol] * self.spread_multiplier):
+            return "wide_spread"
+        return None
+
+    def get_summary(self) -> str:
+        filtered = ", ".join(f"{gate} {count}" for gate, count in self.counts.items())
+        return f"🚦 Pre-scan: {sum(self.counts.values())}/{self.checked} fetches filtered ({filtered})"
+
+
+prescan = PreScan(get_prescan_settings())
@@ -0,0 +1,108 @@
+# core/replay.py
+
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+
+import pandas as pd
+
+from utils.clock import VirtualClock, set_clock
+from utils.replay_broker import ReplayBroker, install
+
+
+def load_bot(broker):
+    """
+    Installs the broker as `MetaTrader5`, imports main and switches off the
+    side effects that would touch the live bot: Telegram alerts, the state
+    store and order analytics.
+    """
+    install(broker)
+    main = importlib.import_module("main")
+    from core import trade_executor
+    from core.bar_cache import BarCache
+    from core.order_analytics import order_analytics
+    from utils.state_store import StateStore
+
+    main.send_trade_alert = trade_executor.send_trade_alert = lambda data: None
+    main.state_store = StateStore(enabled=False)
+    main.bar_cache = BarCache()  # never pre-load from the bar store: it holds the future
+    order_analytics.enabled = False
+    return main
+
+
+def run_replay(source, symbols: list, start, end, base_timeframe: str = "M1", balance: float = 10000.0,
+               specs: dict = None, engine_minutes: int = 15, manager_minutes: int = 1,
+               step_seconds: int = 60) -> dict:
+    """
+    Drives the unmodified strategy engine and trade manager from main.py over
+    recorded bars on a virtual clock: the engine runs every engine_minutes,
+    the manager every manager_minutes, the session pass every step; time
+    advances in step_seconds.
+
+    The ReplayBroker is installed as `MetaTrader5` before main is imported, so
+    this has to run in a fresh process (see __main__). Side effects that
+    would touch the live bot are switched off (see load_bot). Returns the deals plus a digest of them, so
+    two replays of the same data can be compared for identical decisions.
+    """
+    clock = VirtualClock(pd.Timestamp(start))
+    end_epoch = VirtualClock(pd.Timestamp(end)).time()
+    set_clock(clock)
+    broker = ReplayBroker(source, symbols, base_timeframe=base_timeframe, balance=balance, specs=specs, clock=clock)
+    main = load_bot(broker)
+
+    engine_every = engine_minutes * 60
+    manager_every = manager_minutes * 60
+    next_engine = next_manager = clock.time()
+    cycles = 0
+    while clock.time() < end_epoch:
+        now = clock.time()
+        if now >= next_engine:
+            main.run_dcrai_strategy_engine()
+            next_engine += engine_every
+            cycles += 1
+        if now >= next_manager:
+            main.run_trade_manager()
+            next_manager += manager_every
+        main.run_session_strategies()
+        clock.advance(step_seconds)
+
+    account = broker.account_info()
+    deals = [vars(deal) for deal in broker.deals]
+    digest = hashlib.sha256(json.dumps(deals, sort_keys=True, default=str).encode()).hexdigest()
+    logging.warning(
+        f"🎞️ Replay {start} → {end}: {cycles} engine cycles, {len(deals)} deals, "
+        f"balance {balance:.2f} → {account.balance:.2f}, equity {account.equity:.2f}, digest {digest[:12]}"
+    )
+    return {
+        "deals": deals,
+        "digest": digest,
+        "balance": account.balance,
+        "equity": account.equity,
+        "open_positions": len(broker.positions),
+        "engine_cycles": cycles,
+        "trades": main.performance_tracker.trades,
+    }
+
+
+if __name__ == "__main__":
+    # python -m core.replay --start 2024-03-05 --end 2024-03-06 [--symbols EURUSD GBPUSD]
+    parser = argparse.ArgumentParser(description="Replay the bot against recorded bars from the bar store")
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    parser.add_argument("--symbols", nargs="*")
+    parser.add_argument("--base-timeframe", default="M1")
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='[%(asctime)s] %(levelname)s: %(message)s')
+    from core.config_loader import get_bar_store_settings, get_strategy_map
+    from utils.bar_store import BarStore
+
+    settings = get_bar_store_settings()
+    store = BarStore(settings.get("path", "data/bars"), settings.get("float32_prices", False))
+    run_replay(store, args.symbols or list(get_strategy_map()), args.start, args.end,
+               base_timeframe=args.base_timeframe, balance=args.balance)
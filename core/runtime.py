@@ -0,0 +1,186 @@
+# core/runtime.py
+
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+HIGH = 0
+NORMAL = 1
+
+
+class BrokerGateway:
+    """
+    Serialises terminal calls across job threads. Waiting HIGH priority
+    callers (the position manager) go before waiting NORMAL ones, so a long
+    scan only ever delays position management by a single broker call.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.busy = False
+        self.high_waiting = 0
+        self.local = threading.local()
+
+    @property
+    def priority(self) -> int:
+        return getattr(self.local, "priority", NORMAL)
+
+    @priority.setter
+    def priority(self, value: int):
+        self.local.priority = value
+
+    @contextmanager
+    def hold(self, priority: int = None):
+        priority = self.priority if priority is None else priority
+        # Re-entrant for the holding thread (a wrapped call calling another)
+        if getattr(self.local, "depth", 0):
+            self.local.depth += 1
+            try:
+                yield
+            finally:
+                self.local.depth -= 1
+            return
+
+        with self.condition:
+            if priority == HIGH:
+                self.high_waiting += 1
+                while self.busy:
+                    self.condition.wait()
+                self.high_waiting -= 1
+            else:
+                while self.busy or self.high_waiting:
+                    self.condition.wait()
+            self.busy = True
+        self.local.depth = 1
+        try:
+            yield
+        finally:
+            self.local.depth = 0
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def wrap_module(self, module):
+        """
+        Routes every function of the broker module (MetaTrader5) through the
+        gateway in place, so existing `mt5.<call>` sites need no changes.
+        """
+        for name in dir(module):
+            fn = getattr(module, name)
+            if name.startswith("_") or not callable(fn) or isinstance(fn, type) or getattr(fn, "__gateway__", False):
+                continue
+            setattr(module, name, self._wrap(fn))
+        return module
+
+    def _wrap(self, fn):
+        @wraps(fn)
+        def locked(*args, **kwargs):
+            with self.hold():
+                return fn(*args, **kwargs)
+
+        locked.__gateway__ = True
+        return locked
+
+
+class Job:
+    def __init__(self, name: str, fn, interval: float, priority: int, run_immediately: bool):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.priority = priority
+        self.run_immediately = run_immediately
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.thread = None
+
+
+class Runtime:
+    """
+    Runs each job on its own thread at a fixed cadence (measured from the
+    scheduled start, not the end of the previous run). A run longer than its
+    interval is an overrun: it is logged, and the ticks it swallowed are
+    skipped rather than queued. stop() lets running jobs finish.
+    """
+
+    def __init__(self, gateway: BrokerGateway = None):
+        self.gateway = gateway
+        self.jobs = []
+        self.stop_event = threading.Event()
+
+    def add_job(self, name: str, fn, interval_seconds: float, priority: int = NORMAL, run_immediately: bool = False):
+        self.jobs.append(Job(name, fn, interval_seconds, priority, run_immediately))
+
+    def start(self):
+        for job in self.jobs:
+            job.thread = threading.Thread(target=self._loop, args=(job,), name=f"job-{job.name}")
+            job.thread.start()
+        logging.info(f"🧵 Runtime started: {', '.join(f'{j.name}/{j.interval:g}s' for j in self.jobs)}")
+
+    def _loop(self, job: Job):
+        if self.gateway is not None:
+            self.gateway.priority = job.priority
+        next_run = time.monotonic() + (0 if job.run_immediately else job.interval)
+
+        while not self.stop_event.wait(max(0.0, next_run - time.monotonic())):
+            started = time.monotonic()
+            try:
+                job.fn()
+            except Exception as e:
+                job.errors += 1
+                logging.error("❌ Job %s failed: %s", job.name, e, exc_info=True)
+            duration = time.monotonic() - started
+            job.runs += 1
+            job.last_duration = duration
+            job.max_duration = max(job.max_duration, duration)
+
+            next_run += job.interval
+            now = time.monotonic()
+            if now > next_run:
+                missed = int((now - next_run) // job.interval) + 1
+                job.overruns += 1
+                job.skipped += missed
+                next_run += missed * job.interval
+                logging.warning(
+                    f"⏱️ Job {job.name} overran: {duration:.1f}s for a {job.interval:g}s interval, "
+                    f"skipping {missed} run(s)"
+                )
+
+    def stop(self, timeout: float = 60.0):
+        self.stop_event.set()
+        for job in self.jobs:
+            if job.thread is not None and job.thread is not threading.current_thread():
+                job.thread.join(timeout)
+                if job.thread.is_alive():
+                    logging.warning(f"⚠️ Job {job.name} still running after {timeout:g}s shutdown wait")
+
+    def run_forever(self, on_stop=None, shutdown_timeout: float = 60.0):
+        """
+        Starts the jobs and blocks until SIGINT/SIGTERM, then stops gracefully
+        and calls on_stop.
+        """
+        for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)):
+            if sig is not None:
+                signal.signal(sig, lambda signum, frame: self.stop_event.set())
+        self.start()
+        while not self.stop_event.wait(1.0):
+            pass
+        logging.info("🛑 Stopping runtime, waiting for running jobs")
+        self.stop(shutdown_timeout)
+        if on_stop is not None:
+            on_stop()
+
+    def get_summary(self) -> str:
+        lines = ["🧵 **Runtime Jobs**"]
+        for job in self.jobs:
+            lines.append(
+                f"• {job.name}: {job.runs} runs | last {job.last_duration:.1f}s, max {job.max_duration:.1f}s | "
+                f"overruns {job.overruns} (skipped {job.skipped}) | errors {job.errors}"
+            )
+        return "\n".join(lines)
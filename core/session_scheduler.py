@@ -0,0 +1,118 @@
+# core/session_scheduler.py
+
+import datetime as dt
+
+import pytz
+
+from core.fetch_plan import strategy_requirements
+from utils import clock
+
+ALL_WEEKDAYS = (0, 1, 2, 3, 4, 5, 6)
+
+
+class SessionWindow:
+    """
+    A daily active window from REQUIREMENTS["session"]:
+        {"start": "08:00", "end": "09:15", "weekdays": [0, 1, 2, 3, 4], "timezone": None}
+    `timezone` None means the engine's own (local) zone, the one chart_data
+    hands the session strategies. Windows end on the day they start.
+    """
+
+    def __init__(self, session: dict):
+        self.start = dt.time.fromisoformat(session["start"])
+        self.end = dt.time.fromisoformat(session["end"])
+        self.weekdays = tuple(session.get("weekdays", ALL_WEEKDAYS))
+        self.timezone = pytz.timezone(session["timezone"]) if session.get("timezone") else None
+
+    def _localize(self, day: dt.date, time_of_day: dt.time) -> dt.datetime:
+        moment = dt.datetime.combine(day, time_of_day)
+        return self.timezone.localize(moment) if self.timezone else moment
+
+    def position(self, now: dt.datetime) -> tuple:
+        """
+        (inside, seconds since start, seconds to end) when inside, else
+        (False, None, seconds to the next start).
+        """
+        start = self._localize(now.date(), self.start)
+        end = self._localize(now.date(), self.end)
+        if now.weekday() in self.weekdays and start <= now < end:
+            return True, (now - start).total_seconds(), (end - now).total_seconds()
+        for days in range(8):
+            day = now.date() + dt.timedelta(days=days)
+            start = self._localize(day, self.start)
+            if day.weekday() in self.weekdays and start > now:
+                return False, None, (start - now).total_seconds()
+        return False, None, 7 * 86400.0
+
+
+class SessionScheduler:
+    """
+    Evaluates strategies that declare an active window only inside it, on
+    their own cadence: every window_seconds inside the window, every
+    edge_seconds within edge_minutes of its start or end (where session
+    setups complete), and not at all outside, where each (symbol, strategy)
+    sleeps until its next window opens. The regular engine cycle leaves
+    these strategies to the scheduler's pass.
+    """
+
+    def __init__(self, settings: dict, strategy_lookup: dict):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+        self.window_seconds = settings.get("window_seconds", 60)
+        self.edge_seconds = settings.get("edge_seconds", 30)
+        self.edge_span = settings.get("edge_minutes", 5) * 60
+        self.windows = {}
+        for name, strategy in strategy_lookup.items():
+            session = strategy_requirements(strategy).get("session")
+            if session:
+                self.windows[name] = SessionWindow(session)
+        self.next_due = {}
+        self.evaluations = 0
+
+    def scheduled(self, strategy_name: str) -> bool:
+        return self.enabled and strategy_name in self.windows
+
+    def unscheduled(self, symbol: str, strategy_name: str) -> bool:
+        """
+        Engine cycle filter: everything the scheduler does not own.
+        """
+        return not self.scheduled(strategy_name)
+
+    def any_due(self, pairs) -> bool:
+        """
+        Whether any (symbol, strategy) pair is due; the pass sleeps otherwise.
+        """
+        now = clock.time()
+        return any(self.scheduled(name) and self.next_due.get((symbol, name), 0.0) <= now for symbol, name in pairs)
+
+    def take_due(self, symbol: str, strategy_name: str) -> bool:
+        """
+        Session pass filter: True if the pair is due now, in which case its
+        next evaluation is scheduled.
+        """
+        if not self.scheduled(strategy_name):
+            return False
+        now = clock.time()
+        key = (symbol, strategy_name)
+        if self.next_due.get(key, 0.0) > now:
+            return False
+
+        window = self.windows[strategy_name]
+        inside, since_start, to_end = window.position(clock.now(window.timezone))
+        if not inside:
+            self.next_due[key] = now + to_end
+            return False
+        near_edge = since_start < self.edge_span or to_end < self.edge_span
+        self.next_due[key] = now + (self.edge_seconds if near_edge else self.window_seconds)
+        self.evaluations += 1
+        return True
+
+    def get_summary(self) -> str:
+        if not self.enabled or not self.windows:
+            return "🗓️ Session scheduler: off"
+        now = clock.time()
+        sleeping = sum(1 for due in self.next_due.values() if due - now > self.window_seconds)
+        return (
+            f"🗓️ Session scheduler: {self.evaluations} in-window evaluations, "
+            f"{sleeping}/{len(self.next_due)} pairs sleeping until their window"
+        )
@@ -1,14 +1,21 @@
 # core/signal_parser.py
 
 import MetaTrader5 as mt5
-from datetime import datetime
 import pandas as pd
 import logging
 
+from utils.chart_state import build_chart_state, FULL_FEATURES
 
-def get_live_chart_state(symbol: str, timeframe=mt5.TIMEFRAME_M5, bars=500, return_df: bool = False) -> dict:
+
+def get_live_chart_state(symbol: str, timeframe=mt5.TIMEFRAME_M5, bars=500, return_df: bool = False,
+                         bar_cache=None, features: dict = None, fvg_index=None, closed_until: int = None) -> dict:
     """
     Fetch candles, indicators, and conditions for a given symbol.
+    With a BarCache only the bars since the previous call are fetched.
+    `features` limits the derived data to what the mapped strategies need.
+    With an FVGIndex, gaps are updated incrementally instead of rescanned,
+    from closed bars only: up to `closed_until` (open time of the last
+    closed bar), or all but the last bar, which is still forming.
     """
 
     # Ensure MT5 is initialized
@@ -29,47 +36,30 @@ def get_live_chart_state(symbol: str, timeframe=mt5.TIMEFRAME_M5, bars=500, retu
             return {}
 
     # Fetch candle data
-    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, bars)
-    if rates is None or len(rates) == 0:
-        logging.warning(f"⚠️ No candle data retrieved for {symbol} on timeframe {timeframe}")
-        return {}
+    if bar_cache is not None:
+        df = bar_cache.get_bars(symbol, timeframe, bars)
+        if df is None:
+            logging.warning(f"⚠️ No candle data retrieved for {symbol} on timeframe {timeframe}")
+            return {}
+    else:
+        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, bars)
+        if rates is None or len(rates) == 0:
+            logging.warning(f"⚠️ No candle data retrieved for {symbol} on timeframe {timeframe}")
+            return {}
 
-    df = pd.DataFrame(rates)
-    df['time'] = pd.to_datetime(df['time'], unit='s')
-    df.set_index('time', inplace=True)
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        df.set_index('time', inplace=True)
 
     if df.empty or df.isnull().values.any():
         logging.warning(f"⚠️ DataFrame is empty or contains NaNs for {symbol}")
         return {}
 
-    logging.info(f"📊 Retrieved {len(df)} bars for {symbol}")
+    logging.info("📊 Retrieved %d bars for %s", len(df), symbol)
 
     if return_df:
         return df
 
-    # Fair Value Gaps (simple detection logic)
-    fair_value_gaps = []
-    for i in range(2, len(df)):
-        if df['low'].iloc[i] > df['high'].iloc[i - 2]:  # Bullish gap
-            fair_value_gaps.append({
-                "price": float(df['low'].iloc[i]),
-                "type": "bullish"
-            })
-        elif df['high'].iloc[i] < df['low'].iloc[i - 2]:  # Bearish gap
-            fair_value_gaps.append({
-                "price": float(df['high'].iloc[i]),
-                "type": "bearish"
-            })
-
-    # Determine basic trend direction
-    close_diff = df['close'].iloc[-1] - df['close'].iloc[0]
-    trend = "up" if close_diff > 0 else "down"
-
-    return {
-        "candles": df[-50:].to_dict(orient="records"),
-        "fair_value_gaps": fair_value_gaps,
-        "trend": trend,
-        "symbol": symbol,
-        "timezone": str(datetime.now().astimezone().tzinfo),
-        "volume_series": df["tick_volume"].tail(50).tolist()
-    }
+    if fvg_index is not None and closed_until is None:
+        closed_until = int(df.index[-1].timestamp()) - 1
+    return build_chart_state(df, symbol, features or FULL_FEATURES, fvg_index, until=closed_until)
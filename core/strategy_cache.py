@@ -0,0 +1,90 @@
+# core/strategy_cache.py
+
+import copy
+import hashlib
+import json
+
+import MetaTrader5 as mt5
+
+from core.config_loader import CONFIG, get_strategy_cache_settings
+
+
+def config_version(*parts) -> str:
+    """
+    Short digest of the loaded config plus whatever else shapes a strategy's
+    input (e.g. the fetch spec); a change invalidates cached results.
+    """
+    payload = json.dumps([CONFIG, *parts], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+class StrategyCache:
+    """
+    Remembers each strategy's answer per (symbol, strategy) together with the
+    last closed bar time and config version it was computed for. While
+    neither has moved (closed markets, illiquid hours) the engine reuses the
+    answer and, when every strategy on a fetch hits, skips fetching and
+    building the chart state altogether. Only the latest answer per
+    (symbol, strategy) is kept.
+
+    Strategies whose answer depends on the wall clock rather than only on the
+    bars (REQUIREMENTS["uses_clock"]) are never cached.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.fetches_skipped = 0
+        self.fetches = 0
+
+    def last_closed_bar(self, symbol: str, timeframe) -> int:
+        """
+        Open time of the newest closed bar (position 1; 0 is still forming),
+        or None if the terminal returned nothing.
+        """
+        if not self.enabled:
+            return None
+        rates = mt5.copy_rates_from_pos(symbol, timeframe, 1, 1)
+        if rates is None or len(rates) == 0:
+            return None
+        return int(rates["time"][-1])
+
+    def lookup(self, symbol: str, strategy: str, bar_time, version: str, cacheable: bool = True):
+        """
+        Returns (hit, result). A hit's result is a copy, so the engine may
+        annotate it like a fresh one.
+        """
+        if not self.enabled or bar_time is None or not cacheable:
+            self.uncacheable += 1
+            return False, None
+        entry = self.entries.get((symbol, strategy))
+        if entry is not None and entry[0] == bar_time and entry[1] == version:
+            self.hits += 1
+            return True, copy.deepcopy(entry[2])
+        self.misses += 1
+        return False, None
+
+    def store(self, symbol: str, strategy: str, bar_time, version: str, result):
+        if self.enabled and bar_time is not None:
+            self.entries[(symbol, strategy)] = (bar_time, version, copy.deepcopy(result))
+
+    def record_fetch(self, skipped: bool):
+        self.fetches += 1
+        if skipped:
+            self.fetches_skipped += 1
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_summary(self) -> str:
+        return (
+            f"🗃️ Strategy cache: {self.hits} hits / {self.misses} misses ({self.hit_rate():.0%}), "
+            f"{self.uncacheable} uncacheable | fetches skipped {self.fetches_skipped}/{self.fetches}"
+        )
+
+
+strategy_cache = StrategyCache(enabled=get_strategy_cache_settings().get("enabled", True))
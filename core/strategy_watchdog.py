@@ -0,0 +1,130 @@
+# core/strategy_watchdog.py
+
+import logging
+import threading
+import time
+from collections import deque
+
+from core.config_loader import get_watchdog_settings
+from utils import clock
+from utils.profiler import profiling
+
+OK = "ok"
+TIMEOUT = "timeout"
+BUSY = "busy"
+QUARANTINED = "quarantined"
+
+
+class StrategyWatchdog:
+    """
+    Runs each strategy evaluation on a daemon thread and waits at most its
+    time budget for the answer. A call that misses the budget is an overrun:
+    the engine moves on without its result, and the call is left to finish
+    in the background (Python threads cannot be killed), during which the
+    strategy is reported busy instead of being started again. A strategy
+    with max_overruns overruns within overrun_window_minutes is quarantined,
+    i.e. skipped, for quarantine_minutes.
+
+    A call stuck inside a terminal function still holds the broker gateway,
+    so the budget protects the scan loop, not other broker users.
+
+    While the engine cycle is being profiled, strategies run inline on the
+    engine thread without a budget, so cProfile sees them.
+    """
+
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+        self.default_budget = settings.get("budget_seconds", 10.0)
+        self.budgets = settings.get("budgets", {})
+        self.max_overruns = settings.get("max_overruns", 3)
+        self.overrun_window = settings.get("overrun_window_minutes", 60) * 60
+        self.quarantine_seconds = settings.get("quarantine_minutes", 30) * 60
+        self.running = {}
+        self.recent_overruns = {}
+        self.quarantined_until = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def budget(self, name: str) -> float:
+        return self.budgets.get(name, self.default_budget)
+
+    def run(self, name: str, fn, *args):
+        """
+        Returns (status, result); result is None unless status is OK.
+        Exceptions raised by fn propagate to the caller as before.
+        """
+        if not self.enabled or profiling():
+            return OK, fn(*args)
+        stats = self.stats.setdefault(name, {"calls": 0, "overruns": 0, "skipped": 0, "quarantines": 0, "max": 0.0})
+
+        with self.lock:
+            until = self.quarantined_until.get(name)
+            if until is not None and clock.time() < until:
+                stats["skipped"] += 1
+                return QUARANTINED, None
+            if until is not None:
+                del self.quarantined_until[name]
+                logging.info(f"🐕 {name} released from quarantine")
+            if name in self.running:
+                stats["skipped"] += 1
+                return BUSY, None
+
+        box = {}
+        done = threading.Event()
+
+        def call():
+            started = time.monotonic()
+            try:
+                box["result"] = fn(*args)
+            except Exception as e:
+                box["error"] = e
+            finally:
+                box["duration"] = time.monotonic() - started
+                with self.lock:
+                    self.running.pop(name, None)
+                    stats["max"] = max(stats["max"], box["duration"])
+                done.set()
+
+        with self.lock:
+            self.running[name] = True
+        stats["calls"] += 1
+        threading.Thread(target=call, name=f"strategy-{name}", daemon=True).start()
+
+        if done.wait(self.budget(name)):
+            if "error" in box:
+                raise box["error"]
+            return OK, box.get("result")
+        self._overrun(name, stats)
+        return TIMEOUT, None
+
+    def _overrun(self, name: str, stats: dict):
+        stats["overruns"] += 1
+        now = clock.time()
+        with self.lock:
+            recent = self.recent_overruns.setdefault(name, deque())
+            recent.append(now)
+            while recent and now - recent[0] > self.overrun_window:
+                recent.popleft()
+            if len(recent) < self.max_overruns:
+                logging.warning(f"⏱️ {name} overran its {self.budget(name):g}s budget "
+                                f"({len(recent)}/{self.max_overruns} in window); result dropped")
+                return
+            recent.clear()
+            self.quarantined_until[name] = now + self.quarantine_seconds
+        stats["quarantines"] += 1
+        logging.error(f"🐕 {name} overran its budget {self.max_overruns} times; "
+                      f"quarantined for {self.quarantine_seconds / 60:g} min")
+
+    def get_summary(self) -> str:
+        lines = ["🐕 Strategy watchdog:"]
+        for name, stats in sorted(self.stats.items()):
+            state = " (quarantined)" if name in self.quarantined_until else ""
+            lines.append(
+                f"   {name}: {stats['calls']} calls, max {stats['max']:.2f}s / {self.budget(name):g}s budget, "
+                f"{stats['overruns']} overruns, {stats['skipped']} skipped, {stats['quarantines']} quarantines{state}"
+            )
+        return "\n".join(lines)
+
+
+strategy_watchdog = StrategyWatchdog(get_watchdog_settings())
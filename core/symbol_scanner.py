@@ -24,6 +24,6 @@ def get_active_symbols() -> list[str]:
 
     logging.info(f"✅ Found {len(tradable)} tradable symbols.")
 
-    mt5.shutdown()  # Optional: Shuts down MT5 to keep things clean.
+    # No mt5.shutdown() here: the terminal connection is shared with the other job threads
     return tradable
 
@@ -2,17 +2,54 @@
 
 import MetaTrader5 as mt5
 import logging
-from utils.helpers import round_safe, pip_size
+import zlib
+from utils.helpers import round_safe
 from core.telegram_alert import send_trade_alert  # Alert system for real-time notification
-from utils.risk_engine import evaluate_trade_risk
+from utils.risk_engine import evaluate_trade_risk, pip_value_per_lot
+from core.config_loader import get_risk_settings
+from core.portfolio import portfolio_risk, position_risk
+from core.order_analytics import OrderTrace, order_analytics
+from core.order_router import order_router
 
-logging.basicConfig(level=logging.INFO)
+
+# Every order the bot places carries a magic number in [MAGIC_BASE, MAGIC_BASE + MAGIC_SPAN)
+MAGIC_BASE = 444000
+MAGIC_SPAN = 1000
+
+
+def strategy_magic(strategy: str) -> int:
+    """
+    Magic number for a strategy's orders. crc32 is stable across processes,
+    unlike hash() on str, so restarts and replays tag orders identically.
+    """
+    return MAGIC_BASE + zlib.crc32(strategy.encode()) % MAGIC_SPAN
 
 def execute_trade(signal: dict, trade_id: str = None):
     """
     Execute a trade via MetaTrader 5.
     Automatically calculates SL/TP distances & sends Telegram alert.
     Integrates with risk engine.
+    Every attempt is traced into the order analytics log.
+    """
+    trace = OrderTrace(signal["symbol"], signal.get("strategy", "unknown"), signal["entry"])
+    try:
+        result = _execute_trade(signal, trade_id, trace)
+        trace.set(status=result.get("status"))
+        return result
+    except Exception as e:
+        trace.set(status="error", reason=str(e))
+        raise
+    finally:
+        order_analytics.record(trace)
+
+
+def prepare_trade(signal: dict, trace: OrderTrace, price: float = None):
+    """
+    Account, symbol, risk and portfolio checks shared by market and pending
+    orders. `price` is where the order would fill (the current ask/bid if
+    omitted). Returns (context, None), where context holds the symbol info,
+    tick, direction, price and lot size, or (None, result) with the
+    rejection to hand back.
     """
     symbol = signal["symbol"]
     entry_price = signal["entry"]
@@ -20,57 +57,103 @@ def execute_trade(signal: dict, trade_id: str = None):
     tp = signal["tp"]
     strategy = signal.get("strategy", "unknown")
 
-    account = mt5.account_info()
+    with trace.span("account_info"):
+        account = mt5.account_info()
     if account is None or account.balance < 5:
         logging.warning("💸 Skipping trade: Not enough balance or no account info.")
-        return {
+        return None, {
             "status": "failed",
             "symbol": symbol,
             "strategy": strategy,
             "reason": "No balance or account info"
         }
 
-    pip_val = pip_size(symbol)
+    with trace.span("symbol_select"):
+        selected = mt5.symbol_select(symbol, True)
+    if not selected:
+        raise RuntimeError(f"❌ Failed to select symbol {symbol}")
+
+    with trace.span("symbol_info"):
+        info = mt5.symbol_info(symbol)
+    if info is None:
+        raise RuntimeError(f"❌ Could not get symbol info for {symbol}")
+
+    with trace.span("symbol_info_tick"):
+        tick = mt5.symbol_info_tick(symbol)
+    if tick is None:
+        raise RuntimeError(f"❌ No tick data available for {symbol}")
+
+    pip_val = pip_value_per_lot(symbol, info.trade_tick_value, info.trade_tick_size)
+    if pip_val <= 0:
+        logging.info(f"❌ Trade rejected: no tick value reported for {symbol}")
+        return None, {"status": "rejected", "reason": "No tick value for pip value"}
+
     risk_check = evaluate_trade_risk(
         entry=entry_price,
         sl=sl,
         tp=tp,
         symbol=symbol,
         balance=account.balance,
-        risk_percent=1.0,  # You can make this configurable
+        risk_percent=get_risk_settings().get("default_risk_percent", 1.0),
         pip_value=pip_val
     )
 
     if not risk_check.get("valid"):
         logging.info(f"❌ Trade rejected: {risk_check['reason']}")
-        return {"status": "rejected", "reason": risk_check['reason']}
+        return None, {"status": "rejected", "reason": risk_check['reason']}
 
     lot = max(0.01, risk_check['lot_size'])
 
-    if not mt5.symbol_select(symbol, True):
-        raise RuntimeError(f"❌ Failed to select symbol {symbol}")
-
-    info = mt5.symbol_info(symbol)
-    if info is None:
-        raise RuntimeError(f"❌ Could not get symbol info for {symbol}")
-
-    tick = mt5.symbol_info_tick(symbol)
-    if tick is None:
-        raise RuntimeError(f"❌ No tick data available for {symbol}")
+    is_buy = tp > entry_price
+    if price is None:
+        price = tick.ask if is_buy else tick.bid
+
+    # 🧮 Portfolio limits across open positions and correlated symbols
+    order_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
+    risk_money, notional = position_risk(symbol, info, lot, entry_price, sl, price)
+    new_margin = mt5.order_calc_margin(order_type, symbol, lot, price) or 0.0
+    portfolio_check = portfolio_risk.check(
+        symbol, "buy" if is_buy else "sell", risk_money, notional,
+        equity=account.equity, margin_used=account.margin, new_margin=new_margin
+    )
+    if not portfolio_check["valid"]:
+        logging.info(f"❌ Trade rejected: {portfolio_check['reason']}")
+        return None, {"status": "rejected", "reason": portfolio_check["reason"]}
+    if portfolio_check["scale"] < 1.0:
+        logging.info(f"🧮 Lot scaled to {portfolio_check['scale']:.0%} by portfolio {portfolio_check['binding']} limit")
+        lot *= portfolio_check["scale"]
 
     min_vol = info.volume_min
     max_vol = info.volume_max
     vol_step = info.volume_step
-    lot = max(min_vol, round(lot / vol_step) * vol_step)
-    if lot < min_vol or lot > max_vol:
-        lot = min_vol
+    lot = round(lot / vol_step) * vol_step
+    if lot < min_vol:
+        logging.info(f"❌ Trade rejected: lot below broker minimum after risk limits ({lot:.2f})")
+        return None, {"status": "rejected", "reason": "Lot below minimum volume"}
+    lot = min(lot, max_vol)
+    return {"info": info, "tick": tick, "is_buy": is_buy, "price": price, "order_type": order_type, "lot": lot}, None
 
-    is_buy = tp > entry_price
-    price = tick.ask if is_buy else tick.bid
 
-    point = info.point
+def min_stop_distance(symbol: str, info) -> float:
     stops_level = getattr(info, 'stops_level', 0)
-    min_distance = stops_level * point if stops_level else (1.5 if "XAU" in symbol else 0.00030)
+    return stops_level * info.point if stops_level else (1.5 if "XAU" in symbol else 0.00030)
+
+
+def _execute_trade(signal: dict, trade_id: str, trace: OrderTrace):
+    symbol = signal["symbol"]
+    entry_price = signal["entry"]
+    sl = signal["sl"]
+    tp = signal["tp"]
+    strategy = signal.get("strategy", "unknown")
+
+    context, rejection = prepare_trade(signal, trace)
+    if rejection is not None:
+        return rejection
+    info, tick, is_buy = context["info"], context["tick"], context["is_buy"]
+    price, order_type, lot = context["price"], context["order_type"], context["lot"]
+
+    point = info.point
+    min_distance = min_stop_distance(symbol, info)
 
     sl_diff = abs(price - sl)
     tp_diff = abs(tp - price)
@@ -78,23 +161,41 @@ def execute_trade(signal: dict, trade_id: str = None):
     sl_final = price - max(sl_diff, min_distance) if is_buy else price + max(sl_diff, min_distance)
     tp_final = price + max(tp_diff, min_distance) if is_buy else price - max(tp_diff, min_distance)
 
+    # Price, deviation and filling mode are set by the order router per attempt
     request = {
         "action": mt5.TRADE_ACTION_DEAL,
         "symbol": symbol,
         "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL,
-        "price": price,
+        "type": order_type,
         "sl": round(sl_final, info.digits),
         "tp": round(tp_final, info.digits),
-        "deviation": 10,
-        "magic": 444000 + hash(strategy) % 1000,
+        "magic": strategy_magic(strategy),
         "comment": f"DCRAI_{strategy}_{trade_id or 'AUTO'}",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_IOC
+        "type_time": mt5.ORDER_TIME_GTC
     }
 
-    result = mt5.order_send(request)
+    trace.set(
+        direction="buy" if is_buy else "sell",
+        volume=lot,
+        spread_points=round((tick.ask - tick.bid) / point, 1),
+        entry_drift_points=round((price - entry_price) / point * (1 if is_buy else -1), 1)
+    )
+
+    result, price = order_router.send(request, info, tick, trace)
+    trace.set(sent_price=price)
+
+    if result is None:
+        trace.set(retcode=None, reason=str(mt5.last_error()))
+        logging.error(f"❌ Trade failed: order_send returned None {mt5.last_error()}")
+        return {
+            "status": "failed",
+            "symbol": symbol,
+            "strategy": strategy,
+            "price": price,
+            "reason": "order_send returned None"
+        }
 
+    trace.set(retcode=result.retcode)
     if result.retcode != mt5.TRADE_RETCODE_DONE:
         logging.error(f"❌ Trade failed: [{result.retcode}] {result.comment}")
         return {
@@ -108,7 +209,17 @@ def execute_trade(signal: dict, trade_id: str = None):
             "retcode": result.retcode
         }
 
-    logging.info(f"✅ Trade executed: Ticket #{result.order} | {symbol} @ {price:.3f}")
+    # Positive slippage is adverse: paid more on a buy, received less on a sell
+    filled_price = result.price or price
+    trace.set(
+        filled_price=filled_price,
+        slippage_points=round((filled_price - price) / point * (1 if is_buy else -1), 1)
+    )
+
+    logging.info(f"✅ Trade executed: Ticket #{result.order} | {symbol} @ {filled_price:.3f}")
+
+    risk_money, notional = position_risk(symbol, info, lot, filled_price, sl_final, filled_price)
+    portfolio_risk.add_position(symbol, "buy" if is_buy else "sell", risk_money, notional)
 
     send_trade_alert({
         "symbol": symbol,
@@ -126,9 +237,12 @@ def execute_trade(signal: dict, trade_id: str = None):
         "symbol": symbol,
         "strategy": strategy,
         "order_id": result.order,
+        "ticket": result.order,  # a market order's ticket is also its position id
         "price": round_safe(price, 3),
         "sl": round_safe(sl_final, 3),
         "tp": round_safe(tp_final, 3),
+        "filled_price": filled_price,
+        "sl_final": round(sl_final, info.digits),
         "volume": lot,
         "trade_id": trade_id
     }
@@ -4,7 +4,6 @@ import logging
 import MetaTrader5 as mt5
 from utils.helpers import pip_size
 
-logging.basicConfig(level=logging.INFO)
 
 def trail_stop_loss(symbol: str, entry_price: float, sl_price: float, direction: str,
                     trail_trigger_pips: float, trail_distance_pips: float) -> bool:
@@ -41,7 +40,7 @@ def trail_stop_loss(symbol: str, entry_price: float, sl_price: float, direction:
                         logging.error(f"❌ Failed to update trailing SL for {symbol} | Ticket: {pos.ticket} | Code: {result.retcode}")
                         return False
         else:
-            logging.info(f"⚠️ SL unchanged for {symbol} — new SL not better than current.")
+            logging.info("⚠️ SL unchanged for %s — new SL not better than current.", symbol)
     return False
 
 
@@ -1,8 +1,5 @@
 import logging
-import time
-import schedule
-import traceback
-import pandas as pd
+import threading
 from datetime import datetime, timedelta
 
 import MetaTrader5 as mt5
@@ -19,20 +16,31 @@ from strategies import (
 from core.signal_parser import get_live_chart_state
 from core.confidence_filter import filter_trade_by_confidence
 from core.trade_executor import execute_trade
-from core.symbol_scanner import get_active_symbols
+from core.order_analytics import order_analytics
+from core.portfolio import portfolio_risk, sync_portfolio, refresh_correlation
+from core.fetch_plan import build_fetch_plan, describe_fetch_plan, iter_fetches, strategy_requirements
+from core.strategy_cache import strategy_cache, config_version
+from core.prescan import prescan
+from core.strategy_watchdog import strategy_watchdog, OK
+from core.session_scheduler import SessionScheduler
+from core.armed_orders import armed_orders, MARKET
+from core.history_sync import HistorySync
 from core.trade_manager import trail_stop_loss, breakeven_stop_loss
-from core.config_loader import get_strategy_map, get_cooldown_minutes, get_max_trade_duration
+from core.config_loader import get_strategy_map, get_cooldown_minutes, get_max_trade_duration, get_bar_store_settings, get_state_settings, get_profiling_settings, get_trade_management_settings, get_runtime_settings, get_logging_settings, get_history_sync_settings, get_session_scheduler_settings, get_armed_orders_settings
+from core.history_backfill import sync_mapped_symbols, open_bar_store, TIMEFRAMES
+from core.bar_cache import BarCache
+from core.engine_state import open_state_store, export_cooldowns, restore_cooldowns, reconcile_with_positions
 from core.telegram_alert import send_trade_alert
+from core.runtime import BrokerGateway, Runtime, HIGH, NORMAL
 from utils.performance_tracker import PerformanceTracker
-from utils.risk_engine import calculate_lot_size
-from utils.helpers import pip_size
-
-# 🪵 Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from utils.profiler import CycleProfiler
+from utils.fvg_index import FVGIndex
+from utils.indicators import IndicatorSet
+from utils.log_setup import setup_logging
+from utils import clock
+
+# 🪵 Logging setup: records are formatted and written on a background thread
+setup_logging(get_logging_settings())
 
 performance_tracker = PerformanceTracker()
 
@@ -46,48 +54,197 @@ strategy_lookup = {
 }
 
 strategy_map = get_strategy_map()
+fetch_plan = build_fetch_plan(strategy_map, strategy_lookup)
 cooldown_tracker = {}
+bar_cache = BarCache(open_bar_store() if get_bar_store_settings().get("enabled") else None)
+fvg_indexes = {}
+indicator_sets = {}
+config_versions = {}
+# Set by core/fanout.py in the signal process: approved trades are published instead of placed
+signal_publisher = None
+# Guards the state the snapshot exports (cooldowns, trades, bar cache, FVG and indicator state,
+# armed orders, history cursor); held around each mutation, never across a whole scan, so
+# session passes, syncs and snapshots interleave with a long engine scan
+state_lock = threading.RLock()
 
-def run_dcrai_strategy_engine():
-    logging.info("🚀 Running DCRAI strategy engine")
-    symbols = get_active_symbols()
+# 🗓️ Session strategies run only inside their declared windows
+session_scheduler = SessionScheduler(get_session_scheduler_settings(), strategy_lookup)
+session_pairs = [(symbol, name) for symbol, _, spec in iter_fetches(fetch_plan) for name in spec["strategies"]]
+
+# 🧾 Trade outcomes from the terminal's deal history
+history_settings = get_history_sync_settings()
+history_sync = HistorySync(
+    performance_tracker, strategy_lookup,
+    lookback_days=history_settings.get("lookback_days", 7),
+    batch_size=history_settings.get("batch_size", 50),
+    legacy_magics=history_settings.get("legacy_magics", False),
+    on_batch=lambda outcomes: state_store.journal("outcomes", outcomes=outcomes)
+)
+
+# 💾 Persisted engine state
+state_store = open_state_store()
+state_store.register(
+    "cooldowns",
+    lambda: export_cooldowns(cooldown_tracker),
+    lambda exported: restore_cooldowns(cooldown_tracker, exported)
+)
+state_store.register("bar_cache", bar_cache.export, bar_cache.restore)
+state_store.register(
+    "fvg_indexes",
+    lambda: {key: index.export() for key, index in fvg_indexes.items()},
+    lambda exported: fvg_indexes.update({key: FVGIndex.restore(value) for key, value in exported.items()})
+)
+state_store.register(
+    "indicators",
+    lambda: {key: indicators.export() for key, indicators in indicator_sets.items()},
+    lambda exported: indicator_sets.update({key: IndicatorSet.restore(value) for key, value in exported.items()})
+)
+state_store.register(
+    "trades",
+    lambda: performance_tracker.trades,
+    lambda trades: performance_tracker.trades.extend(trades)
+)
+state_store.register("history_sync", history_sync.export, history_sync.restore)
+state_store.register("armed_orders", armed_orders.export, armed_orders.restore)
+state_store.on_event("cooldown", lambda e: restore_cooldowns(cooldown_tracker, {e["key"]: e["time"]}))
+state_store.on_event("trade", lambda e: performance_tracker.trades.append(e["record"]))
+state_store.on_event("outcomes", lambda e: performance_tracker.apply_outcomes(e["outcomes"]))
+
+
+def restore_engine_state():
+    if state_store.load():
+        logging.info(f"💾 Restored engine state: {len(cooldown_tracker)} cooldowns, {len(bar_cache.frames)} cached bar sets")
+    reconcile_with_positions(cooldown_tracker, set(strategy_lookup))
+    state_store.save()
+
+def place_trade(trade: dict) -> bool:
+    # 🎯 Armed strategies rest a pending order at their entry instead; sync_armed_orders records the fill
+    if armed_orders.handles(trade):
+        with state_lock:
+            if armed_orders.arm(trade) != MARKET:
+                return False
+
+    # 🛠️ Execute trade (risk sizing and portfolio limits are applied inside)
+    result = execute_trade(trade)
+
+    if result and result.get("status") == "success":
+        record_fill(trade, result)
+        return True
+    logging.error("❌ Trade execution failed.")
+    return False
+
+def record_fill(trade: dict, result: dict):
+    trade["lot"] = result["volume"]
+    with state_lock:
+        performance_tracker.record_trade(trade, result)
+        state_store.journal("trade", record=performance_tracker.trades[-1])
+    send_trade_alert(trade)
+
+def start_cooldown(key: str):
+    with state_lock:
+        cooldown_tracker[key] = clock.now()
+        state_store.journal("cooldown", key=key, time=cooldown_tracker[key].isoformat())
+
+def sync_armed_orders():
+    # 🎯 A filled pending order is a placed trade: recorded, alerted and in cooldown from here
+    with state_lock:
+        filled = armed_orders.sync()
+    for trade, result in filled:
+        record_fill(trade, result)
+        start_cooldown(f"{trade['symbol']}_{trade['strategy']}")
+
+def signal_missed(symbol: str, strategy_name: str):
+    # 🎯 Armed orders are removed after max_misses; in fan-out mode the executors hold them
+    if not armed_orders.arms(strategy_name):
+        return
+    if signal_publisher is not None:
+        signal_publisher.publish_missed(symbol, strategy_name)
+    else:
+        with state_lock:
+            armed_orders.missed(symbol, strategy_name)
+
+def in_cooldown(symbol: str, strategy_name: str) -> bool:
+    last_time = cooldown_tracker.get(f"{symbol}_{strategy_name}")
+    return bool(last_time) and clock.now() - last_time < timedelta(minutes=get_cooldown_minutes(strategy_name))
+
+
+def fetch_chart_state(symbol: str, timeframe: str, spec: dict, bar_time: int = None) -> dict:
+    # 🧠 Fetch only what the mapped strategies declared
+    fvg_index = None
+    if spec["fair_value_gaps"]:
+        fvg_index = fvg_indexes.setdefault(f"{symbol}|{timeframe}", FVGIndex(spec["bars"]))
+    chart_data = get_live_chart_state(
+        symbol, TIMEFRAMES[timeframe], spec["bars"], bar_cache=bar_cache, features=spec,
+        fvg_index=fvg_index, closed_until=bar_time
+    )
+
+    if chart_data and spec["indicators"]:
+        # 📈 Streaming indicators only take the bars closed since the last cycle
+        df = bar_cache.frames[(symbol, TIMEFRAMES[timeframe])]
+        until = bar_time if bar_time is not None else int(df.index[-1].timestamp()) - 1
+        indicators = indicator_sets.setdefault(f"{symbol}|{timeframe}", IndicatorSet())
+        indicators.update(df, until=until)
+        chart_data["indicators"] = indicators.values()
+    return chart_data
 
-    for symbol in symbols:
-        logging.info(f"🔍 Scanning symbol: {symbol}")
-        try:
-            chart_data = get_live_chart_state(symbol)
-            if not chart_data:
-                continue
 
-            # 🧠 Inject all required components
-            chart_data["symbol"] = symbol
-            chart_data["timezone"] = str(datetime.now().astimezone().tzinfo)
-            chart_data["volume_series"] = [c["tick_volume"] for c in chart_data["candles"]][-50:]
-            chart_data["ohlcv"] = pd.DataFrame(chart_data["candles"]).set_index("time")
-            chart_data["news"] = []
+def scan_strategies(select):
+    """
+    Evaluates the mapped strategies select(symbol, strategy_name) picks.
+    """
+    fetches = [(symbol, timeframe, spec, [name for name in spec["strategies"] if select(symbol, name)])
+               for symbol, timeframe, spec in iter_fetches(fetch_plan)]
+    mt5.initialize()
+    sync_portfolio()
+    sync_armed_orders()
+    # 🚦 One bulk snapshot of every mapped symbol rules out fetches that cannot trade
+    prescan.refresh(list(fetch_plan))
 
-            mapped_strategies = strategy_map.get(symbol, [])
+    for symbol, timeframe, spec, strategy_names in fetches:
+        if not strategy_names:
+            continue
+        gated = prescan.gate(symbol, strategy_names, lambda name: in_cooldown(symbol, name))
+        if gated is not None:
+            logging.info("🚦 Skipping %s (%s): %s", symbol, timeframe, gated)
+            continue
+        logging.info("🔍 Scanning symbol: %s (%s)", symbol, timeframe)
+        try:
+            # 🗃️ Answers computed for the same closed bar are reused; the fetch happens on first miss
+            bar_time = strategy_cache.last_closed_bar(symbol, TIMEFRAMES[timeframe])
+            version = config_versions.setdefault((symbol, timeframe), config_version(spec))
+            chart_data = None
 
-            for strategy_name in mapped_strategies:
+            for strategy_name in strategy_names:
                 strategy = strategy_lookup[strategy_name]
                 key = f"{symbol}_{strategy_name}"
 
                 # ⏳ Cooldown check
-                last_time = cooldown_tracker.get(key)
-                cooldown = get_cooldown_minutes(strategy_name)
-                if last_time and datetime.now() - last_time < timedelta(minutes=cooldown):
-                    logging.info(f"⏳ Skipping {key} due to cooldown.")
+                if in_cooldown(symbol, strategy_name):
+                    logging.info("⏳ Skipping %s due to cooldown.", key)
                     continue
 
                 try:
-                    trade = strategy.check_trade_opportunity(chart_data)
+                    cacheable = not strategy_requirements(strategy).get("uses_clock")
+                    hit, trade = strategy_cache.lookup(symbol, strategy_name, bar_time, version, cacheable)
+                    if not hit:
+                        if chart_data is None:
+                            with state_lock:
+                                chart_data = fetch_chart_state(symbol, timeframe, spec, bar_time)
+                        if not chart_data:
+                            break
+                        # 🐕 Slow calls are abandoned, repeat offenders quarantined
+                        status, trade = strategy_watchdog.run(strategy_name, strategy.check_trade_opportunity, chart_data)
+                        if status != OK:
+                            continue
+                        strategy_cache.store(symbol, strategy_name, bar_time, version, trade)
                     if trade is None:
+                        signal_missed(symbol, strategy_name)
                         continue
 
                     # ✅ Validate trade dictionary structure
-                    required_keys = {"symbol", "entry", "sl", "tp", "type", "strategy_name"}
+                    required_keys = {"symbol", "entry", "sl", "tp", "strategy"}
                     if not required_keys.issubset(trade):
-                        logging.error(f"❌ Invalid trade dictionary from {strategy_name}: {trade}")
+                        logging.error("❌ Invalid trade dictionary from %s: %s", strategy_name, trade)
                         continue
 
                     # 🧠 Apply confidence filter
@@ -95,90 +252,182 @@ def run_dcrai_strategy_engine():
                         trade["confidence"] = 0
                     filter_result = filter_trade_by_confidence(trade)
                     if not filter_result["passed"]:
+                        signal_missed(symbol, strategy_name)
                         continue
                     trade["confidence"] = filter_result["score"]
 
-                    # 📏 Risk-based lot sizing
-                    balance = mt5.account_info().balance
-                    risk_pct = 1.0  # Or load from config
-                    sl_pips = abs(trade["entry"] - trade["sl"]) / pip_size(trade["symbol"])
-                    pip_val = 10  # Approximate placeholder
-                    lot = calculate_lot_size(balance, risk_pct, sl_pips, pip_val)
-                    trade["lot"] = lot
-
-                    # 🛠️ Execute trade
-                    result = execute_trade(trade)
-
-                    if result:
-                        performance_tracker.record_trade(trade, result)
-                        cooldown_tracker[key] = datetime.now()
-                        send_trade_alert(trade)
+                    # 📡 In fan-out mode the account executors size and place it; armed strategies
+                    # keep publishing so the executors can reprice, and start the cooldown on the fill
+                    if signal_publisher is not None:
+                        placed = signal_publisher.publish(trade) and not armed_orders.handles(trade)
                     else:
-                        logging.error("❌ Trade execution failed.")
+                        placed = place_trade(trade)
+
+                    if placed:
+                        start_cooldown(key)
 
                 except Exception as e:
-                    logging.error(f"⚠️ Error in strategy {strategy_name}: {e}\n{traceback.format_exc()}")
+                    logging.error("⚠️ Error in strategy %s: %s", strategy_name, e, exc_info=True)
 
         except Exception as e:
-            logging.error(f"❌ Failed to process symbol {symbol}: {e}\n{traceback.format_exc()}")
+            logging.error("❌ Failed to process symbol %s: %s", symbol, e, exc_info=True)
+        else:
+            strategy_cache.record_fetch(skipped=chart_data is None)
+
+
+def run_dcrai_strategy_engine():
+    logging.info("🚀 Running DCRAI strategy engine")
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(describe_fetch_plan(fetch_plan))
+    scan_strategies(session_scheduler.unscheduled)
+
+    # 🔗 Keep the correlation matrix fresh from the bars already in memory
+    with state_lock:
+        refresh_correlation(bar_cache.frames)
 
     # 📊 Log performance summary
     logging.info("\n" + performance_tracker.get_summary())
+    account = mt5.account_info()
+    if account is not None:
+        logging.info(portfolio_risk.get_summary(account.equity))
+    logging.info("\n" + order_analytics.get_summary())
+    logging.info(strategy_cache.get_summary())
+    logging.info(prescan.get_summary())
+    logging.info(strategy_watchdog.get_summary())
+    logging.info(session_scheduler.get_summary())
+    logging.info(armed_orders.get_summary())
+    logging.info(history_sync.get_summary())
+
+
+def run_session_strategies():
+    # 🗓️ Sleeps unless a session strategy is due in its window
+    if not session_scheduler.any_due(session_pairs):
+        return
+    logging.info("🗓️ Running session strategies")
+    scan_strategies(session_scheduler.take_due)
 
 
 def run_trade_manager():
     logging.info("🛠️ Running trade manager for open trades")
-    symbols = get_active_symbols()
     max_duration = get_max_trade_duration()
+    management = get_trade_management_settings()
+
+    # One call for every open position instead of a symbol scan
+    positions = mt5.positions_get()
+    if positions is None:
+        logging.warning("⚠️ Could not read open positions.")
+        return
 
-    for symbol in symbols:
+    for pos in positions:
+        symbol = pos.symbol
         try:
-            positions = mt5.positions_get(symbol=symbol)
-            if positions is None:
+            # ⏰ Max duration auto-close
+            open_time = pos.time
+            open_dt = datetime.fromtimestamp(open_time)
+            if clock.now() - open_dt > timedelta(minutes=max_duration):
+                logging.info(f"⏰ Closing trade on {symbol} due to max duration.")
+                close_request = {
+                    "action": mt5.TRADE_ACTION_DEAL,
+                    "symbol": symbol,
+                    "volume": pos.volume,
+                    "type": mt5.ORDER_TYPE_SELL if pos.type == 0 else mt5.ORDER_TYPE_BUY,
+                    "position": pos.ticket,
+                    "deviation": 10,
+                    "magic": pos.magic,
+                    "comment": "Auto-close due to duration limit"
+                }
+                result = mt5.order_send(close_request)
+                if result.retcode != mt5.TRADE_RETCODE_DONE:
+                    logging.error(f"❌ Failed to auto-close trade: {result.retcode}")
                 continue
-            for pos in positions:
-                # ⏰ Max duration auto-close
-                open_time = pos.time
-                open_dt = datetime.fromtimestamp(open_time)
-                if datetime.now() - open_dt > timedelta(minutes=max_duration):
-                    logging.info(f"⏰ Closing trade on {symbol} due to max duration.")
-                    close_request = {
-                        "action": mt5.TRADE_ACTION_DEAL,
-                        "symbol": symbol,
-                        "volume": pos.volume,
-                        "type": mt5.ORDER_SELL if pos.type == 0 else mt5.ORDER_BUY,
-                        "position": pos.ticket,
-                        "deviation": 10,
-                        "magic": pos.magic,
-                        "comment": "Auto-close due to duration limit"
-                    }
-                    result = mt5.order_send(close_request)
-                    if result.retcode != mt5.TRADE_RETCODE_DONE:
-                        logging.error(f"❌ Failed to auto-close trade: {result.retcode}")
-                    continue
 
-                # 📈 SL trail & breakeven
-                entry = pos.price_open
-                direction = "buy" if pos.type == 0 else "sell"
-                sl = pos.sl
-                trail_stop_loss(symbol, entry, sl, direction, 20, 15)
-                breakeven_stop_loss(symbol, entry, direction, 25)
+            # 📈 SL trail & breakeven
+            entry = pos.price_open
+            direction = "buy" if pos.type == 0 else "sell"
+            sl = pos.sl
+            trail_stop_loss(symbol, entry, sl, direction,
+                            management.get("trail_trigger_pips", 20), management.get("trail_distance_pips", 15))
+            breakeven_stop_loss(symbol, entry, direction, management.get("breakeven_trigger_pips", 25))
 
         except Exception as e:
             logging.error(f"❌ Trade manager error for {symbol}: {e}")
 
 
-# 🔄 Schedule
-schedule.every(15).minutes.do(run_dcrai_strategy_engine)
-schedule.every(1).minutes.do(run_trade_manager)
+# 🔬 On-demand profiling (config flag or SIGUSR1/Ctrl+Break)
+profiling_settings = get_profiling_settings()
+profiler = CycleProfiler(
+    output_dir=profiling_settings.get("output_dir", "profiles"),
+    cycles=profiling_settings.get("cycles", 1),
+    top=profiling_settings.get("top", 25)
+)
+run_dcrai_strategy_engine = profiler.wrap("strategy_engine", run_dcrai_strategy_engine)
+run_trade_manager = profiler.wrap("trade_manager", run_trade_manager)
+
+# 🧵 Concurrent runtime: the scan and the position manager run on their own threads
+runtime_settings = get_runtime_settings()
+broker_gateway = BrokerGateway()
+runtime = Runtime(broker_gateway)
+
+
+def run_engine_cycle():
+    run_dcrai_strategy_engine()
+    logging.info("\n" + runtime.get_summary())
+
+
+def run_history_sync():
+    # Outcomes update the trade records the engine thread appends to
+    with state_lock:
+        history_sync.sync()
+
+
+def save_engine_state():
+    with state_lock:
+        state_store.save()
+
+
+def run_bot(engine: bool = True, trading: bool = True, on_start=None):
+    """
+    Starts the runtime until SIGINT/SIGTERM. engine=False leaves out the
+    strategy scan (fan-out executors), trading=False the position jobs
+    (fan-out signal process). on_start runs once the state is restored.
+    """
+    profiler.install_signal_handler()
+    if profiling_settings.get("enabled"):
+        profiler.request()
+    broker_gateway.wrap_module(mt5)
+    if engine:
+        logging.info(describe_fetch_plan(fetch_plan))
+        runtime.add_job("strategy_engine", run_engine_cycle, runtime_settings.get("engine_minutes", 15) * 60,
+                        priority=NORMAL, run_immediately=True)
+        if session_scheduler.enabled and session_scheduler.windows:
+            runtime.add_job("session_strategies", run_session_strategies, session_scheduler.edge_seconds,
+                            priority=NORMAL, run_immediately=True)
+    if trading:
+        runtime.add_job("trade_manager", run_trade_manager, runtime_settings.get("manager_seconds", 60),
+                        priority=HIGH)
+        if history_settings.get("enabled", True):
+            runtime.add_job("history_sync", run_history_sync, history_settings.get("interval_seconds", 60))
+        if armed_orders.enabled:
+            runtime.add_job("armed_orders", sync_armed_orders, get_armed_orders_settings().get("sync_seconds", 15),
+                            priority=HIGH)
+    state_settings = get_state_settings()
+    if state_settings.get("enabled"):
+        restore_engine_state()
+        runtime.add_job("state_snapshot", save_engine_state, state_settings.get("snapshot_minutes", 5) * 60)
+    if engine and get_bar_store_settings().get("enabled"):
+        sync_mapped_symbols()
+        runtime.add_job("bar_store_sync", sync_mapped_symbols, 3600)
+    if on_start is not None:
+        on_start()
+
+    def on_stop():
+        state_store.save()
+        logging.info("🛑 DCRAI BOT stopped by user.")
+
+    runtime.run_forever(on_stop=on_stop, shutdown_timeout=runtime_settings.get("shutdown_timeout_seconds", 60))
+    logging.info("\n" + runtime.get_summary())
+
 
 # 🧠 Start
 if __name__ == "__main__":
-    try:
-        run_dcrai_strategy_engine()
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logging.info("🛑 DCRAI BOT stopped by user.")
-        exit()
+    run_bot()
@@ -1,7 +1,12 @@
 # strategies/doji_confirmation.py
 
 from typing import Optional, Dict
+import numpy as np
 from utils.helpers import pip_size, round_safe
+from utils.batch_signals import as_arrays, empty_signals, finish_signals
+
+# Data this strategy reads from chart_data (see core/fetch_plan.py)
+REQUIREMENTS = {"timeframe": "M5", "bars": 500, "fair_value_gaps": False, "volume_series": False, "ohlcv": False}
 
 def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     """
@@ -46,3 +51,33 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
         return None
 
     return None
+
+def generate_signals(ohlcv, symbol: str, timezone: str = "UTC", bar_minutes: int = None) -> dict:
+    """
+    Batch mode: what check_trade_opportunity would return on every bar of a
+    whole history, as arrays (signal, direction, entry, sl, tp).
+    """
+    bars = as_arrays(ohlcv)
+    n = len(bars["close"])
+    if n < 3:
+        return empty_signals(n)
+    pip = pip_size(symbol)
+    o, h, l, c = bars["open"], bars["high"], bars["low"], bars["close"]
+
+    # Doji two bars back, confirmation on the previous bar
+    doji_body = np.full(n, np.nan)
+    doji_range = np.full(n, np.nan)
+    doji_high = np.full(n, np.nan)
+    doji_low = np.full(n, np.nan)
+    confirm = np.full(n, np.nan)
+    doji_body[2:] = np.abs(c[:-2] - o[:-2])
+    doji_range[2:] = h[:-2] - l[:-2]
+    doji_high[2:] = h[:-2]
+    doji_low[2:] = l[:-2]
+    confirm[2:] = c[1:-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        is_doji = (doji_range != 0) & (doji_body / doji_range < 0.2)
+    mask = is_doji & (confirm > doji_high)
+    sl = doji_low - 15 * pip
+    return finish_signals(mask, confirm, sl, confirm + (confirm - sl))
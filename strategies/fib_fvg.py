@@ -2,7 +2,15 @@ from typing import Optional, Dict
 import logging
 import MetaTrader5 as mt5
 
+import numpy as np
 from utils.helpers import pip_size, round_safe
+from utils.batch_signals import (
+    as_arrays, finish_signals, fair_value_gaps, recent_gap_count, oldest_gap, prior_mean,
+    trailing_max, trailing_min, window_start
+)
+
+# Data this strategy reads from chart_data (see core/fetch_plan.py)
+REQUIREMENTS = {"timeframe": "M5", "bars": 500, "fair_value_gaps": True, "volume_series": True, "ohlcv": False}
 
 def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     """
@@ -18,6 +26,7 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     trend = chart_data.get("trend")
     symbol = chart_data.get("symbol")
     volumes = chart_data.get("volume_series", [])
+    fvg_index = chart_data.get("fvg_index")
 
     if len(candles) < 50 or not fair_value_gaps or trend not in ["up", "down"] or symbol is None or len(volumes) < 11:
         return None
@@ -49,7 +58,9 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
             zone = (min(golden_min, golden_max), max(golden_min, golden_max))
             target = swing_high
 
-            for fvg in fair_value_gaps:
+            # Indexed lookup skips gaps that price has already traded back into
+            candidates = fvg_index.query("bullish", zone[0], zone[1]) if fvg_index is not None else fair_value_gaps
+            for fvg in candidates:
                 if fvg.get("type") != "bullish":
                     continue
                 price = fvg.get("price")
@@ -73,7 +84,8 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
             zone = (min(golden_min, golden_max), max(golden_min, golden_max))
             target = swing_low
 
-            for fvg in fair_value_gaps:
+            candidates = fvg_index.query("bearish", zone[0], zone[1]) if fvg_index is not None else fair_value_gaps
+            for fvg in candidates:
                 if fvg.get("type") == "bullish":
                     continue
                 price = fvg.get("price")
@@ -95,3 +107,43 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
         return None
 
     return None
+
+def generate_signals(ohlcv, symbol: str, timezone: str = "UTC", bar_minutes: int = None) -> dict:
+    """
+    Batch mode: what check_trade_opportunity would return on every bar of a
+    whole history, as arrays (signal, direction, entry, sl, tp). Gaps follow
+    the FVGIndex the engine keeps, fed from the first bar; the terminal
+    symbol checks of the per-bar path are skipped.
+    """
+    bars = as_arrays(ohlcv)
+    n = len(bars["close"])
+    retention = REQUIREMENTS["bars"]
+    pip = pip_size(symbol)
+    h, l, c, v = bars["high"], bars["low"], bars["close"], bars["tick_volume"]
+    gaps = fair_value_gaps(h, l, retention)
+
+    trend_up = c - c[window_start(n, REQUIREMENTS["bars"])] > 0
+    swing_high = trailing_max(h, 50)
+    swing_low = trailing_min(l, 50)
+    retracement_range = swing_high - swing_low
+    enough_volume = ~(v < 0.8 * prior_mean(v, 10))
+
+    # Golden zone (0.618-0.786 retracement) in the trend direction
+    up_a = swing_high - retracement_range * 0.786
+    up_b = swing_high - retracement_range * 0.618
+    down_a = swing_low + retracement_range * 0.618
+    down_b = swing_low + retracement_range * 0.786
+    zone_lo = np.where(trend_up, np.minimum(up_a, up_b), np.minimum(down_a, down_b))
+    zone_hi = np.where(trend_up, np.maximum(up_a, up_b), np.maximum(down_a, down_b))
+
+    bullish = oldest_gap(gaps["bullish_price"], gaps["bullish_mitigated_at"], retention, zone_lo, zone_hi)
+    bearish = oldest_gap(gaps["bearish_price"], gaps["bearish_mitigated_at"], retention, zone_lo, zone_hi)
+    entry = np.where(trend_up, bullish, bearish)
+
+    mask = (
+        (np.arange(n) >= 49) & (recent_gap_count(gaps, retention) > 0)
+        & enough_volume & ~np.isnan(entry)
+    )
+    sl = np.where(trend_up, zone_lo - 20 * pip, zone_hi + 20 * pip)
+    tp = np.where(trend_up, swing_high, swing_low)
+    return finish_signals(mask, entry, sl, tp)
@@ -1,7 +1,14 @@
 # strategies/inversion_fvg.py
 
 from typing import Optional, Dict
+import numpy as np
 from utils.helpers import pip_size, round_safe
+from utils.batch_signals import (
+    as_arrays, finish_signals, fair_value_gaps, recent_gap_count, oldest_gap, trailing_max, trailing_min
+)
+
+# Data this strategy reads from chart_data (see core/fetch_plan.py)
+REQUIREMENTS = {"timeframe": "M5", "bars": 500, "fair_value_gaps": True, "volume_series": False, "ohlcv": False}
 
 def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     """
@@ -13,6 +20,7 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     fair_value_gaps = chart_data.get("fair_value_gaps", [])
     trend = chart_data.get("trend")
     symbol = chart_data.get("symbol")
+    fvg_index = chart_data.get("fvg_index")
 
     if len(candles) < 10 or not fair_value_gaps or not trend or not symbol:
         return None
@@ -24,8 +32,15 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     except (IndexError, KeyError):
         return None
 
+    # Gaps still open at the prior close and lying between the two closes
+    if fvg_index is not None:
+        bearish = fvg_index.query("bearish", prior["close"], last["close"], state="unfilled", include_last_bar=True)
+        bullish = fvg_index.query("bullish", last["close"], prior["close"], state="unfilled", include_last_bar=True)
+    else:
+        bearish = bullish = fair_value_gaps
+
     # Bullish inversion — broke above bearish FVG
-    for fvg in fair_value_gaps:
+    for fvg in bearish:
         price = fvg.get("price")
         if not price or fvg.get("type") != "bearish":
             continue
@@ -43,7 +58,7 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
             }
 
     # Bearish inversion — broke below bullish FVG
-    for fvg in fair_value_gaps:
+    for fvg in bullish:
         price = fvg.get("price")
         if not price or fvg.get("type") != "bullish":
             continue
@@ -61,3 +76,33 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
             }
 
     return None
+
+def generate_signals(ohlcv, symbol: str, timezone: str = "UTC", bar_minutes: int = None) -> dict:
+    """
+    Batch mode: what check_trade_opportunity would return on every bar of a
+    whole history, as arrays (signal, direction, entry, sl, tp). Gaps follow
+    the FVGIndex the engine keeps, fed from the first bar.
+    """
+    bars = as_arrays(ohlcv)
+    n = len(bars["close"])
+    retention = REQUIREMENTS["bars"]
+    pip = pip_size(symbol)
+    h, l, c = bars["high"], bars["low"], bars["close"]
+    gaps = fair_value_gaps(h, l, retention)
+
+    prior = np.concatenate([[np.nan], c[:-1]])
+    ready = (np.arange(n) >= 9) & (recent_gap_count(gaps, retention) > 0)
+    nonzero = {kind: np.where(gaps[f"{kind}_price"] != 0, gaps[f"{kind}_price"], np.nan) for kind in ("bullish", "bearish")}
+
+    # Bullish inversion: close breaks up through a bearish gap still open at the prior close
+    above = oldest_gap(nonzero["bearish"], gaps["bearish_filled_at"], retention, prior, c,
+                       strict=True, include_last_bar=True)
+    # Bearish inversion: close breaks down through a bullish gap
+    below = oldest_gap(nonzero["bullish"], gaps["bullish_filled_at"], retention, c, prior,
+                       strict=True, include_last_bar=True)
+
+    long_ = ready & ~np.isnan(above)
+    short = ready & ~long_ & ~np.isnan(below)
+    sl = np.where(long_, above - 15 * pip, below + 15 * pip)
+    tp = np.where(long_, trailing_max(h, 20), trailing_min(l, 20))
+    return finish_signals(long_ | short, c, sl, tp)
@@ -4,7 +4,19 @@ import datetime as dt
 import pandas as pd
 import pytz
 from typing import Optional, Dict
-from utils.helpers import pip_size, round_safe
+import numpy as np
+from utils.helpers import pip_size, round_safe, timeframe_minutes
+from utils.batch_signals import (
+    as_arrays, empty_signals, finish_signals, window_start, session_bounds, RangeExtremes,
+    true_range, trailing_mean
+)
+from utils import clock
+
+# Data this strategy reads from chart_data (see core/fetch_plan.py)
+REQUIREMENTS = {"timeframe": "M5", "bars": 500, "fair_value_gaps": False, "volume_series": False, "ohlcv_tz": True,
+                "uses_clock": True, "indicators": True,
+                # Confirmation bars run 08:00-09:00 in the chart timezone (see core/session_scheduler.py)
+                "session": {"start": "08:00", "end": "09:15", "weekdays": [0, 1, 2, 3, 4], "timezone": None}}
 
 def atr(df: pd.DataFrame, period: int = 14) -> float:
     high_low = df['high'] - df['low']
@@ -36,13 +48,15 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     if df is None or len(df) < 50 or symbol is None:
         return None
 
-    df = df.copy()
+    # The engine usually hands over an already converted frame (REQUIREMENTS["ohlcv_tz"])
     if df.index.tz is None:
+        df = df.copy()
         df.index = df.index.tz_localize(pytz.utc).tz_convert(timezone)
-    else:
+    elif str(df.index.tz) != timezone:
+        df = df.copy()
         df.index = df.index.tz_convert(timezone)
 
-    now = dt.datetime.now(pytz.timezone(timezone))
+    now = clock.now(pytz.timezone(timezone))
     session_date = now.date()
 
     range_start = dt.datetime.combine(session_date, dt.time(7, 0)).replace(tzinfo=pytz.timezone(timezone))
@@ -62,7 +76,10 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     low_range = range_df["low"].min()
     pip = pip_size(symbol)
 
-    avg_atr = atr(df[-50:])
+    # The engine's streaming mean true range (utils/indicators.py); computed here in backtests
+    avg_atr = (chart_data.get("indicators") or {}).get("tr_mean_14")
+    if avg_atr is None:
+        avg_atr = atr(df[-50:])
     if (high_range - low_range) < 0.5 * avg_atr:
         return None
 
@@ -70,7 +87,7 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
         wick_ratio = abs(row["high"] - row["close"]) / (row["high"] - row["low"] + 1e-6)
         if row["close"] > high_range and wick_ratio < 0.4:
             sl = low_range - 15 * pip
-            tp = row["close"] + (row["close"] - sl)
+            tp = row["close"] + 2 * (row["close"] - sl)
             rrr = (tp - row["close"]) / (row["close"] - sl)
             if rrr >= 1.5:
                 return {
@@ -85,3 +102,58 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
                 }
 
     return None
+
+def generate_signals(ohlcv, symbol: str, timezone: str = "UTC", bar_minutes: int = None) -> dict:
+    """
+    Batch mode: what check_trade_opportunity would return on every bar of a
+    whole history, as arrays (signal, direction, entry, sl, tp). Each bar is
+    evaluated at its close time, as the backtester drives the clock; there
+    is no news feed in batch mode. The ATR mean is summed directly rather
+    than with pandas' rolling sum, so a range sitting exactly on the ATR
+    filter could in principle differ in the last float bit.
+    """
+    bars = as_arrays(ohlcv)
+    n = len(bars["close"])
+    if n == 0:
+        return empty_signals(n)
+    pip = pip_size(symbol)
+    times, h, l, c = bars["time"], bars["high"], bars["low"], bars["close"]
+    first = window_start(n, REQUIREMENTS["bars"])
+    end = np.arange(n) + 1
+    bar_minutes = bar_minutes or timeframe_minutes(REQUIREMENTS["timeframe"])
+
+    range_start, range_end, check_end = session_bounds(
+        times + bar_minutes * 60, timezone, dt.time(7, 0), dt.time(8, 0), dt.time(9, 0)
+    )
+    range_lo = np.maximum(np.searchsorted(times, range_start, side="left"), first)
+    range_hi = np.minimum(np.searchsorted(times, range_end, side="left"), end)
+    confirm_lo = np.maximum(np.searchsorted(times, range_end, side="left"), first)
+    confirm_hi = np.minimum(np.searchsorted(times, check_end, side="left"), end)
+
+    extremes = RangeExtremes(h), RangeExtremes(l)
+    high_range = extremes[0].max(range_lo, range_hi)
+    low_range = extremes[1].min(range_lo, range_hi)
+    avg_atr = trailing_mean(true_range(h, l, c), 14)
+    ready = (
+        (end - first >= 50) & (range_hi - range_lo >= 3) & (confirm_hi > confirm_lo)
+        & ~((high_range - low_range) < 0.5 * avg_atr)
+    )
+
+    # First confirmation bar (in time order) that breaks out cleanly
+    mask = np.zeros(n, dtype=bool)
+    entry = np.full(n, np.nan)
+    sl = low_range - 15 * pip
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k in range(int((confirm_hi - confirm_lo)[ready].max(initial=0))):
+            j = confirm_lo + k
+            rows = ready & ~mask & (j < confirm_hi)
+            row_close = c[np.minimum(j, n - 1)]
+            row_high = h[np.minimum(j, n - 1)]
+            row_low = l[np.minimum(j, n - 1)]
+            wick_ratio = np.abs(row_high - row_close) / (row_high - row_low + 1e-6)
+            tp = row_close + 2 * (row_close - sl)
+            rrr = (tp - row_close) / (row_close - sl)
+            hit = rows & (row_close > high_range) & (wick_ratio < 0.4) & (rrr >= 1.5)
+            entry[hit] = row_close[hit]
+            mask |= hit
+    return finish_signals(mask, entry, sl, entry + 2 * (entry - sl))
@@ -4,16 +4,27 @@ import datetime as dt
 import pandas as pd
 import pytz
 from typing import Optional, Dict
-from utils.helpers import pip_size, round_safe
+import numpy as np
+from utils.helpers import pip_size, round_safe, timeframe_minutes
+from utils.batch_signals import (
+    as_arrays, empty_signals, finish_signals, window_start, session_bounds, RangeExtremes, last_true_index
+)
+from utils import clock
+
+# Data this strategy reads from chart_data (see core/fetch_plan.py)
+REQUIREMENTS = {"timeframe": "M5", "bars": 500, "fair_value_gaps": False, "volume_series": False, "ohlcv_tz": True,
+                "uses_clock": True,
+                # The sweep session runs 09:45-10:15 in the chart timezone (see core/session_scheduler.py)
+                "session": {"start": "09:45", "end": "10:30", "weekdays": [0, 1, 2, 3, 4], "timezone": None}}
 
 def detect_swing_lows(series: pd.Series) -> pd.Series:
     return series.rolling(window=3, center=True).apply(
-        lambda x: x[1] if x[1] < x[0] and x[1] < x[2] else None
+        lambda x: x[1] if x[1] < x[0] and x[1] < x[2] else np.nan, raw=True
     ).dropna()
 
 def detect_swing_highs(series: pd.Series) -> pd.Series:
     return series.rolling(window=3, center=True).apply(
-        lambda x: x[1] if x[1] > x[0] and x[1] > x[2] else None
+        lambda x: x[1] if x[1] > x[0] and x[1] > x[2] else np.nan, raw=True
     ).dropna()
 
 def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
@@ -31,14 +42,16 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
         return None
 
     pip = pip_size(symbol)
-    df = df.copy()
 
+    # The engine usually hands over an already converted frame (REQUIREMENTS["ohlcv_tz"])
     if df.index.tz is None:
+        df = df.copy()
         df.index = df.index.tz_localize(pytz.utc).tz_convert(timezone)
-    else:
+    elif str(df.index.tz) != timezone:
+        df = df.copy()
         df.index = df.index.tz_convert(timezone)
 
-    now = dt.datetime.now(pytz.timezone(timezone))
+    now = clock.now(pytz.timezone(timezone))
     session_date = now.date()
 
     session_start = dt.datetime.combine(session_date, dt.time(9, 45)).replace(tzinfo=pytz.timezone(timezone))
@@ -89,3 +102,49 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
                 }
 
     return None
+
+def generate_signals(ohlcv, symbol: str, timezone: str = "Asia/Kolkata", bar_minutes: int = None) -> dict:
+    """
+    Batch mode: what check_trade_opportunity would return on every bar of a
+    whole history, as arrays (signal, direction, entry, sl, tp). Each bar is
+    evaluated at its close time, as the backtester drives the clock.
+    """
+    bars = as_arrays(ohlcv)
+    n = len(bars["close"])
+    if n == 0:
+        return empty_signals(n)
+    pip = pip_size(symbol)
+    times, h, l, c = bars["time"], bars["high"], bars["low"], bars["close"]
+    first = window_start(n, REQUIREMENTS["bars"])
+    end = np.arange(n) + 1
+    bar_minutes = bar_minutes or timeframe_minutes(REQUIREMENTS["timeframe"])
+
+    session_start, session_end = session_bounds(times + bar_minutes * 60, timezone, dt.time(9, 45), dt.time(10, 15))
+    lo = np.maximum(np.searchsorted(times, session_start, side="left"), first)
+    hi = np.minimum(np.searchsorted(times, session_end, side="right"), end)
+    last = np.clip(hi - 1, 0, n - 1)
+    ready = (end - first >= 50) & (hi - lo >= 5)
+
+    high_before = RangeExtremes(h).max(lo, hi - 2)
+    low_before = RangeExtremes(l).min(lo, hi - 2)
+
+    # Latest swing point strictly inside the session (both neighbours in it)
+    swing_low = np.zeros(n, dtype=bool)
+    swing_high = np.zeros(n, dtype=bool)
+    swing_low[1:-1] = (l[1:-1] < l[:-2]) & (l[1:-1] < l[2:])
+    swing_high[1:-1] = (h[1:-1] > h[:-2]) & (h[1:-1] > h[2:])
+    probe = np.clip(hi - 2, 0, n - 1)
+    last_swing_low = last_true_index(swing_low)[probe]
+    last_swing_high = last_true_index(swing_high)[probe]
+    swing_low_price = np.where(last_swing_low >= lo + 1, l[last_swing_low], np.nan)
+    swing_high_price = np.where(last_swing_high >= lo + 1, h[last_swing_high], np.nan)
+
+    close = c[last]
+    sweep_high = ready & (h[last] > high_before)
+    sweep_low = ready & ~sweep_high & (l[last] < low_before)
+    short = sweep_high & (close < swing_low_price)
+    long_ = sweep_low & (close > swing_high_price)
+
+    sl = np.where(short, h[last] + 10 * pip, l[last] - 10 * pip)
+    tp = np.where(short, close - 2 * (close - swing_low_price), close + 2 * (swing_high_price - close))
+    return finish_signals(short | long_, close, sl, tp)
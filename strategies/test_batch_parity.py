@@ -0,0 +1,89 @@
+# strategies/test_batch_parity.py
+#
+# Batch generate_signals must agree with check_trade_opportunity called bar by
+# bar on the chart_data the engine and backtester build (500 bar window,
+# FVGIndex fed from the first bar, clock at the bar's close).
+
+import importlib
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.chart_state import build_chart_state
+from utils.clock import VirtualClock, use_clock
+from utils.fvg_index import FVGIndex
+
+BAR_MINUTES = 5
+CASES = [
+    ("doji_confirmation", "EURUSD", "UTC"),
+    ("inversion_fvg", "EURUSD", "UTC"),
+    ("volume_liquidity", "EURUSD", "UTC"),
+    ("fib_fvg", "XAUUSD", "UTC"),
+    ("london_open_breakout", "GBPUSD", "Europe/London"),
+    ("ten_am_manipulation", "USDJPY", "Asia/Kolkata"),
+]
+
+
+def session_bars(synthetic_bars) -> pd.DataFrame:
+    """
+    M5 random walk with volatility bursts, so gaps and dojis occur, plus a
+    daily 04:20 UTC bar that sweeps the prior highs and closes below the
+    prior lows (inside the 10AM IST session) and a daily 08:10 UTC bar that
+    closes near its high above the 07:00-08:00 range (London open breakout).
+    """
+    df = synthetic_bars(n=1500, seed=7, bursts=0.1, open_jitter=0.2, bar_minutes=BAR_MINUTES)
+    index, scale = df.index, (df["high"] - df["low"]).median()
+    open_, high, low, close = (df[name].to_numpy().copy() for name in ("open", "high", "low", "close"))
+    for i in np.flatnonzero((index.hour == 4) & (index.minute == 20)):
+        high[i] = high[i - 6:i].max() + 2 * scale
+        close[i] = low[i - 6:i].min() - scale
+        low[i] = close[i] - scale
+    for i in np.flatnonzero((index.hour == 8) & (index.minute == 10)):
+        open_[i] = close[i - 1]
+        close[i] = high[i - 14:i].max() + 3 * scale
+        high[i] = close[i] + 0.1 * scale
+        low[i] = open_[i] - 0.5 * scale
+    return df.assign(open=open_, high=high, low=low, close=close)
+
+
+def per_bar_signals(strategy, df: pd.DataFrame, symbol: str, timezone: str) -> list:
+    req = {**{"fair_value_gaps": True, "volume_series": True, "ohlcv": False, "ohlcv_tz": False},
+           **strategy.REQUIREMENTS}
+    fvg_index = FVGIndex(req["bars"]) if req["fair_value_gaps"] else None
+    results = []
+    with use_clock(VirtualClock()) as bar_clock:
+        for i in range(len(df)):
+            window = df.iloc[max(0, i + 1 - req["bars"]):i + 1]
+            chart_data = build_chart_state(window, symbol, req, fvg_index, timezone)
+            bar_clock.set(df.index[i].timestamp() + BAR_MINUTES * 60)
+            results.append(strategy.check_trade_opportunity(chart_data))
+    return results
+
+
+@pytest.mark.parametrize("name,symbol,timezone", CASES)
+def test_generate_signals_matches_per_bar(name, symbol, timezone, monkeypatch, synthetic_bars):
+    # The per-bar path asks the terminal to select the symbol; batch mode does not.
+    # MetaTrader5 is Windows-only, so it is stubbed for the import as well.
+    terminal = SimpleNamespace(initialize=lambda: True, symbol_select=lambda *a: True)
+    monkeypatch.setitem(sys.modules, "MetaTrader5", terminal)
+    module = importlib.import_module(f"strategies.{name}")
+    if hasattr(module, "mt5"):
+        monkeypatch.setattr(module, "mt5", terminal)
+
+    df = session_bars(synthetic_bars)
+    expected = per_bar_signals(module, df, symbol, timezone)
+    batch = module.generate_signals(df, symbol, timezone=timezone, bar_minutes=BAR_MINUTES)
+
+    assert len(batch["signal"]) == len(df)
+    assert batch["signal"].any(), "no setup fired on the synthetic bars"
+    for i, trade in enumerate(expected):
+        assert batch["signal"][i] == (trade is not None), f"bar {i}: per-bar {trade}"
+        if trade is None:
+            continue
+        assert batch["entry"][i] == trade["entry"], f"bar {i}"
+        assert batch["sl"][i] == trade["sl"], f"bar {i}"
+        assert batch["tp"][i] == trade["tp"], f"bar {i}"
+        assert batch["direction"][i] == (1 if trade["tp"] > trade["entry"] else -1), f"bar {i}"
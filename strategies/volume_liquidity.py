@@ -1,7 +1,14 @@
 # strategies/volume_liquidity.py
 
 from typing import Optional, Dict
+import numpy as np
 from utils.helpers import pip_size, round_safe
+from utils.batch_signals import (
+    as_arrays, finish_signals, fair_value_gaps, recent_gap_count, oldest_gap, prior_mean, trailing_max
+)
+
+# Data this strategy reads from chart_data (see core/fetch_plan.py)
+REQUIREMENTS = {"timeframe": "M5", "bars": 500, "fair_value_gaps": True, "volume_series": True, "ohlcv": False}
 
 def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     """
@@ -14,6 +21,7 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
     fair_value_gaps = chart_data.get("fair_value_gaps", [])
     trend = chart_data.get("trend")
     symbol = chart_data.get("symbol")
+    fvg_index = chart_data.get("fvg_index")
 
     if len(candles) < 20 or len(volumes) < 20 or not fair_value_gaps or not symbol:
         return None
@@ -30,7 +38,9 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
         flat_volume = 0 < recent_volume < avg_volume * 0.9
 
         if price_dropped and flat_volume:
-            for fvg in fair_value_gaps:
+            # Only gaps price has not yet traded back into are still valid entries
+            candidates = fvg_index.query("bullish") if fvg_index is not None else fair_value_gaps
+            for fvg in candidates:
                 if fvg.get("type") != "bullish":
                     continue
 
@@ -56,3 +66,28 @@ def check_trade_opportunity(chart_data: Dict) -> Optional[Dict]:
         return None
 
     return None
+
+def generate_signals(ohlcv, symbol: str, timezone: str = "UTC", bar_minutes: int = None) -> dict:
+    """
+    Batch mode: what check_trade_opportunity would return on every bar of a
+    whole history, as arrays (signal, direction, entry, sl, tp). Gaps follow
+    the FVGIndex the engine keeps, fed from the first bar.
+    """
+    bars = as_arrays(ohlcv)
+    n = len(bars["close"])
+    retention = REQUIREMENTS["bars"]
+    pip = pip_size(symbol)
+    o, h, l, c, v = bars["open"], bars["high"], bars["low"], bars["close"], bars["tick_volume"]
+    gaps = fair_value_gaps(h, l, retention)
+
+    prev_open = np.concatenate([[np.nan], o[:-1]])
+    prev_close = np.concatenate([[np.nan], c[:-1]])
+    price_dropped = (prev_close < prev_open) & (c < prev_close)
+    flat_volume = (0 < v) & (v < prior_mean(v, 10) * 0.9)
+
+    entry = oldest_gap(gaps["bullish_price"], gaps["bullish_mitigated_at"], retention)
+    mask = (
+        (np.arange(n) >= 19) & (recent_gap_count(gaps, retention) > 0)
+        & price_dropped & flat_volume & ~np.isnan(entry)
+    )
+    return finish_signals(mask, entry, entry - 5 * pip, trailing_max(h, 20))
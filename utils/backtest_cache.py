@@ -0,0 +1,386 @@
+# utils/backtest_cache.py
+
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.config_loader import (
+    get_backtest_cache_settings, get_cooldown_minutes, get_max_trade_duration, get_trade_management_settings
+)
+from utils.backtester import Backtester
+
+# Besides the strategy, every result depends on how bars are replayed and exits simulated
+ENGINE_MODULES = ("utils.backtester", "utils.chart_state", "utils.clock", "utils.exit_simulator", "utils.fvg_index",
+                  "utils.helpers", "utils.performance_tracker", "core.fetch_plan")
+# Bump when the stored entry layout changes
+CACHE_FORMAT = 1
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _module_source(module) -> bytes:
+    path = getattr(module, "__file__", None)
+    if path and path.endswith(".py") and os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return inspect.getsource(module).encode()
+
+
+def _project_modules(module) -> list:
+    """
+    The repository modules a strategy module uses directly: imported modules
+    and the modules its imported functions and classes come from.
+    """
+    names = set()
+    for value in vars(module).values():
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+        dependency = sys.modules.get(name) if isinstance(name, str) else None
+        path = os.path.abspath(getattr(dependency, "__file__", None) or "")
+        if (dependency is not None and dependency is not module and path.startswith(PROJECT_ROOT + os.sep)
+                and "site-packages" not in path):
+            names.add(name)
+    return sorted(names)
+
+
+def code_fingerprint(strategy) -> str:
+    """
+    Digest of the strategy module's source, the repository modules it uses
+    and the backtest engine modules. Editing another strategy leaves it
+    unchanged; editing a shared helper changes it for every user.
+    """
+    digest = hashlib.sha256()
+    names = [strategy.__name__] + [name for name in _project_modules(strategy) + list(ENGINE_MODULES)
+                                   if name != strategy.__name__]
+    for name in dict.fromkeys(names):
+        module = strategy if name == strategy.__name__ else importlib.import_module(name)
+        digest.update(name.encode())
+        digest.update(_module_source(module))
+    return digest.hexdigest()
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Digest of a bar DataFrame's columns, index and values.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c) for c in df.columns], [str(t) for t in df.dtypes], str(df.index.dtype)]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def run_params(kwargs: dict) -> dict:
+    """
+    Backtester.run keyword arguments with the defaults filled in, so that
+    run() and run(spread_pips=0.0) share a cache entry.
+    """
+    bound = inspect.signature(Backtester.run).bind(None, **kwargs)
+    bound.apply_defaults()
+    return {name: value for name, value in bound.arguments.items() if name != "self"}
+
+
+def backtest_metrics(trades: list) -> dict:
+    """
+    Headline numbers of a backtest's trade list; PnL in pips x volume.
+    """
+    pnl = np.array([t.get("pnl") or 0.0 for t in trades], dtype=float)
+    wins = sum(1 for t in trades if t.get("result") == "win")
+    losses = sum(1 for t in trades if t.get("result") == "loss")
+    equity = np.r_[0.0, np.cumsum(pnl)]
+    return {
+        "trades": len(trades),
+        "wins": wins,
+        "losses": losses,
+        "win_rate": wins / len(trades) * 100 if trades else 0.0,
+        "total_pnl": float(pnl.sum()),
+        "profit_factor": float(pnl[pnl > 0].sum() / abs(pnl[pnl < 0].sum() or 1)),
+        "avg_rrr": float(np.mean([t.get("rrr") or 0.0 for t in trades])) if trades else 0.0,
+        "max_drawdown": float((np.maximum.accumulate(equity) - equity).max()),
+    }
+
+
+class BacktestCache:
+    """
+    Content-addressed on-disk store of Backtester results. The key hashes
+    everything a run depends on: the strategy's code (code_fingerprint), the
+    run parameters, the config values the backtester reads (cooldown, max
+    duration, trade management) and the bars (data_fingerprint). An entry
+    holds the trade list and its metrics, pickled under <path>/<key[:2]>/.
+
+    Entries are written atomically, and reads refresh their mtime, so when
+    the store grows past max_size_mb the least recently used entries are
+    deleted first. Several processes may share a directory: they only ever
+    replace whole files.
+    """
+
+    def __init__(self, path: str = os.path.join("cache", "backtests"), max_size_mb: float = 512,
+                 enabled: bool = True):
+        self.path = path
+        self.max_bytes = int(max_size_mb * 2 ** 20)
+        self.enabled = enabled
+        self.total_bytes = None
+        self.code_fingerprints = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def key(self, backtester: Backtester, params: dict, data_key: str = None) -> str:
+        strategy = backtester.strategy
+        if strategy.__name__ not in self.code_fingerprints:
+            self.code_fingerprints[strategy.__name__] = code_fingerprint(strategy)
+        payload = {
+            "format": CACHE_FORMAT,
+            "code": self.code_fingerprints[strategy.__name__],
+            "symbol": backtester.symbol,
+            "timeframe": backtester.timeframe,
+            "params": params,
+            "config": {
+                "cooldown_minutes": get_cooldown_minutes(backtester.strategy_name),
+                "max_trade_duration": get_max_trade_duration(),
+                "trade_management": get_trade_management_settings(),
+            },
+            "data": data_key or data_fingerprint(backtester.ohlcv_data),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def run(self, backtester: Backtester, data_key: str = None, **kwargs) -> dict:
+        """
+        backtester.run(**kwargs) served from the cache when possible. Returns
+        {"key", "cached", "trades", "metrics", "meta"}; on a hit the
+        backtester's tracker holds the stored trades, as if it had run.
+        data_key is a precomputed data_fingerprint of its bars.
+        """
+        params = run_params(kwargs)
+        key = self.key(backtester, params, data_key)
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            backtester.tracker.trades.extend(entry["trades"])
+            return {"key": key, "cached": True, **entry}
+
+        self.misses += 1
+        started = time.perf_counter()
+        trades = backtester.run(**kwargs).trades
+        entry = {
+            "trades": trades,
+            "metrics": backtest_metrics(trades),
+            "meta": {
+                "strategy": backtester.strategy_name,
+                "symbol": backtester.symbol,
+                "timeframe": backtester.timeframe,
+                "params": params,
+                "seconds": round(time.perf_counter() - started, 3),
+                "created": time.time(),
+            },
+        }
+        self.put(key, entry)
+        return {"key": key, "cached": False, **entry}
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.pkl")
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"⚠️ Dropping unreadable backtest cache entry {key[:12]}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # recency for eviction
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict):
+        if not self.enabled:
+            return
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write backtest cache entry {key[:12]}: {e}")
+            self._remove(tmp)
+            return
+        if self.total_bytes is not None:
+            self.total_bytes += os.path.getsize(path)
+        self._evict(keep=path)
+
+    def _entries(self) -> list:
+        """
+        (mtime, size, path) of every stored entry.
+        """
+        entries = []
+        if not os.path.isdir(self.path):
+            return entries
+        for shard in os.scandir(self.path):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                if item.name.endswith(".pkl"):
+                    try:
+                        stat = item.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+        return entries
+
+    def _evict(self, keep: str = None):
+        # The running total can only overestimate (overwrites, other processes' evictions), so the
+        # directory is only scanned once it crosses the limit
+        if self.total_bytes is not None and self.total_bytes <= self.max_bytes:
+            return
+        entries = self._entries()
+        self.total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                self.total_bytes -= size
+                self.evicted += 1
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+        self.total_bytes = 0
+
+    def get_summary(self) -> str:
+        size = self.total_bytes if self.total_bytes is not None else sum(size for _, size, _ in self._entries())
+        return (f"🗄️ Backtest cache: {self.hits} hits, {self.misses} misses, {self.evicted} evicted, "
+                f"{size / 2 ** 20:.1f}/{self.max_bytes / 2 ** 20:.0f} MB")
+
+
+# ----------------------------------------------------------------------
+# Sweeps
+# ----------------------------------------------------------------------
+def _cell_frame(source, symbol: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+    if isinstance(source, dict):
+        df = source[symbol]
+        times = pd.DatetimeIndex(df["timestamp"]) if "timestamp" in df.columns else df.index
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= times >= pd.Timestamp(start)
+        if end is not None:
+            mask &= times < pd.Timestamp(end)
+        return df[mask]
+    df = source.frame(symbol, timeframe, start=start, end=end)
+    df["timestamp"] = df.index
+    return df
+
+
+def sweep(strategies: list, symbols: list, timeframe: str, source, periods=((None, None),),
+          cache: BacktestCache = None, **run_kwargs) -> list:
+    """
+    One backtest per (strategy, symbol, period) cell. Cells whose strategy
+    code, parameters and bars are unchanged come from the cache, so after an
+    edit only the affected strategies are recomputed. `strategies` are
+    strategy modules, `source` a BarStore or {symbol: DataFrame}, periods
+    (start, end) pairs (end exclusive, None for open).
+    """
+    cache = cache or backtest_cache
+    cells = []
+    for symbol in symbols:
+        for start, end in periods:
+            df = _cell_frame(source, symbol, timeframe, start, end)
+            if df.empty:
+                logging.warning(f"⚠️ No bars for {symbol} {timeframe} {start} → {end}; cell skipped")
+                continue
+            data_key = data_fingerprint(df)
+            for strategy in strategies:
+                result = cache.run(Backtester(strategy, symbol, timeframe, df), data_key=data_key, **run_kwargs)
+                cells.append({
+                    "strategy": result["meta"]["strategy"],
+                    "symbol": symbol,
+                    "timeframe": timeframe,
+                    "period": (start, end),
+                    "cached": result["cached"],
+                    "metrics": result["metrics"],
+                    "trades": result["trades"],
+                })
+    return cells
+
+
+def format_report(cells: list) -> str:
+    cached = sum(1 for cell in cells if cell["cached"])
+    lines = [
+        f"🗄️ Backtest sweep: {len(cells)} cells, {cached} from cache, {len(cells) - cached} computed",
+        f"{'strategy':<22} {'symbol':<10} {'period':<25} {'trades':>6} {'win%':>6} {'pnl':>9} {'pf':>5} {'maxdd':>8}",
+    ]
+    for cell in cells:
+        m = cell["metrics"]
+        start, end = cell["period"]
+        period = f"{str(start or '…')[:10]} → {str(end or '…')[:10]}"
+        lines.append(
+            f"{cell['strategy']:<22} {cell['symbol']:<10} {period:<25} {m['trades']:>6} {m['win_rate']:>5.1f}% "
+            f"{m['total_pnl']:>9.1f} {m['profit_factor']:>5.2f} {m['max_drawdown']:>8.1f}"
+            + ("" if cell["cached"] else "  *")
+        )
+    return "\n".join(lines)
+
+
+_settings = get_backtest_cache_settings()
+backtest_cache = BacktestCache(
+    path=_settings.get("path", os.path.join("cache", "backtests")),
+    max_size_mb=_settings.get("max_size_mb", 512),
+    enabled=_settings.get("enabled", True)
+)
+
+
+if __name__ == "__main__":
+    # python -m utils.backtest_cache --strategies fib_fvg,doji_confirmation --symbols EURUSDm,XAUUSD \
+    #     --timeframe M5 --periods 2024-01-01:2024-04-01,2024-04-01:2024-07-01
+    import argparse
+
+    from core.config_loader import get_bar_store_settings
+    from utils.bar_store import BarStore
+
+    parser = argparse.ArgumentParser(description="Backtest sweep over the bar store, served from the backtest cache")
+    parser.add_argument("--strategies", required=True, help="comma separated strategy module names")
+    parser.add_argument("--symbols", required=True, help="comma separated symbols")
+    parser.add_argument("--timeframe", default="M5")
+    parser.add_argument("--periods", default=":", help="comma separated START:END dates, either side may be empty")
+    parser.add_argument("--spread-pips", type=float, default=0.0)
+    parser.add_argument("--clear", action="store_true", help="empty the cache first")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+    if args.clear:
+        backtest_cache.clear()
+    bar_settings = get_bar_store_settings()
+    store = BarStore(bar_settings.get("path", "data/bars"), bar_settings.get("float32_prices", False))
+    modules = [importlib.import_module(f"strategies.{name}") for name in args.strategies.split(",")]
+    periods = [tuple(part or None for part in item.split(":")) for item in args.periods.split(",")]
+    results = sweep(modules, args.symbols.split(","), args.timeframe, store, periods, spread_pips=args.spread_pips)
+    print(format_report(results))
+    print(backtest_cache.get_summary())
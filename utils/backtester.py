@@ -1,7 +1,14 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import timedelta
 from utils.performance_tracker import PerformanceTracker
-from utils.helpers import pip_size
+from utils.helpers import pip_size, timeframe_minutes
+from utils.chart_state import build_chart_state
+from utils.exit_simulator import simulate_exits, max_bars_for_duration, market_fill, EXIT_REASONS
+from utils.fvg_index import FVGIndex
+from utils.clock import VirtualClock, use_clock
+from core.fetch_plan import strategy_requirements
+from core.config_loader import get_cooldown_minutes, get_max_trade_duration, get_trade_management_settings
 
 class Backtester:
     def __init__(self, strategy, symbol: str, timeframe: str, ohlcv_data: pd.DataFrame):
@@ -9,43 +16,117 @@ class Backtester:
         self.symbol = symbol
         self.timeframe = timeframe
         self.ohlcv_data = ohlcv_data.copy()
+        if "timestamp" in self.ohlcv_data.columns:
+            self.ohlcv_data = self.ohlcv_data.set_index(pd.DatetimeIndex(self.ohlcv_data["timestamp"]))
+            self.ohlcv_data.index.name = "time"
+        self.strategy_name = strategy.__name__.rsplit(".", 1)[-1]
         self.tracker = PerformanceTracker()
 
-    def run(self):
-        for i in range(50, len(self.ohlcv_data)):  # Start after warm-up
-            candles = self.ohlcv_data.iloc[:i]
-            chart_data = {
-                "symbol": self.symbol,
-                "timeframe": self.timeframe,
-                "ohlcv": candles
-            }
-
-            try:
-                signal = self.strategy.check_trade_opportunity(chart_data)
-                if signal:
-                    direction = signal.get("direction", "buy")
-                    entry_price = signal.get("entry_price", candles.iloc[-1]["close"])
-                    entry_time = candles.iloc[-1]["timestamp"]
-                    exit_price = entry_price + 20 * pip_size(self.symbol) if direction == 'buy' else entry_price - 20 * pip_size(self.symbol)
-                    exit_time = candles.iloc[-1]["timestamp"]
-                    volume = signal.get("volume", 1.0)
-
-                    pip = pip_size(self.symbol)
-                    pnl_pips = (exit_price - entry_price) / pip if direction == 'buy' else (entry_price - exit_price) / pip
-                    pnl = pnl_pips * volume
-
-                    self.tracker.log_trade(
-                        symbol=self.symbol,
-                        direction=direction,
-                        entry_time=entry_time,
-                        entry_price=entry_price,
-                        exit_time=exit_time,
-                        exit_price=exit_price,
-                        volume=volume,
-                        pnl=pnl,
-                        reason=self.strategy.__name__
-                    )
-            except Exception as e:
-                print(f"[{self.strategy.__name__}] Backtest error at index {i}: {e}")
+    @classmethod
+    def from_store(cls, strategy, symbol: str, timeframe: str, store, start=None, end=None):
+        """
+        Builds a backtester from a local BarStore instead of a live terminal fetch.
+        """
+        df = store.frame(symbol, timeframe, start=start, end=end)
+        if df.empty:
+            raise ValueError(f"No stored bars for {symbol} {timeframe}")
+        df["timestamp"] = df.index
+        return cls(strategy, symbol, timeframe, df)
+
+    def collect_signals(self, timezone: str = "UTC", spread_pips: float = 0.0) -> list:
+        """
+        Calls the strategy on every bar with the same chart_data the live engine
+        builds, honouring the strategy cooldown. Returns [(bar index, trade dict)].
+        Signals whose stops are on the wrong side of the market fill are
+        dropped before they start a cooldown, as live only starts one on a
+        placed trade.
+        """
+        req = strategy_requirements(self.strategy)
+        close = self.ohlcv_data["close"].to_numpy()
+        spread = spread_pips * pip_size(self.symbol)
+        fvg_index = FVGIndex(req["bars"]) if req["fair_value_gaps"] else None
+        cooldown = timedelta(minutes=get_cooldown_minutes(self.strategy_name))
+        times = self.ohlcv_data.index
+        signals = []
+        last_entry = None
+
+        bar_seconds = timeframe_minutes(self.timeframe) * 60
+        # Session strategies read the clock; run them at each bar's close time
+        with use_clock(VirtualClock()) as bar_clock:
+            for i in range(50, len(self.ohlcv_data)):  # Start after warm-up
+                window = self.ohlcv_data.iloc[max(0, i + 1 - req["bars"]):i + 1]
+                chart_data = build_chart_state(window, self.symbol, req, fvg_index, timezone)
+                chart_data["timeframe"] = self.timeframe
+
+                if last_entry is not None and times[i] - last_entry < cooldown:
+                    continue
+
+                bar_clock.set(times[i].timestamp() + bar_seconds)
+                try:
+                    signal = self.strategy.check_trade_opportunity(chart_data)
+                except Exception as e:
+                    print(f"[{self.strategy_name}] Backtest error at index {i}: {e}")
+                    continue
+
+                if (signal and all(k in signal for k in ("entry", "sl", "tp"))
+                        and market_fill(signal, close[i], spread) is not None):
+                    signals.append((i, signal))
+                    last_entry = times[i]
+
+        return signals
+
+    def run(self, same_bar_policy: str = "sl_first", spread_pips: float = 0.0, commission_pips: float = 0.0,
+            manage_stops: bool = True, volume: float = 1.0, timezone: str = "UTC"):
+        """
+        Replays the strategy over the data and simulates each entry's exit
+        (SL/TP, trailing/breakeven, max duration). PnL is in pips x volume.
+
+        Entries fill at market like execute_trade: the signal bar's close
+        (plus spread on buys), not the strategy's `entry`, which may be an
+        FVG level away from the price. SL/TP stay at the strategy's levels;
+        signals whose levels are already on the wrong side of the fill are
+        skipped (see collect_signals), as the broker would reject their stops.
+        """
+        signals = self.collect_signals(timezone, spread_pips)
+        if not signals:
+            return self.tracker
+
+        pip = pip_size(self.symbol)
+        spread = spread_pips * pip
+        management = get_trade_management_settings() if manage_stops else {}
+        close = self.ohlcv_data["close"].to_numpy()
+        entry_index = np.array([i for i, _ in signals])
+        entry = close[entry_index]
+        sl = np.array([s["sl"] for _, s in signals], dtype=float)
+        tp = np.array([s["tp"] for _, s in signals], dtype=float)
+        direction = np.where(tp > np.array([s["entry"] for _, s in signals], dtype=float), 1.0, -1.0)
+
+        exits = simulate_exits(
+            self.ohlcv_data["high"].to_numpy(), self.ohlcv_data["low"].to_numpy(),
+            close, entry_index, entry, sl, tp, direction,
+            open_=self.ohlcv_data["open"].to_numpy() if "open" in self.ohlcv_data else None,
+            max_bars=max_bars_for_duration(get_max_trade_duration(), timeframe_minutes(self.timeframe)),
+            same_bar_policy=same_bar_policy,
+            spread=spread,
+            commission=commission_pips * pip,
+            trail_trigger=management["trail_trigger_pips"] * pip if "trail_trigger_pips" in management else None,
+            trail_distance=management["trail_distance_pips"] * pip if "trail_distance_pips" in management else None,
+            breakeven_trigger=management["breakeven_trigger_pips"] * pip if "breakeven_trigger_pips" in management else None,
+        )
+
+        times = self.ohlcv_data.index
+        for k, (i, signal) in enumerate(signals):
+            pnl_pips = exits["pnl"][k] / pip
+            risk_pips = abs(exits["entry_fill"][k] - sl[k]) / pip
+            self.tracker.record_trade(signal, {
+                "price": float(exits["entry_fill"][k]),
+                "time": str(times[i]),
+                "result": "win" if pnl_pips > 1e-9 else "loss" if pnl_pips < -1e-9 else "breakeven",
+                "pnl": float(pnl_pips * volume),
+                "rrr": float(pnl_pips / risk_pips) if risk_pips else 0.0,
+                "exit_price": float(exits["exit_price"][k]),
+                "exit_time": str(times[exits["exit_index"][k]]),
+                "exit_reason": EXIT_REASONS[int(exits["exit_reason"][k])],
+            })
 
         return self.tracker
@@ -0,0 +1,223 @@
+# utils/bar_store.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Column layout mirrors the structured array returned by mt5.copy_rates_*
+PRICE_COLUMNS = ("open", "high", "low", "close")
+BAR_COLUMNS = {
+    "time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "tick_volume": np.uint64,
+    "spread": np.int32,
+    "real_volume": np.uint64,
+}
+
+
+class BarStore:
+    """
+    Append-only on-disk bar history, one directory per symbol/timeframe.
+    Every column lives in its own raw binary file so reads are plain
+    memory maps (no parsing, no copy) and appends are cheap.
+
+    Layout: <root>/<symbol>/<timeframe>/<column>.bin + meta.json
+    """
+
+    def __init__(self, root: str = os.path.join("data", "bars"), float32_prices: bool = False):
+        self.root = root
+        self.float32_prices = float32_prices
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol, timeframe)
+
+    def _meta_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self._dir(symbol, timeframe), "meta.json")
+
+    def read_meta(self, symbol: str, timeframe: str) -> dict:
+        path = self._meta_path(symbol, timeframe)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def write_meta(self, symbol: str, timeframe: str, meta: dict):
+        """
+        Atomically replaces meta.json so a crash never leaves it half written.
+        """
+        path = self._meta_path(symbol, timeframe)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _dtypes(self, meta: dict) -> dict:
+        dtypes = dict(BAR_COLUMNS)
+        if meta.get("float32_prices"):
+            for col in PRICE_COLUMNS:
+                dtypes[col] = np.float32
+        return dtypes
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        return self.read_meta(symbol, timeframe).get("count", 0)
+
+    def last_time(self, symbol: str, timeframe: str):
+        """
+        Returns the epoch seconds of the newest stored bar, or None.
+        """
+        return self.read_meta(symbol, timeframe).get("last_time")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def append(self, symbol: str, timeframe: str, rates) -> int:
+        """
+        Appends bars (MT5 structured array or DataFrame with a 'time' column).
+        Bars older than the stored tail are ignored, a bar with the same time
+        as the tail overwrites it (the forming bar gets finalised).
+        Returns the number of new bars written.
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+
+        columns = _as_columns(rates)
+        directory = self._dir(symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+
+        meta = self.read_meta(symbol, timeframe)
+        if not meta:
+            meta = {"count": 0, "first_time": None, "last_time": None,
+                    "float32_prices": self.float32_prices}
+        self._repair(symbol, timeframe, meta)
+        dtypes = self._dtypes(meta)
+
+        times = columns["time"]
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        # Keep the last occurrence of duplicated timestamps
+        keep = np.append(times[1:] != times[:-1], True)
+        index = order[keep]
+        times = times[keep]
+
+        last_time = meta.get("last_time")
+        overwrite_tail = False
+        if last_time is not None:
+            if times[-1] < last_time:
+                return 0
+            overwrite_tail = bool(np.any(times == last_time))
+            fresh = times >= last_time
+            index = index[fresh]
+            times = times[fresh]
+
+        count = meta["count"]
+        for col, dtype in dtypes.items():
+            values = np.asarray(columns.get(col, np.zeros(len(columns["time"]))))[index].astype(dtype)
+            path = os.path.join(directory, f"{col}.bin")
+            if overwrite_tail:
+                with open(path, "r+b") as f:
+                    f.seek((count - 1) * np.dtype(dtype).itemsize)
+                    f.write(values.tobytes())
+            else:
+                with open(path, "ab") as f:
+                    f.write(values.tobytes())
+
+        added = len(times) - (1 if overwrite_tail else 0)
+        meta["count"] = count + added
+        if meta["first_time"] is None:
+            meta["first_time"] = int(times[0])
+        meta["last_time"] = int(times[-1])
+        self.write_meta(symbol, timeframe, meta)
+        return added
+
+    def _repair(self, symbol: str, timeframe: str, meta: dict):
+        """
+        Truncates column files back to meta['count'] after an interrupted append.
+        """
+        directory = self._dir(symbol, timeframe)
+        for col, dtype in self._dtypes(meta).items():
+            path = os.path.join(directory, f"{col}.bin")
+            expected = meta["count"] * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def load(self, symbol: str, timeframe: str, start=None, end=None, columns=None) -> dict:
+        """
+        Returns {column: read-only memmap} for bars with start <= time <= end.
+        Slicing a memmap is a view, so nothing is copied until it is used.
+        """
+        meta = self.read_meta(symbol, timeframe)
+        count = meta.get("count", 0)
+        if count == 0:
+            return {}
+
+        directory = self._dir(symbol, timeframe)
+        dtypes = self._dtypes(meta)
+        wanted = ["time"] + [c for c in (columns or dtypes) if c != "time"]
+        arrays = {
+            col: np.memmap(os.path.join(directory, f"{col}.bin"), dtype=dtypes[col], mode="r", shape=(count,))
+            for col in wanted
+        }
+
+        lo, hi = 0, count
+        if start is not None:
+            lo = int(np.searchsorted(arrays["time"], _to_epoch(start), side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(arrays["time"], _to_epoch(end), side="right"))
+        return {col: arr[lo:hi] for col, arr in arrays.items()}
+
+    def tail(self, symbol: str, timeframe: str, bars: int, columns=None) -> dict:
+        """
+        Returns the newest `bars` bars as memmap views.
+        """
+        arrays = self.load(symbol, timeframe, columns=columns)
+        return {col: arr[-bars:] for col, arr in arrays.items()}
+
+    def frame(self, symbol: str, timeframe: str, start=None, end=None, bars: int = None) -> pd.DataFrame:
+        """
+        Returns stored bars as a DataFrame indexed by UTC-naive 'time',
+        the same shape get_live_chart_state builds from copy_rates_from_pos.
+        The DataFrame owns a copy of the selected rows (pandas consolidates
+        the columns); use load()/tail() for zero-copy memmap views.
+        """
+        arrays = self.tail(symbol, timeframe, bars) if bars else self.load(symbol, timeframe, start, end)
+        if not arrays:
+            return pd.DataFrame()
+        df = pd.DataFrame({col: arr for col, arr in arrays.items() if col != "time"})
+        df.index = pd.to_datetime(np.asarray(arrays["time"]), unit="s")
+        df.index.name = "time"
+        return df
+
+
+def _as_columns(rates) -> dict:
+    if isinstance(rates, pd.DataFrame):
+        df = rates.reset_index() if "time" not in rates.columns else rates
+        times = df["time"]
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype("datetime64[s]").astype(np.int64)
+        columns = {col: df[col].to_numpy() for col in BAR_COLUMNS if col in df.columns}
+        columns["time"] = np.asarray(times, dtype=np.int64)
+        return columns
+    names = rates.dtype.names or ()
+    return {col: np.asarray(rates[col]) for col in BAR_COLUMNS if col in names}
+
+
+def _to_epoch(value) -> int:
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.value // 10**9)
@@ -0,0 +1,280 @@
+# utils/batch_signals.py
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytz
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.helpers import round_safe
+
+# Bars per block in the windowed (bars x lookback) scans; bounds peak memory
+CHUNK_ROWS = 4096
+
+
+# ----------------------------------------------------------------------
+# Inputs and outputs
+# ----------------------------------------------------------------------
+def as_arrays(ohlcv) -> dict:
+    """
+    Float columns of a bar DataFrame (time index, like chart_data["ohlcv"]),
+    an MT5 rates array or a mapping of arrays, plus `time`: each bar's open
+    as epoch seconds.
+    """
+    if isinstance(ohlcv, pd.DataFrame):
+        times = ohlcv["time"] if "time" in ohlcv.columns else ohlcv.index
+        columns = {name: ohlcv[name].to_numpy() for name in ohlcv.columns}
+    else:
+        names = ohlcv.dtype.names if isinstance(ohlcv, np.ndarray) else list(ohlcv)
+        times = ohlcv["time"]
+        columns = {name: np.asarray(ohlcv[name]) for name in names}
+
+    if isinstance(times, (pd.DatetimeIndex, pd.Series)) or np.asarray(times).dtype.kind == "M":
+        # .values is UTC for tz-aware indexes; the cast pins the unit whatever pandas inferred
+        seconds = pd.DatetimeIndex(times).values.astype("datetime64[s]").astype(np.int64)
+    else:
+        seconds = np.asarray(times, dtype=np.int64)
+
+    arrays = {name: np.asarray(columns[name], dtype=float)
+              for name in ("open", "high", "low", "close", "tick_volume") if name in columns}
+    arrays["time"] = np.asarray(seconds, dtype=np.int64)
+    return arrays
+
+
+def empty_signals(n: int) -> dict:
+    return {
+        "signal": np.zeros(n, dtype=bool),
+        "direction": np.zeros(n, dtype=np.int8),
+        "entry": np.full(n, np.nan),
+        "sl": np.full(n, np.nan),
+        "tp": np.full(n, np.nan),
+    }
+
+
+def finish_signals(mask, entry, sl, tp) -> dict:
+    """
+    Packs per-bar candidates into the batch result. Prices are rounded with
+    round_safe like the per-bar trade dicts, and direction is taken from
+    tp vs entry the way the executor decides buy/sell (1 buy, -1 sell).
+    """
+    out = empty_signals(len(mask))
+    for i in np.flatnonzero(mask):  # signals are sparse; exact Python rounding keeps parity
+        out["entry"][i] = round_safe(entry[i], 3)
+        out["sl"][i] = round_safe(sl[i], 3)
+        out["tp"][i] = round_safe(tp[i], 3)
+        out["direction"][i] = 1 if out["tp"][i] > out["entry"][i] else -1
+    out["signal"][:] = mask
+    return out
+
+
+# ----------------------------------------------------------------------
+# Windows as the live engine sees them
+# ----------------------------------------------------------------------
+def window_start(n: int, bars: int) -> np.ndarray:
+    """
+    First bar of the `bars` long chart window ending at each bar.
+    """
+    return np.maximum(0, np.arange(n) + 1 - bars)
+
+
+def trailing_max(values: np.ndarray, length: int) -> np.ndarray:
+    padded = np.concatenate([np.full(length - 1, -np.inf), values])
+    return sliding_window_view(padded, length).max(axis=1)
+
+
+def trailing_min(values: np.ndarray, length: int) -> np.ndarray:
+    padded = np.concatenate([np.full(length - 1, np.inf), values])
+    return sliding_window_view(padded, length).min(axis=1)
+
+
+def prior_mean(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Mean of the `length` values before each bar, summed left to right like
+    `sum(values[-length - 1:-1]) / length` so results match bit for bit.
+    NaN until enough history.
+    """
+    n = len(values)
+    total = np.full(n, np.nan)
+    if n > length:
+        total[length:] = values[:n - length]
+        for k in range(1, length):
+            total[length:] += values[k:n - length + k]
+    return total / length
+
+
+def trailing_mean(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Mean of the `length` values up to and including each bar.
+    """
+    means = np.full(len(values), np.nan)
+    means[length - 1:] = prior_mean(np.append(values, 0.0), length)[length:]
+    return means
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    with np.errstate(invalid="ignore"):
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+class RangeExtremes:
+    """
+    Sparse table for O(1) max/min over arbitrary [lo, hi) bar ranges.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.maxima = [values]
+        self.minima = [values]
+        width = 1
+        while width * 2 <= len(values):
+            self.maxima.append(np.maximum(self.maxima[-1][:-width], self.maxima[-1][width:]))
+            self.minima.append(np.minimum(self.minima[-1][:-width], self.minima[-1][width:]))
+            width *= 2
+
+    def _query(self, tables, reduce, lo, hi):
+        lo = np.asarray(lo)
+        hi = np.asarray(hi)
+        length = hi - lo
+        out = np.full(lo.shape, np.nan)
+        valid = length > 0
+        level = np.zeros(lo.shape, dtype=np.int64)
+        level[valid] = np.floor(np.log2(length[valid])).astype(np.int64)
+        for k in np.unique(level[valid]):
+            rows = valid & (level == k)
+            out[rows] = reduce(tables[k][lo[rows]], tables[k][hi[rows] - (1 << k)])
+        return out
+
+    def max(self, lo, hi) -> np.ndarray:
+        return self._query(self.maxima, np.maximum, lo, hi)
+
+    def min(self, lo, hi) -> np.ndarray:
+        return self._query(self.minima, np.minimum, lo, hi)
+
+
+def last_true_index(mask: np.ndarray) -> np.ndarray:
+    """
+    For each position, the latest index at or before it where mask is set (-1 if none).
+    """
+    return np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+
+
+def session_bounds(now: np.ndarray, timezone: str, *times: dt.time) -> list:
+    """
+    Per bar, epoch seconds of each clock time on the session date of `now`
+    in `timezone`, built the way the session strategies build them
+    (datetime.combine(date, time).replace(tzinfo=pytz.timezone(tz))).
+    """
+    tz = pytz.timezone(timezone)
+    local = pd.to_datetime(now, unit="s", utc=True).tz_convert(tz).tz_localize(None)
+    days, inverse = np.unique(local.values.astype("datetime64[D]").astype(np.int64), return_inverse=True)
+    bounds = []
+    for clock_time in times:
+        per_day = np.array([
+            dt.datetime.combine(dt.date(1970, 1, 1) + dt.timedelta(days=int(day)), clock_time)
+            .replace(tzinfo=tz).timestamp()
+            for day in days
+        ])
+        bounds.append(per_day[inverse] if len(days) else np.zeros(0))
+    return bounds
+
+
+# ----------------------------------------------------------------------
+# Fair value gaps as utils/fvg_index.FVGIndex tracks them
+# ----------------------------------------------------------------------
+def fair_value_gaps(high: np.ndarray, low: np.ndarray, retention: int) -> dict:
+    """
+    The gap each bar creates (at most one), with the bar index at which each
+    state ends, for an FVGIndex(retention) fed every bar from the first:
+        bullish_price / bearish_price   NaN where the bar made no such gap
+        *_mitigated_at / *_filled_at    first later bar trading into / through
+                                        the gap, or a sentinel past the end
+    """
+    n = len(high)
+    never = n + retention + 1
+    gaps = {key: np.full(n, np.nan) for key in ("bullish_price", "bearish_price")}
+    for key in ("bullish_mitigated_at", "bullish_filled_at", "bearish_mitigated_at", "bearish_filled_at"):
+        gaps[key] = np.full(n, never, dtype=np.int64)
+    gaps["any"] = np.zeros(n, dtype=bool)
+    if n < 3:
+        return gaps
+
+    bullish = np.zeros(n, dtype=bool)
+    bearish = np.zeros(n, dtype=bool)
+    bullish[2:] = low[2:] > high[:-2]
+    bearish[2:] = ~bullish[2:] & (high[2:] < low[:-2])
+    created_bull = np.flatnonzero(bullish)
+    created_bear = np.flatnonzero(bearish)
+    gaps["bullish_price"][created_bull] = low[created_bull]
+    gaps["bearish_price"][created_bear] = high[created_bear]
+
+    # A gap is retired by a later bar up to and including bar created + retention
+    gaps["bullish_mitigated_at"][created_bull] = _first_crossing(low, created_bull, low[created_bull], retention, True)
+    gaps["bullish_filled_at"][created_bull] = _first_crossing(low, created_bull, high[created_bull - 2], retention, True)
+    gaps["bearish_mitigated_at"][created_bear] = _first_crossing(high, created_bear, high[created_bear], retention, False)
+    gaps["bearish_filled_at"][created_bear] = _first_crossing(high, created_bear, low[created_bear - 2], retention, False)
+    gaps["any"][:] = bullish | bearish
+    return gaps
+
+
+def _first_crossing(values, created, threshold, horizon: int, below: bool) -> np.ndarray:
+    n = len(values)
+    never = n + horizon + 1
+    padded = np.concatenate([values, np.full(horizon + 1, np.inf if below else -np.inf)])
+    windows = sliding_window_view(padded, horizon)
+    found = np.full(len(created), never, dtype=np.int64)
+    for s in range(0, len(created), CHUNK_ROWS):
+        rows = slice(s, s + CHUNK_ROWS)
+        ahead = windows[created[rows] + 1]
+        limit = threshold[rows, None]
+        hits = ahead <= limit if below else ahead >= limit
+        first = hits.argmax(axis=1)
+        hit = hits[np.arange(len(first)), first]
+        found[rows] = np.where(hit, created[rows] + 1 + first, never)
+    return found
+
+
+def recent_gap_count(gaps: dict, retention: int) -> np.ndarray:
+    """
+    Gaps the index still retains at each bar (chart_data["fair_value_gaps"]).
+    """
+    counts = np.cumsum(gaps["any"])
+    return counts - np.concatenate([np.zeros(retention, dtype=counts.dtype), counts[:-retention]])[:len(counts)]
+
+
+def oldest_gap(price: np.ndarray, retired_at: np.ndarray, retention: int, lo=None, hi=None,
+               strict: bool = False, include_last_bar: bool = False) -> np.ndarray:
+    """
+    Per bar, the price of the oldest retained gap still live in the state
+    `retired_at` describes, with lo <= price <= hi (strict: lo < price < hi);
+    NaN if none. Mirrors FVGIndex.query(...)[0], including
+    include_last_bar returning gaps the current bar retired.
+    """
+    n = len(price)
+    span = retention + 1 if include_last_bar else retention
+    price_windows = sliding_window_view(np.concatenate([np.full(span - 1, np.nan), price]), span)
+    retired_windows = sliding_window_view(np.concatenate([np.zeros(span - 1, dtype=np.int64), retired_at]), span)
+    out = np.full(n, np.nan)
+
+    for s in range(0, n, CHUNK_ROWS):
+        rows = np.arange(s, min(n, s + CHUNK_ROWS))
+        prices = price_windows[rows]
+        retired = retired_windows[rows]
+        bar = rows[:, None]
+        if include_last_bar:
+            live = retired >= bar
+            # The bar that drops a gap from retention still reports it if it also retired it
+            live[:, 0] = retired[:, 0] == rows
+        else:
+            live = retired > bar
+        ok = live & ~np.isnan(prices)
+        if lo is not None:
+            low_bound = lo[rows, None]
+            high_bound = hi[rows, None]
+            with np.errstate(invalid="ignore"):
+                ok &= (low_bound < prices) & (prices < high_bound) if strict else \
+                    (low_bound <= prices) & (prices <= high_bound)
+        first = ok.argmax(axis=1)
+        found = ok[np.arange(len(rows)), first]
+        out[rows[found]] = prices[found, first[found]]
+    return out
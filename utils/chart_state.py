@@ -0,0 +1,69 @@
+# utils/chart_state.py
+
+from datetime import datetime
+import pandas as pd
+import pytz
+
+# Everything a strategy can ask for; see core/fetch_plan.py
+FULL_FEATURES = {"fair_value_gaps": True, "volume_series": True, "ohlcv": False, "ohlcv_tz": False}
+
+
+def build_chart_state(df: pd.DataFrame, symbol: str, features: dict, fvg_index=None, timezone: str = None,
+                      until: int = None) -> dict:
+    """
+    Derives the strategy inputs from a bar DataFrame, skipping features nobody asked for.
+    `until` (epoch seconds) is the open time of the last closed bar; later
+    bars are kept out of the FVGIndex (see FVGIndex.update).
+    """
+    timezone = timezone or str(datetime.now().astimezone().tzinfo)
+
+    # Fair Value Gaps (simple detection logic)
+    fair_value_gaps = []
+    if features.get("fair_value_gaps") and fvg_index is not None:
+        fvg_index.update(df, until=until)
+        fair_value_gaps = fvg_index.gaps()
+    elif features.get("fair_value_gaps"):
+        for i in range(2, len(df)):
+            if df['low'].iloc[i] > df['high'].iloc[i - 2]:  # Bullish gap
+                fair_value_gaps.append({
+                    "price": float(df['low'].iloc[i]),
+                    "type": "bullish"
+                })
+            elif df['high'].iloc[i] < df['low'].iloc[i - 2]:  # Bearish gap
+                fair_value_gaps.append({
+                    "price": float(df['high'].iloc[i]),
+                    "type": "bearish"
+                })
+
+    # Determine basic trend direction
+    close_diff = df['close'].iloc[-1] - df['close'].iloc[0]
+    trend = "up" if close_diff > 0 else "down"
+
+    chart_data = {
+        "candles": df[-50:].to_dict(orient="records"),
+        "fair_value_gaps": fair_value_gaps,
+        "trend": trend,
+        "symbol": symbol,
+        "timezone": timezone,
+        "news": []
+    }
+
+    if fvg_index is not None:
+        chart_data["fvg_index"] = fvg_index
+
+    if features.get("volume_series"):
+        chart_data["volume_series"] = df["tick_volume"].tail(50).tolist()
+
+    if features.get("ohlcv") or features.get("ohlcv_tz"):
+        ohlcv = df
+        if features.get("ohlcv_tz"):
+            # Converted once here instead of a copy + convert inside every session strategy
+            try:
+                ohlcv = df.copy()
+                ohlcv.index = ohlcv.index.tz_localize(pytz.utc).tz_convert(timezone)
+            except Exception:
+                # Abbreviations like "IST" are not valid tz names; strategies handle naive frames
+                ohlcv = df
+        chart_data["ohlcv"] = ohlcv
+
+    return chart_data
@@ -0,0 +1,95 @@
+# utils/clock.py
+
+import time as _time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    """
+    Wall-clock time; what the live bot runs on.
+    """
+
+    def time(self) -> float:
+        return _time.time()
+
+    def now(self, tz=None) -> datetime:
+        return datetime.now(tz)
+
+    def sleep(self, seconds: float):
+        _time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Manually driven time for replays and backtests. The epoch is in the same
+    seconds as MT5 bar times, so now(tz) treats bar times as UTC like the
+    strategies do. sleep() advances the clock instead of blocking.
+    """
+
+    def __init__(self, start=0.0):
+        self.epoch = _to_epoch(start)
+
+    def time(self) -> float:
+        return self.epoch
+
+    def now(self, tz=None) -> datetime:
+        return datetime.fromtimestamp(self.epoch, tz)
+
+    def sleep(self, seconds: float):
+        self.epoch += seconds
+
+    def advance(self, seconds: float):
+        self.epoch += seconds
+
+    def set(self, when):
+        self.epoch = _to_epoch(when)
+
+
+def _to_epoch(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if hasattr(value, "timestamp"):
+        if getattr(value, "tzinfo", None) is None and hasattr(value, "tz_localize"):
+            value = value.tz_localize("UTC")  # naive pandas timestamps are bar (UTC) times
+        elif getattr(value, "tzinfo", None) is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return float(value.timestamp())
+    raise TypeError(f"Cannot convert {value!r} to a clock time")
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Swaps the process-wide clock and returns the previous one.
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock):
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+def now(tz=None) -> datetime:
+    return _clock.now(tz)
+
+
+def time() -> float:
+    return _clock.time()
+
+
+def sleep(seconds: float):
+    _clock.sleep(seconds)
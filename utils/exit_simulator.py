@@ -0,0 +1,171 @@
+# utils/exit_simulator.py
+
+import numpy as np
+
+EXIT_SL = 0
+EXIT_TP = 1
+EXIT_TIME = 2
+EXIT_OPEN = 3  # still open at the end of the data
+EXIT_REASONS = {EXIT_SL: "sl", EXIT_TP: "tp", EXIT_TIME: "max_duration", EXIT_OPEN: "open"}
+
+SAME_BAR_POLICIES = ("sl_first", "tp_first", "nearest_to_open")
+
+
+def simulate_exits(high, low, close, entry_index, entry_price, sl, tp, direction,
+                   open_=None, max_bars: int = None, same_bar_policy: str = "sl_first",
+                   spread=0.0, commission=0.0, trail_trigger: float = None, trail_distance: float = None,
+                   breakeven_trigger: float = None, chunk_cells: int = 4_000_000) -> dict:
+    """
+    Finds the exit of a batch of trades with vectorized forward scans.
+
+    Bars are bid prices (as MT5 stores them). A trade entered at the close of
+    bar entry_index[k] is managed from the next bar on. direction is +1 (buy)
+    or -1 (sell); spread is in price units, commission in price units per unit
+    of volume. Returned pnl is per unit of volume, in price units.
+
+    Stop management mirrors core/trade_manager.py on bar granularity: once the
+    best price reached on earlier bars is trail_trigger beyond entry, the stop
+    trails trail_distance behind it; once it is breakeven_trigger beyond
+    entry, the stop moves to entry. Stops only ever move in the trade's favour.
+    Trades still open after max_bars bars close at that bar's close
+    (max_trade_duration_minutes / timeframe minutes).
+
+    same_bar_policy decides bars where both SL and TP are inside the range:
+      sl_first (conservative), tp_first, nearest_to_open (needs open_).
+    """
+    if same_bar_policy not in SAME_BAR_POLICIES:
+        raise ValueError(f"Unknown same_bar_policy '{same_bar_policy}'")
+    if same_bar_policy == "nearest_to_open" and open_ is None:
+        raise ValueError("nearest_to_open needs bar opens")
+
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    opens = None if open_ is None else np.asarray(open_, dtype=np.float64)
+    entry_index = np.asarray(entry_index, dtype=np.int64)
+    m = len(entry_index)
+    n = len(close)
+
+    entry_price = np.broadcast_to(np.asarray(entry_price, dtype=np.float64), (m,))
+    sl = np.broadcast_to(np.asarray(sl, dtype=np.float64), (m,))
+    tp = np.broadcast_to(np.asarray(tp, dtype=np.float64), (m,))
+    direction = np.broadcast_to(np.asarray(direction, dtype=np.float64), (m,))
+    spread = np.broadcast_to(np.asarray(spread, dtype=np.float64), (m,))
+    commission = np.broadcast_to(np.asarray(commission, dtype=np.float64), (m,))
+
+    horizon = max_bars if max_bars else max(n - 1 - int(entry_index.min(initial=n)), 1)
+    out = {
+        "exit_index": np.empty(m, dtype=np.int64),
+        "exit_price": np.empty(m),
+        "exit_reason": np.empty(m, dtype=np.int8),
+    }
+
+    step = max(1, chunk_cells // max(horizon, 1))
+    for start in range(0, m, step):
+        sel = slice(start, min(start + step, m))
+        _simulate_chunk(high, low, close, opens, entry_index[sel], entry_price[sel], sl[sel], tp[sel],
+                        direction[sel], spread[sel], horizon, max_bars, same_bar_policy,
+                        trail_trigger, trail_distance, breakeven_trigger, out, sel)
+
+    # Buys fill at the ask and exit at the bid, sells the other way round
+    entry_fill = entry_price + np.where(direction > 0, spread, 0.0)
+    exit_fill = out["exit_price"] + np.where(direction < 0, spread, 0.0)
+    out["entry_fill"] = entry_fill
+    out["pnl"] = direction * (exit_fill - entry_fill) - commission
+    out["bars_held"] = out["exit_index"] - entry_index
+    return out
+
+
+def _simulate_chunk(high, low, close, opens, entry_index, entry_price, sl, tp, direction, spread,
+                    horizon, max_bars, policy, trail_trigger, trail_distance, breakeven_trigger, out, sel):
+    n = len(close)
+    offsets = np.arange(1, horizon + 1)
+    idx = entry_index[:, None] + offsets[None, :]
+    valid = idx < n
+    idx = np.minimum(idx, n - 1)
+
+    is_buy = (direction > 0)[:, None]
+    half = spread[:, None]
+    # Work in the price the stop/target is triggered on: bid for buys, ask for sells
+    bar_high = high[idx] + np.where(is_buy, 0.0, half)
+    bar_low = low[idx] + np.where(is_buy, 0.0, half)
+
+    # Favourable excursion seen on the bars before each bar (the manager acts between bars)
+    fav = np.where(is_buy, bar_high, -bar_low)
+    fav = np.where(valid, fav, -np.inf)
+    best = np.maximum.accumulate(fav, axis=1)
+    best_before = np.concatenate([np.full((len(idx), 1), -np.inf), best[:, :-1]], axis=1)
+    signed_entry = np.where(is_buy, entry_price[:, None], -entry_price[:, None])
+    progress = best_before - signed_entry
+
+    # Stops expressed as "signed" prices so one max() works for both directions
+    stop = np.broadcast_to(np.where(is_buy, sl[:, None], -sl[:, None]), idx.shape).copy()
+    if breakeven_trigger is not None:
+        stop = np.where(progress >= breakeven_trigger, np.maximum(stop, signed_entry), stop)
+    if trail_trigger is not None and trail_distance is not None:
+        stop = np.where(progress >= trail_trigger, np.maximum(stop, best_before - trail_distance), stop)
+    stop = np.maximum.accumulate(stop, axis=1)
+    stop_price = np.where(is_buy, stop, -stop)
+
+    sl_hit = valid & np.where(is_buy, bar_low <= stop_price, bar_high >= stop_price)
+    tp_hit = valid & np.where(is_buy, bar_high >= tp[:, None], bar_low <= tp[:, None])
+
+    if policy == "tp_first":
+        sl_hit &= ~tp_hit
+    elif policy == "sl_first":
+        tp_hit &= ~sl_hit
+    else:
+        bar_open = opens[idx] + np.where(is_buy, 0.0, half)
+        both = sl_hit & tp_hit
+        tp_nearer = np.abs(bar_open - tp[:, None]) < np.abs(bar_open - stop_price)
+        sl_hit &= ~(both & tp_nearer)
+        tp_hit &= ~(both & ~tp_nearer)
+
+    never = horizon + 1
+    first_sl = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), never)
+    first_tp = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), never)
+    first = np.minimum(first_sl, first_tp)
+    rows = np.arange(len(idx))
+
+    last_valid = valid.sum(axis=1) - 1
+    timed_out = (first == never) & (max_bars is not None) & (last_valid == horizon - 1)
+    ended = (first == never) & ~timed_out
+    col = np.where(first == never, np.maximum(last_valid, 0), first)
+
+    exit_index = idx[rows, col]
+    reason = np.where(first_sl <= first_tp, EXIT_SL, EXIT_TP)
+    reason = np.where(timed_out, EXIT_TIME, np.where(ended, EXIT_OPEN, reason))
+
+    level = np.where(reason == EXIT_SL, stop_price[rows, col], tp)
+    if opens is not None:
+        # A bar that opens beyond the level fills at the open, not at the level
+        bar_open = opens[exit_index] + np.where(direction > 0, 0.0, spread)
+        gap_sl = np.where(direction > 0, bar_open < level, bar_open > level)
+        gap_tp = np.where(direction > 0, bar_open > level, bar_open < level)
+        level = np.where(((reason == EXIT_SL) & gap_sl) | ((reason == EXIT_TP) & gap_tp), bar_open, level)
+    # Levels are in trigger prices; convert back to bid for sells
+    exit_bid = np.where(direction > 0, level, level - spread)
+    exit_bid = np.where((reason == EXIT_TIME) | (reason == EXIT_OPEN), close[exit_index], exit_bid)
+
+    out["exit_index"][sel] = exit_index
+    out["exit_price"][sel] = exit_bid
+    out["exit_reason"][sel] = reason
+
+
+def market_fill(signal: dict, close: float, spread: float = 0.0):
+    """
+    Price a market order on the signal fills at when placed at a bar's (bid)
+    close: the ask on buys. None when the signal's SL or TP is already on the
+    wrong side of that price, since the broker would reject the stops.
+    """
+    if signal["tp"] > signal["entry"]:
+        fill = close + spread
+        return fill if signal["sl"] < fill < signal["tp"] else None
+    return close if signal["tp"] < close < signal["sl"] else None
+
+
+def max_bars_for_duration(minutes: int, timeframe_minutes: int) -> int:
+    """
+    Bars a trade may stay open under max_trade_duration_minutes.
+    """
+    return max(1, int(np.ceil(minutes / timeframe_minutes)))
@@ -0,0 +1,221 @@
+# utils/fvg_index.py
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import numpy as np
+
+GAP_TYPES = ("bullish", "bearish")
+STATES = ("unmitigated", "unfilled")
+
+
+class _SortedGaps:
+    """
+    Gaps ordered by one price edge, for bisect range queries and range removal.
+    """
+
+    def __init__(self, edge: str):
+        self.edge = edge
+        self.keys = []
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, gap: dict):
+        key = gap[self.edge]
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.items.insert(i, gap)
+
+    def remove(self, gap: dict) -> bool:
+        key = gap[self.edge]
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.items[i] is gap:
+                del self.keys[i]
+                del self.items[i]
+                return True
+            i += 1
+        return False
+
+    def range(self, lo: float, hi: float) -> list:
+        return self.items[bisect_left(self.keys, lo):bisect_right(self.keys, hi)]
+
+    def pop_at_or_above(self, value: float) -> list:
+        i = bisect_left(self.keys, value)
+        popped = self.items[i:]
+        del self.keys[i:]
+        del self.items[i:]
+        return popped
+
+    def pop_at_or_below(self, value: float) -> list:
+        i = bisect_right(self.keys, value)
+        popped = self.items[:i]
+        del self.keys[:i]
+        del self.items[:i]
+        return popped
+
+
+class FVGIndex:
+    """
+    Incrementally maintained fair value gaps for one symbol/timeframe.
+
+    Gap detection matches core/signal_parser (3-bar gap, `price` is the edge
+    nearest to current price). Each gap tracks when it was first traded into
+    (mitigated) and fully closed (filled):
+      bullish [high[i-2], low[i]]:  mitigated when low <= top,     filled when low <= bottom
+      bearish [high[i], low[i-2]]:  mitigated when high >= bottom, filled when high >= top
+
+    Live gaps sit in lists sorted by the edge that retires them, so applying a
+    bar removes the affected gaps with one bisect and a price-range query is
+    O(log n + k). Gaps older than `retention` bars are dropped.
+    """
+
+    def __init__(self, retention: int = 500):
+        self.retention = retention
+        self.seq = 0
+        self.last_time = None
+        self.recent = deque(maxlen=2)
+        self.created = deque()
+        self.retired_last_bar = {(t, s): [] for t in GAP_TYPES for s in STATES}
+        self.live = {
+            ("bullish", "unmitigated"): _SortedGaps("top"),
+            ("bullish", "unfilled"): _SortedGaps("bottom"),
+            ("bearish", "unmitigated"): _SortedGaps("bottom"),
+            ("bearish", "unfilled"): _SortedGaps("top"),
+        }
+        # Unmitigated lists are already ordered by price; unfilled ones need a price view too
+        self.by_price = {
+            ("bullish", "unmitigated"): self.live[("bullish", "unmitigated")],
+            ("bearish", "unmitigated"): self.live[("bearish", "unmitigated")],
+            ("bullish", "unfilled"): _SortedGaps("price"),
+            ("bearish", "unfilled"): _SortedGaps("price"),
+        }
+
+    def __len__(self):
+        return len(self.created)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def update(self, df, until: int = None) -> int:
+        """
+        Applies bars from a DataFrame (time index, high/low columns) that are
+        newer than the last processed bar. `until` (epoch seconds, bar open
+        time) holds back bars that have not closed yet: a forming bar's
+        partial high/low would otherwise be applied once and never corrected.
+        Returns the number of bars applied.
+        """
+        times = df.index.values
+        start = 0 if self.last_time is None else int(np.searchsorted(times, self.last_time, side="right"))
+        end = len(times) if until is None else int(np.searchsorted(times, np.datetime64(int(until), "s"), side="right"))
+        if start >= end:
+            return 0
+
+        highs = df["high"].to_numpy()
+        lows = df["low"].to_numpy()
+        for i in range(start, end):
+            self.apply_bar(times[i], float(highs[i]), float(lows[i]))
+        return end - start
+
+    def apply_bar(self, time, high: float, low: float):
+        self.seq += 1
+        self.last_time = time
+        for key in self.retired_last_bar:
+            self.retired_last_bar[key] = []
+
+        # Retire gaps this bar trades into, before it can form a gap of its own
+        self._retire(("bullish", "unmitigated"), self.live[("bullish", "unmitigated")].pop_at_or_above(low), "mitigated_at")
+        self._retire(("bullish", "unfilled"), self.live[("bullish", "unfilled")].pop_at_or_above(low), "filled_at")
+        self._retire(("bearish", "unmitigated"), self.live[("bearish", "unmitigated")].pop_at_or_below(high), "mitigated_at")
+        self._retire(("bearish", "unfilled"), self.live[("bearish", "unfilled")].pop_at_or_below(high), "filled_at")
+
+        if len(self.recent) == 2:
+            high_2, low_2 = self.recent[0]
+            if low > high_2:
+                self._add({"type": "bullish", "price": low, "bottom": high_2, "top": low})
+            elif high < low_2:
+                self._add({"type": "bearish", "price": high, "bottom": high, "top": low_2})
+        self.recent.append((high, low))
+
+        while self.created and self.created[0]["seq"] <= self.seq - self.retention:
+            gap = self.created.popleft()
+            for state in STATES:
+                self.live[(gap["type"], state)].remove(gap)
+            self.by_price[(gap["type"], "unfilled")].remove(gap)
+
+    def _add(self, gap: dict):
+        gap.update({"created": self.last_time, "seq": self.seq, "mitigated_at": None, "filled_at": None})
+        self.created.append(gap)
+        for state in STATES:
+            self.live[(gap["type"], state)].add(gap)
+        self.by_price[(gap["type"], "unfilled")].add(gap)
+
+    def _retire(self, key, gaps: list, field: str):
+        price_view = self.by_price[key]
+        for gap in gaps:
+            gap[field] = self.last_time
+            if price_view is not self.live[key]:
+                price_view.remove(gap)
+        self.retired_last_bar[key] = gaps
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def query(self, gap_type: str, lo: float = -np.inf, hi: float = np.inf,
+              state: str = "unmitigated", include_last_bar: bool = False) -> list:
+        """
+        Gaps of `gap_type` still in `state` whose `price` lies in [lo, hi],
+        oldest first. include_last_bar also returns gaps the latest bar retired,
+        i.e. the state as of the previous bar's close.
+        """
+        found = self.by_price[(gap_type, state)].range(lo, hi)
+        if include_last_bar:
+            found = found + [g for g in self.retired_last_bar[(gap_type, state)] if lo <= g["price"] <= hi]
+        return sorted(found, key=lambda g: g["seq"])
+
+    def gaps(self, state: str = None) -> list:
+        """
+        All retained gaps (or only those still in `state`) in creation order,
+        shaped like chart_data["fair_value_gaps"].
+        """
+        if state is None:
+            return list(self.created)
+        return [g for g in self.created if g[state.replace("un", "", 1) + "_at"] is None]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def export(self) -> dict:
+        def ts(value):
+            return None if value is None else int(np.datetime64(value, "s").astype(np.int64))
+
+        return {
+            "retention": self.retention,
+            "seq": self.seq,
+            "last_time": ts(self.last_time),
+            "recent": list(self.recent),
+            "gaps": [{**g, "created": ts(g["created"]), "mitigated_at": ts(g["mitigated_at"]),
+                      "filled_at": ts(g["filled_at"])} for g in self.created],
+        }
+
+    @classmethod
+    def restore(cls, exported: dict) -> "FVGIndex":
+        def dt(value):
+            return None if value is None else np.datetime64(value, "s").astype("datetime64[ns]")
+
+        index = cls(exported.get("retention", 500))
+        index.seq = exported["seq"]
+        index.last_time = dt(exported["last_time"])
+        index.recent.extend(tuple(bar) for bar in exported["recent"])
+        for raw in exported["gaps"]:
+            gap = {**raw, "created": dt(raw["created"]), "mitigated_at": dt(raw["mitigated_at"]),
+                   "filled_at": dt(raw["filled_at"])}
+            index.created.append(gap)
+            if gap["mitigated_at"] is None:
+                index.live[(gap["type"], "unmitigated")].add(gap)
+            if gap["filled_at"] is None:
+                index.live[(gap["type"], "unfilled")].add(gap)
+                index.by_price[(gap["type"], "unfilled")].add(gap)
+        return index
@@ -17,6 +17,14 @@ def pip_size(symbol: str) -> float:
         return 0.0001
 
 
+def timeframe_minutes(timeframe: str) -> int:
+    """
+    Minutes per bar for MT5 style timeframe names (M1, M5, H1, D1...).
+    """
+    unit, count = timeframe[0].upper(), int(timeframe[1:])
+    return count * {"M": 1, "H": 60, "D": 1440}[unit]
+
+
 def generate_trade_id() -> str:
     """
     Generates a unique ID for every trade.
@@ -0,0 +1,349 @@
+# utils/indicators.py
+
+from collections import deque
+
+import numpy as np
+
+
+# ----------------------------------------------------------------------
+# Single-series indicators, O(1) per bar
+# ----------------------------------------------------------------------
+class _Streaming:
+    """
+    State is plain attributes listed in STATE (deques are stored as lists),
+    so every indicator exports to JSON for the state store.
+    """
+
+    STATE = ()
+
+    def export(self) -> dict:
+        return {name: list(value) if isinstance(value, deque) else value
+                for name, value in ((name, getattr(self, name)) for name in self.STATE)}
+
+    @classmethod
+    def restore(cls, exported: dict):
+        indicator = cls.__new__(cls)
+        for name in cls.STATE:
+            value = exported[name]
+            current = getattr(cls, "_deque_fields", {}).get(name)
+            setattr(indicator, name, deque(value, maxlen=exported[current]) if current else value)
+        return indicator
+
+
+class _EWM(_Streaming):
+    """
+    pandas ewm(alpha, adjust=False).mean(), including its weight
+    normalisation, so results match the batch computation to the last bits.
+    """
+
+    STATE = ("alpha", "min_periods", "count", "mean")
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.count = 0
+        self.mean = None
+
+    def update(self, value: float) -> float:
+        if self.mean is None:
+            self.mean = value
+        else:
+            old = 1.0 - self.alpha
+            self.mean = (old * self.mean + self.alpha * value) / (old + self.alpha)
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.mean if self.count >= self.min_periods else None
+
+
+class EMA(_EWM):
+    """
+    Exponential moving average; ta.trend.EMAIndicator(close, period).
+    """
+
+    def __init__(self, period: int = 20):
+        super().__init__(2.0 / (period + 1), period)
+
+
+class RSI(_Streaming):
+    """
+    Wilder RSI; ta.momentum.RSIIndicator(close, period).
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.up = _EWM(1.0 / period, period)
+        self.down = _EWM(1.0 / period, period)
+
+    def update(self, close: float) -> float:
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.up.update(diff if diff > 0 else 0.0)
+        self.down.update(-diff if diff < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        up, down = self.up.value, self.down.value
+        if up is None:
+            return None
+        return 100.0 if down == 0 else 100.0 - 100.0 / (1.0 + up / down)
+
+    def export(self) -> dict:
+        return {"period": self.period, "prev_close": self.prev_close,
+                "up": self.up.export(), "down": self.down.export()}
+
+    @classmethod
+    def restore(cls, exported: dict) -> "RSI":
+        rsi = cls(exported["period"])
+        rsi.prev_close = exported["prev_close"]
+        rsi.up = _EWM.restore(exported["up"])
+        rsi.down = _EWM.restore(exported["down"])
+        return rsi
+
+
+class ATR(_Streaming):
+    """
+    Wilder ATR; ta.volatility.AverageTrueRange(high, low, close, period):
+    the first value is the mean true range of the first `period` bars (the
+    first bar's true range being high - low), then smoothed.
+    """
+
+    STATE = ("period", "prev_close", "count", "seed", "atr")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.seed = 0.0
+        self.atr = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+        if self.count < self.period:
+            self.seed += tr
+        elif self.count == self.period:
+            self.atr = (self.seed + tr) / self.period
+        else:
+            self.atr = (self.atr * (self.period - 1) + tr) / float(self.period)
+        return self.atr
+
+    @property
+    def value(self) -> float:
+        return self.atr
+
+
+class _RollingSums(_Streaming):
+    """
+    Running sums over the last `window` values. Sums are rebuilt from the
+    window every `window` updates, so rounding drift stays bounded at O(1)
+    amortised cost.
+    """
+
+    def _push(self, values: tuple):
+        if len(self.values) == self.window:
+            dropped = self.values[0]
+            self.sums = [total - old for total, old in zip(self.sums, dropped)]
+        self.values.append(values)
+        self.sums = [total + new for total, new in zip(self.sums, values)]
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.sums = [float(np.sum(column)) for column in zip(*self.values)]
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+
+class RollingStats(_Streaming):
+    """
+    Rolling mean and population std (ddof=0) of the last `window` values,
+    as pandas rolling(window).mean() / .std(ddof=0) and ta's BollingerBands.
+    Welford's update with the dropped value removed keeps the variance
+    stable for large, slowly varying series; both are recomputed from the
+    window every `window` updates.
+    """
+
+    STATE = ("window", "values", "mean_", "m2", "updates")
+    _deque_fields = {"values": "window"}
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.mean_ = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def update(self, value: float) -> tuple:
+        if len(self.values) == self.window:
+            dropped = self.values[0]
+            self.values.append(value)
+            mean = self.mean_ + (value - dropped) / self.window
+            self.m2 += (value - dropped) * (value - mean + dropped - self.mean_)
+            self.mean_ = mean
+        else:
+            self.values.append(value)
+            delta = value - self.mean_
+            self.mean_ += delta / len(self.values)
+            self.m2 += delta * (value - self.mean_)
+        self.updates += 1
+        if self.updates % self.window == 0:
+            window = np.fromiter(self.values, dtype=float)
+            self.mean_ = float(window.mean())
+            self.m2 = float(((window - self.mean_) ** 2).sum())
+        return self.value
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def mean(self) -> float:
+        return self.mean_ if self.full else None
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(max(self.m2, 0.0) / self.window)) if self.full else None
+
+    @property
+    def value(self) -> tuple:
+        return self.mean, self.std
+
+
+class RollingVWAP(_RollingSums):
+    """
+    Volume-weighted typical price over the last `window` bars;
+    ta.volume.VolumeWeightedAveragePrice(high, low, close, volume, window).
+    """
+
+    STATE = ("window", "values", "sums", "updates")
+    _deque_fields = {"values": "window"}
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.sums = [0.0, 0.0]
+        self.updates = 0
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        typical = (high + low + close) / 3.0
+        self._push((typical * volume, volume))
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if not self.full or self.sums[1] == 0:
+            return None
+        return self.sums[0] / self.sums[1]
+
+
+# ----------------------------------------------------------------------
+# Per symbol/timeframe bundle
+# ----------------------------------------------------------------------
+class IndicatorSet:
+    """
+    The streaming indicators for one symbol/timeframe, fed from bar
+    DataFrames (time index, like chart_data["ohlcv"]) the way FVGIndex is:
+    only bars newer than the last applied one are processed. `until` (epoch
+    seconds) holds back bars that have not closed yet, e.g. the forming bar
+    a live fetch ends with. A window that starts after the bar following the
+    last applied one (a checkpoint older than the fetch) would leave a hole,
+    so the set starts over from that window instead.
+
+    Besides Wilder's ATR, tr_mean is the simple mean true range over the
+    same period (pandas rolling(period).mean() of TR), as session strategies
+    filter ranges on it.
+    """
+
+    def __init__(self, ema_periods=(20, 50), rsi_period: int = 14, atr_period: int = 14,
+                 volume_window: int = 20, vwap_window: int = 14):
+        self.last_time = None
+        self.ema = {period: EMA(period) for period in ema_periods}
+        self.rsi = RSI(rsi_period)
+        self.atr = ATR(atr_period)
+        self.tr_mean = RollingStats(atr_period)
+        self.volume = RollingStats(volume_window)
+        self.vwap = RollingVWAP(vwap_window)
+
+    def reset(self):
+        self.__dict__.update(IndicatorSet(tuple(self.ema), self.rsi.period, self.atr.period,
+                                          self.volume.window, self.vwap.window).__dict__)
+
+    def update(self, df, until: int = None) -> int:
+        """
+        Applies new bars; returns how many were applied.
+        """
+        times = df.index.values.astype("datetime64[s]").astype(np.int64)
+        if self.last_time is not None and len(times) and times[0] > self.last_time:
+            step = int(times[1] - times[0]) if len(times) > 1 else 0
+            if times[0] > self.last_time + step:
+                self.reset()
+        start = 0 if self.last_time is None else int(np.searchsorted(times, self.last_time, side="right"))
+        end = len(times) if until is None else int(np.searchsorted(times, until, side="right"))
+        if start >= end:
+            return 0
+
+        columns = [df[name].to_numpy(dtype=float) for name in ("high", "low", "close", "tick_volume")]
+        for i in range(start, end):
+            self.apply_bar(int(times[i]), *(float(column[i]) for column in columns))
+        return end - start
+
+    def apply_bar(self, time: int, high: float, low: float, close: float, volume: float):
+        self.last_time = time
+        for ema in self.ema.values():
+            ema.update(close)
+        self.rsi.update(close)
+        prev_close = self.atr.prev_close
+        tr = high - low if prev_close is None else max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.tr_mean.update(tr)
+        self.atr.update(high, low, close)
+        self.volume.update(volume)
+        self.vwap.update(high, low, close, volume)
+
+    def values(self) -> dict:
+        """
+        Latest values, None until an indicator has enough bars.
+        """
+        mean, std = self.volume.value
+        return {
+            **{f"ema_{period}": ema.value for period, ema in self.ema.items()},
+            f"rsi_{self.rsi.period}": self.rsi.value,
+            f"atr_{self.atr.period}": self.atr.value,
+            f"tr_mean_{self.tr_mean.window}": self.tr_mean.mean,
+            "volume_mean": mean,
+            "volume_std": std,
+            "vwap": self.vwap.value,
+            "time": self.last_time,
+        }
+
+    def export(self) -> dict:
+        return {
+            "last_time": self.last_time,
+            "ema": {str(period): ema.export() for period, ema in self.ema.items()},
+            "rsi": self.rsi.export(),
+            "atr": self.atr.export(),
+            "tr_mean": self.tr_mean.export(),
+            "volume": self.volume.export(),
+            "vwap": self.vwap.export(),
+        }
+
+    @classmethod
+    def restore(cls, exported: dict) -> "IndicatorSet":
+        if "tr_mean" not in exported:
+            return cls()  # Checkpoint from before tr_mean; rebuilt from the next fetch
+        indicators = cls.__new__(cls)
+        indicators.last_time = exported["last_time"]
+        indicators.ema = {int(period): EMA.restore(state) for period, state in exported["ema"].items()}
+        indicators.rsi = RSI.restore(exported["rsi"])
+        indicators.atr = ATR.restore(exported["atr"])
+        indicators.tr_mean = RollingStats.restore(exported["tr_mean"])
+        indicators.volume = RollingStats.restore(exported["volume"])
+        indicators.vwap = RollingVWAP.restore(exported["vwap"])
+        return indicators
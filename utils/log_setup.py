@@ -0,0 +1,178 @@
+# utils/log_setup.py
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '[%(asctime)s] %(levelname)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, thread, message, the call
+    site, any `extra=` fields, and the traceback when there is one.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+            "where": f"{record.module}:{record.lineno}",
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text or record.exc_info:
+            entry["exception"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} [+{suppressed} similar suppressed]" if suppressed else text
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per message type limits, applied on the logging thread before a record is
+    queued. A message type is its call site, so f-string and %-style messages
+    are grouped alike. Each type passes at most max_per_window records per
+    window; the count of dropped ones rides on the next record that passes.
+    `sample_every` keeps one in N records for templates starting with a given
+    prefix. WARNING and above always pass.
+    """
+
+    def __init__(self, window_seconds: float = 60, max_per_window: int = 20, sample_every: dict = None):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.max_per_window = max_per_window
+        self.sample_every = sample_every or {}
+        self.windows = {}
+        self.sample_rates = {}
+        self.sample_counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        site = (record.pathname, record.lineno)
+        with self.lock:
+            every = self._sample_rate(site, record.msg)
+            if every > 1:
+                seen = self.sample_counts.get(site, 0)
+                self.sample_counts[site] = seen + 1
+                if seen % every:
+                    return False
+
+            if not self.max_per_window:
+                return True
+            now = time.monotonic()
+            window = self.windows.get(site)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window else 0
+                self.windows[site] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.max_per_window:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def _sample_rate(self, site, msg) -> int:
+        rate = self.sample_rates.get(site)
+        if rate is None:
+            template = msg if isinstance(msg, str) else ""
+            rate = next((n for prefix, n in self.sample_every.items() if template.startswith(prefix)), 1)
+            self.sample_rates[site] = rate
+        return rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queues the record itself; the message is merged with its args and
+    formatted on the listener thread. Only a traceback is rendered here,
+    while its frames are still current. Args must not be mutated after the
+    logging call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging(settings: dict = None, force: bool = False) -> QueueListener:
+    """
+    Routes the root logger through a queue to a background listener that
+    formats (text or JSON) and writes to stderr and optionally a file.
+    Like logging.basicConfig, does nothing if the root logger already has
+    handlers unless force is set.
+    """
+    global _listener
+    settings = settings or {}
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return _listener
+    stop_logging()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+    formatter = JsonFormatter() if settings.get("format") == "json" else TextFormatter(TEXT_FORMAT, DATE_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if settings.get("file"):
+        handlers.append(logging.FileHandler(settings["file"], encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    limits = settings.get("rate_limit", {})
+    if limits.get("enabled", True):
+        queue_handler.addFilter(RateLimitFilter(
+            window_seconds=limits.get("window_seconds", 60),
+            max_per_window=limits.get("max_per_window", 20),
+            sample_every=limits.get("sample_every", {})
+        ))
+    root.addHandler(queue_handler)
+    root.setLevel(settings.get("level", "INFO"))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Drains the queue and stops the listener thread; registered at exit.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
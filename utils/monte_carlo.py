@@ -0,0 +1,194 @@
+# utils/monte_carlo.py
+
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+METHODS = ("bootstrap", "resequence")
+
+
+def r_multiples(trades: list, field: str = "rrr") -> np.ndarray:
+    """
+    Per-trade results in R (PnL / initial risk) from PerformanceTracker.trades
+    or a backtest, in trade order. Only closed trades count: records still
+    waiting for an outcome carry the tracker's default rrr of 0 and are
+    skipped, as are trades without a numeric value.
+    """
+    values = [t.get(field) for t in trades if t.get("result")]
+    return np.array([v for v in values if isinstance(v, (int, float)) and np.isfinite(v)], dtype=np.float64)
+
+
+def _simulate_chunk(returns: np.ndarray, simulations: int, method: str, risk_fractions: np.ndarray,
+                    ruin_drawdown: float, seed) -> dict:
+    rng = np.random.default_rng(seed)
+    n = len(returns)
+    if method == "bootstrap":
+        samples = returns[rng.integers(0, n, size=(simulations, n))]
+    else:
+        samples = rng.permuted(np.tile(returns, (simulations, 1)), axis=1)
+
+    gross_win = np.where(samples > 0, samples, 0.0).sum(axis=1)
+    gross_loss = -np.where(samples < 0, samples, 0.0).sum(axis=1)
+    out = {
+        "win_rate": (samples > 0).mean(axis=1),
+        "profit_factor": np.divide(gross_win, gross_loss, out=np.full(simulations, np.inf), where=gross_loss > 0),
+        "total_r": samples.sum(axis=1),
+        "max_drawdown": np.empty((len(risk_fractions), simulations)),
+        "final_return": np.empty((len(risk_fractions), simulations)),
+        "ruined": np.empty((len(risk_fractions), simulations), dtype=bool),
+    }
+
+    for k, fraction in enumerate(risk_fractions):
+        # Fixed-fractional compounding: each trade risks `fraction` of current equity
+        equity = np.cumprod(np.maximum(1.0 + fraction * samples, 0.0), axis=1)
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+        drawdown = (1.0 - equity / peak).max(axis=1)
+        out["max_drawdown"][k] = drawdown
+        out["final_return"][k] = equity[:, -1] - 1.0
+        out["ruined"][k] = drawdown >= ruin_drawdown
+    return out
+
+
+def run_monte_carlo(returns, simulations: int = 20000, method: str = "bootstrap", risk_percents=(0.5, 1.0, 2.0),
+                    ruin_drawdown_percent: float = 50.0, confidence: float = 0.95, seed: int = 0,
+                    workers: int = None, chunk_size: int = 2000) -> dict:
+    """
+    Simulates `simulations` alternative trade sequences from R-multiples.
+
+    bootstrap   draws trades with replacement (varies the trade mix and order)
+    resequence  shuffles the actual trades (varies only the order, so win rate
+                and profit factor are fixed and the drawdown spread is the point)
+
+    Each chunk of simulations is one matrix of shape (chunk_size, trades).
+    Chunks get seeds spawned from `seed`, so results do not depend on `workers`;
+    workers > 1 spreads chunks over processes. Risk of ruin is the share of
+    paths whose drawdown reaches ruin_drawdown_percent at each risk percent.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown Monte Carlo method '{method}'")
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        raise ValueError("Need at least 2 trades for a Monte Carlo run")
+
+    risk_percents = tuple(float(p) for p in risk_percents)
+    risk_fractions = np.array(risk_percents) / 100.0
+    sizes = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(returns, size, method, risk_fractions, ruin_drawdown_percent / 100.0, s) for size, s in zip(sizes, seeds)]
+
+    workers = workers if workers is not None else 1
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes), os.cpu_count() or 1)) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+
+    merged = {key: np.concatenate([c[key] for c in chunks], axis=-1) for key in chunks[0]}
+    return _report(returns, merged, method, risk_percents, ruin_drawdown_percent, confidence)
+
+
+def _interval(values: np.ndarray, confidence: float) -> tuple:
+    tail = (1.0 - confidence) / 2.0 * 100.0
+    lo, hi = np.percentile(values, [tail, 100.0 - tail])
+    return float(lo), float(hi)
+
+
+def _report(returns, sims: dict, method, risk_percents, ruin_drawdown_percent, confidence) -> dict:
+    wins = returns[returns > 0].sum()
+    losses = -returns[returns < 0].sum()
+    report = {
+        "method": method,
+        "trades": len(returns),
+        "simulations": sims["win_rate"].shape[-1],
+        "confidence": confidence,
+        "ruin_drawdown_percent": ruin_drawdown_percent,
+        "observed": {
+            "win_rate": float((returns > 0).mean()),
+            "profit_factor": float(wins / losses) if losses > 0 else float("inf"),
+            "total_r": float(returns.sum()),
+        },
+        "win_rate_ci": _interval(sims["win_rate"], confidence),
+        "profit_factor_ci": _interval(sims["profit_factor"], confidence),
+        "total_r_ci": _interval(sims["total_r"], confidence),
+        "prob_losing": float((sims["total_r"] <= 0).mean()),
+        "risk": {},
+    }
+    for k, percent in enumerate(risk_percents):
+        drawdown = sims["max_drawdown"][k] * 100.0
+        final = sims["final_return"][k] * 100.0
+        report["risk"][percent] = {
+            "max_drawdown_median": float(np.median(drawdown)),
+            "max_drawdown_p95": float(np.percentile(drawdown, 95)),
+            "max_drawdown_p99": float(np.percentile(drawdown, 99)),
+            "return_median": float(np.median(final)),
+            "return_ci": _interval(final, confidence),
+            "risk_of_ruin": float(sims["ruined"][k].mean()),
+        }
+    return report
+
+
+def analyze_by_strategy(trades: list, min_trades: int = 20, field: str = "rrr", **kwargs) -> dict:
+    """
+    Runs run_monte_carlo per strategy on PerformanceTracker.trades-shaped records.
+    Strategies with fewer than min_trades results are skipped.
+    """
+    grouped = defaultdict(list)
+    for t in trades:
+        grouped[t.get("strategy")].append(t)
+
+    reports = {}
+    for strategy, strategy_trades in grouped.items():
+        returns = r_multiples(strategy_trades, field)
+        if len(returns) >= max(min_trades, 2):
+            reports[strategy] = run_monte_carlo(returns, **kwargs)
+    return reports
+
+
+def format_report(report: dict, title: str = None) -> str:
+    pct = int(report["confidence"] * 100)
+    wr_lo, wr_hi = report["win_rate_ci"]
+    pf_lo, pf_hi = report["profit_factor_ci"]
+    lines = [
+        f"🎲 **Monte Carlo{f' - {title}' if title else ''}** ({report['simulations']} {report['method']} runs, {report['trades']} trades)",
+        f"• Win Rate: {report['observed']['win_rate'] * 100:.2f}% ({pct}% CI {wr_lo * 100:.2f}% - {wr_hi * 100:.2f}%)",
+        f"• Profit Factor: {report['observed']['profit_factor']:.2f} ({pct}% CI {pf_lo:.2f} - {pf_hi:.2f})",
+        f"• Total R: {report['observed']['total_r']:.2f} (P(loss) {report['prob_losing'] * 100:.1f}%)",
+        "",
+        f"⚠️ Drawdown / ruin (ruin = {report['ruin_drawdown_percent']:.0f}% drawdown):",
+    ]
+    for percent, stats in report["risk"].items():
+        lines.append(
+            f"   - {percent:g}% risk: DD median {stats['max_drawdown_median']:.1f}% | "
+            f"p95 {stats['max_drawdown_p95']:.1f}% | p99 {stats['max_drawdown_p99']:.1f}% | "
+            f"return median {stats['return_median']:.1f}% | ruin {stats['risk_of_ruin'] * 100:.2f}%"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m utils.monte_carlo trades.csv  (PerformanceTracker.export_trades_to_csv output)
+    import csv
+    import sys
+    from core.config_loader import get_monte_carlo_settings, get_risk_settings
+
+    settings = get_monte_carlo_settings()
+    risk_percents = sorted(set(settings.get("risk_percents", [1.0]) + [get_risk_settings().get("default_risk_percent", 1.0)]))
+    with open(sys.argv[1] if len(sys.argv) > 1 else "trades.csv", newline="") as f:
+        rows = [{**row, "rrr": float(row["rrr"]) if row.get("result") and row.get("rrr") else None}
+                for row in csv.DictReader(f)]
+
+    reports = analyze_by_strategy(
+        rows,
+        min_trades=settings.get("min_trades", 20),
+        simulations=settings.get("simulations", 20000),
+        method=settings.get("method", "bootstrap"),
+        risk_percents=risk_percents,
+        ruin_drawdown_percent=settings.get("ruin_drawdown_percent", 50.0),
+        confidence=settings.get("confidence", 0.95),
+        workers=settings.get("workers", 1),
+    )
+    for strategy, report in reports.items():
+        print(format_report(report, strategy))
+        print()
@@ -1,10 +1,12 @@
 import logging
-from datetime import datetime
 from collections import defaultdict
+from utils import clock
 
 class PerformanceTracker:
     def __init__(self):
         self.trades = []
+        self.by_ticket = {}
+        self.indexed = 0
 
     def record_trade(self, trade: dict, result: dict):
         """
@@ -20,14 +22,55 @@ class PerformanceTracker:
             "volume_spike": trade.get("volume_spike"),
             "trend": trade.get("trend"),
             "ticket": result.get("ticket"),
+            "volume": result.get("volume"),
             "price": result.get("price"),
-            "time": result.get("time", str(datetime.now())),
+            "filled_price": result.get("filled_price"),
+            "sl_final": result.get("sl_final"),
+            "time": result.get("time", str(clock.now())),
             "result": result.get("result"),
             "rrr": result.get("rrr", 0),
             "pnl": result.get("pnl", 0),
+            "exit_price": result.get("exit_price"),
+            "exit_time": result.get("exit_time"),
+            "exit_reason": result.get("exit_reason"),
         }
         self.trades.append(record)
-        logging.info(f"📊 Trade recorded: {record}")
+        logging.info("📊 Trade recorded: %s", record)
+
+    def _index(self):
+        # Trades are only ever appended (recorded, restored or replayed), so index the new tail
+        for record in self.trades[self.indexed:]:
+            if record.get("ticket") is not None:
+                self.by_ticket[record["ticket"]] = record
+        self.indexed = len(self.trades)
+
+    def volume_of(self, ticket):
+        self._index()
+        record = self.by_ticket.get(ticket)
+        return record.get("volume") if record else None
+
+    def apply_outcomes(self, outcomes: list) -> int:
+        """
+        Fills result/pnl/exit fields of recorded trades from closed-position
+        outcomes keyed by ticket; rrr is the realised R multiple from the
+        full-precision fill and the stop sent with the order, falling back
+        to the rounded price and strategy SL for older records. Idempotent.
+        Returns the number matched.
+        """
+        self._index()
+        matched = 0
+        for outcome in outcomes:
+            record = self.by_ticket.get(outcome["ticket"])
+            if record is None:
+                continue
+            record.update({key: value for key, value in outcome.items() if key != "ticket"})
+            fill = record.get("filled_price") or record.get("price") or record.get("entry")
+            sl, tp = record.get("sl_final") or record.get("sl"), record.get("tp")
+            if fill and sl and tp and fill != sl:
+                direction = 1 if tp > record.get("entry", fill) else -1
+                record["rrr"] = round(direction * (outcome["exit_price"] - fill) / abs(fill - sl), 2)
+            matched += 1
+        return matched
 
     def get_summary(self):
         """
@@ -79,7 +122,7 @@ class PerformanceTracker:
             return "📉 No trades to summarize."
 
         if not date_str:
-            date_str = datetime.now().strftime("%Y-%m-%d")
+            date_str = clock.now().strftime("%Y-%m-%d")
 
         day_trades = [t for t in self.trades if t["time"].startswith(date_str)]
         if not day_trades:
@@ -0,0 +1,370 @@
+# utils/portfolio_backtester.py
+
+import importlib
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.confidence_filter import filter_trade_by_confidence
+from core.config_loader import (
+    get_cooldown_minutes, get_max_trade_duration, get_risk_settings, get_trade_management_settings
+)
+from core.fetch_plan import build_fetch_plan, iter_fetches
+from utils.chart_state import build_chart_state
+from utils.clock import VirtualClock, set_clock
+from utils.exit_simulator import simulate_exits, max_bars_for_duration, market_fill, EXIT_REASONS
+from utils.fvg_index import FVGIndex
+from utils.helpers import pip_size, timeframe_minutes
+from utils.performance_tracker import PerformanceTracker
+from utils.portfolio_risk import PortfolioRisk
+from utils.risk_engine import evaluate_trade_risk
+
+# Contract assumptions when no broker specs are given (USD account, XXXUSD-style quoting)
+DEFAULT_SPEC = {"contract_size": 100000, "leverage": 100, "volume_min": 0.01, "volume_step": 0.01, "volume_max": 100.0}
+DEFAULT_CONTRACT_SIZES = {"XAUUSD": 100}
+
+
+def _as_time_indexed(df: pd.DataFrame) -> pd.DataFrame:
+    if "timestamp" in df.columns:
+        df = df.set_index(pd.DatetimeIndex(df["timestamp"]))
+        df.index.name = "time"
+    return df
+
+
+def _scan_symbol(symbol: str, frames: dict, specs: dict, timezone: str, engine_minutes: int,
+                 spread_pips: float, same_bar_policy: str, manage_stops: bool) -> list:
+    """
+    Worker: replays every planned fetch of one symbol the way the engine cycle
+    does (one chart_data per symbol/timeframe, then each mapped strategy) and
+    resolves the exit of every signal that passes validation and the
+    confidence filter. Cooldowns and sizing depend on shared capital, so they
+    are left to the merge step.
+    """
+    pip = pip_size(symbol)
+    management = get_trade_management_settings() if manage_stops else {}
+    candidates = []
+    bar_clock = VirtualClock()
+    previous_clock = set_clock(bar_clock)
+    try:
+        for timeframe, spec in specs.items():
+            candidates.extend(_scan_timeframe(symbol, timeframe, spec, frames[timeframe], bar_clock, timezone,
+                                              engine_minutes, pip, spread_pips, same_bar_policy, management))
+    finally:
+        set_clock(previous_clock)
+    return candidates
+
+
+def _scan_timeframe(symbol: str, timeframe: str, spec: dict, df: pd.DataFrame, bar_clock: VirtualClock,
+                    timezone: str, engine_minutes: int, pip: float, spread_pips: float, same_bar_policy: str,
+                    management: dict) -> list:
+    df = _as_time_indexed(df)
+    strategies = [(name, importlib.import_module(f"strategies.{name}")) for name in spec["strategies"]]
+    fvg_index = FVGIndex(spec["bars"]) if spec["fair_value_gaps"] else None
+    times = df.index
+    minute_of_day = times.hour * 60 + times.minute
+    bar_seconds = timeframe_minutes(timeframe) * 60
+    found = []
+
+    for i in range(50, len(df)):  # Start after warm-up
+        if engine_minutes and minute_of_day[i] % engine_minutes:
+            continue  # No engine cycle on this bar; the FVG index catches up from the next window
+
+        window = df.iloc[max(0, i + 1 - spec["bars"]):i + 1]
+        chart_data = build_chart_state(window, symbol, spec, fvg_index, timezone)
+        chart_data["timeframe"] = timeframe
+        bar_clock.set(times[i].timestamp() + bar_seconds)
+
+        for order, (name, strategy) in enumerate(strategies):
+            try:
+                trade = strategy.check_trade_opportunity(chart_data)
+            except Exception:
+                continue
+            if not trade or not all(k in trade for k in ("entry", "sl", "tp")):
+                continue
+
+            trade.setdefault("symbol", symbol)
+            trade["strategy"] = trade.get("strategy", name)
+            trade.setdefault("confidence", 0)
+            filter_result = filter_trade_by_confidence(trade, verbose=False)
+            if not filter_result["passed"]:
+                continue
+            trade["confidence"] = filter_result["score"]
+            found.append((i, order, name, trade))
+
+    # Market fills at the bar close (plus spread on buys), as execute_trade;
+    # stops already on the wrong side of the fill would be rejected
+    close = df["close"].to_numpy()
+    spread = spread_pips * pip
+    found = [(i, order, name, trade) for i, order, name, trade in found
+             if market_fill(trade, close[i], spread) is not None]
+    if not found:
+        return []
+
+    entry = close[[i for i, *_ in found]]
+    sl = np.array([t["sl"] for *_, t in found], dtype=float)
+    tp = np.array([t["tp"] for *_, t in found], dtype=float)
+    direction = np.array([1.0 if t["tp"] > t["entry"] else -1.0 for *_, t in found])
+    exits = simulate_exits(
+        df["high"].to_numpy(), df["low"].to_numpy(), close,
+        np.array([i for i, *_ in found]), entry, sl, tp, direction,
+        open_=df["open"].to_numpy(),
+        max_bars=max_bars_for_duration(get_max_trade_duration(), timeframe_minutes(timeframe)),
+        same_bar_policy=same_bar_policy,
+        spread=spread,
+        trail_trigger=management["trail_trigger_pips"] * pip if "trail_trigger_pips" in management else None,
+        trail_distance=management["trail_distance_pips"] * pip if "trail_distance_pips" in management else None,
+        breakeven_trigger=management["breakeven_trigger_pips"] * pip if "breakeven_trigger_pips" in management else None,
+    )
+
+    candidates = []
+    for k, (i, order, name, trade) in enumerate(found):
+        candidates.append({
+            "time": times[i],
+            "order": order,
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "strategy": name,
+            "trade": trade,
+            "entry_fill": float(exits["entry_fill"][k]),
+            "exit_time": times[exits["exit_index"][k]],
+            "exit_price": float(exits["exit_price"][k]),
+            "exit_reason": EXIT_REASONS[int(exits["exit_reason"][k])],
+            "pnl_per_unit": float(exits["pnl"][k]),
+        })
+    return candidates
+
+
+class PortfolioBacktester:
+    """
+    Replays symbol_strategy_map over history with shared capital.
+
+    Mirrors run_dcrai_strategy_engine / run_trade_manager: the engine cycle
+    (every engine_minutes on bar boundaries), per-strategy cooldowns started by
+    executed trades, the confidence filter, risk-percent sizing via the risk
+    engine, PortfolioRisk limits with a margin-level check, trailing/breakeven
+    stops and max-duration closes.
+
+    Signals are generated per symbol in worker processes; candidates are then
+    merged in (time, symbol map order, strategy order), which is the order the
+    live cycle visits them, so results do not depend on worker scheduling.
+    Money values use `specs` ({symbol: {"contract_size", "leverage", ...}}),
+    defaulting to DEFAULT_SPEC with USD-quoted pip values.
+    """
+
+    def __init__(self, frames: dict, strategy_map: dict, strategy_lookup: dict, initial_balance: float = 10000.0,
+                 specs: dict = None, engine_minutes: int = 15, spread_pips: float = 0.0,
+                 same_bar_policy: str = "sl_first", manage_stops: bool = True, timezone: str = "UTC"):
+        self.frames = frames
+        self.plan = build_fetch_plan(strategy_map, strategy_lookup)
+        self.initial_balance = initial_balance
+        self.specs = specs or {}
+        self.engine_minutes = engine_minutes
+        self.spread_pips = spread_pips
+        self.same_bar_policy = same_bar_policy
+        self.manage_stops = manage_stops
+        self.timezone = timezone
+        self.settings = get_risk_settings()
+        self.tracker = PerformanceTracker()
+        self.rejections = Counter()
+        self.equity_curve = []
+
+    @classmethod
+    def from_store(cls, store, strategy_map: dict, strategy_lookup: dict, start=None, end=None, **kwargs):
+        """
+        Loads every planned symbol/timeframe from a BarStore.
+        """
+        plan = build_fetch_plan(strategy_map, strategy_lookup)
+        frames = {}
+        for symbol, timeframe, _ in iter_fetches(plan):
+            df = store.frame(symbol, timeframe, start=start, end=end)
+            if not df.empty:
+                frames.setdefault(symbol, {})[timeframe] = df
+        return cls(frames, strategy_map, strategy_lookup, **kwargs)
+
+    def _spec(self, symbol: str) -> dict:
+        spec = {**DEFAULT_SPEC, "contract_size": DEFAULT_CONTRACT_SIZES.get(symbol, DEFAULT_SPEC["contract_size"])}
+        return {**spec, **self.specs.get(symbol, {})}
+
+    def collect_candidates(self, workers: int = None) -> list:
+        jobs = [
+            (symbol, self.frames[symbol], {tf: spec for tf, spec in timeframes.items() if tf in self.frames[symbol]},
+             self.timezone, self.engine_minutes, self.spread_pips, self.same_bar_policy, self.manage_stops)
+            for symbol, timeframes in self.plan.items() if symbol in self.frames
+        ]
+        workers = workers if workers is not None else min(len(jobs), os.cpu_count() or 1)
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                per_symbol = list(pool.map(_scan_symbol, *zip(*jobs)))
+        else:
+            per_symbol = [_scan_symbol(*job) for job in jobs]
+
+        symbol_order = {symbol: n for n, symbol in enumerate(self.plan)}
+        candidates = [c for symbol_candidates in per_symbol for c in symbol_candidates]
+        candidates.sort(key=lambda c: (c["time"], symbol_order[c["symbol"]],
+                                       list(self.plan[c["symbol"]]).index(c["timeframe"]), c["order"]))
+        return candidates
+
+    def _closes(self) -> pd.DataFrame:
+        closes = {}
+        for symbol, timeframes in self.plan.items():
+            for timeframe in timeframes:
+                if timeframe in self.frames.get(symbol, {}):
+                    closes[symbol] = _as_time_indexed(self.frames[symbol][timeframe])["close"]
+                    break
+        return pd.DataFrame(closes).sort_index().ffill()
+
+    def run(self, workers: int = None) -> PerformanceTracker:
+        candidates = self.collect_candidates(workers)
+        closes = self._closes()
+        close_times = closes.index.values
+        portfolio = PortfolioRisk(
+            max_total_risk_percent=self.settings.get("max_total_risk_percent", 5.0),
+            max_correlated_risk_percent=self.settings.get("max_correlated_risk_percent", 3.0),
+            max_currency_exposure_percent=self.settings.get("max_currency_exposure_percent", 300.0),
+            min_margin_level_percent=self.settings.get("min_margin_level_percent", 200.0)
+        )
+        lookback = self.settings.get("correlation_lookback_bars", 200)
+        refresh = timedelta(minutes=self.settings.get("correlation_refresh_minutes", 60))
+        last_refresh = None
+
+        balance = self.initial_balance
+        open_positions = []
+        cooldowns = {}
+        self.equity_curve = [(candidates[0]["time"] if candidates else None, balance, balance, 0.0)]
+
+        def mark(position, now) -> float:
+            row = min(int(np.searchsorted(close_times, np.datetime64(now), side="right")) - 1, len(close_times) - 1)
+            price = closes[position["symbol"]].iat[max(row, 0)]
+            if not np.isfinite(price):
+                return 0.0
+            return position["direction"] * (price - position["entry_fill"]) * position["value_per_price"] * position["lot"]
+
+        for candidate in candidates:
+            now = candidate["time"]
+
+            # 🛠️ Trade manager: realise every position closed before this cycle
+            still_open = []
+            for position in sorted(open_positions, key=lambda p: p["exit_time"]):
+                if position["exit_time"] <= now:
+                    balance += position["pnl"]
+                    self._record(position)
+                    self.equity_curve.append((position["exit_time"], balance, balance, 0.0))
+                else:
+                    still_open.append(position)
+            open_positions = still_open
+
+            symbol, strategy_name, trade = candidate["symbol"], candidate["strategy"], candidate["trade"]
+            key = f"{symbol}_{strategy_name}"
+
+            # ⏳ Cooldown check
+            last_time = cooldowns.get(key)
+            if last_time is not None and now - last_time < timedelta(minutes=get_cooldown_minutes(strategy_name)):
+                self.rejections["cooldown"] += 1
+                continue
+
+            spec = self._spec(symbol)
+            pip = pip_size(symbol)
+            value_per_price = spec["contract_size"]
+            equity = balance + sum(mark(p, now) for p in open_positions)
+            margin_used = sum(p["margin"] for p in open_positions)
+
+            risk_check = evaluate_trade_risk(
+                entry=candidate["entry_fill"], sl=trade["sl"], tp=trade["tp"], symbol=symbol, balance=balance,
+                risk_percent=self.settings.get("default_risk_percent", 1.0), pip_value=value_per_price * pip
+            )
+            if not risk_check.get("valid"):
+                self.rejections["risk engine"] += 1
+                continue
+            lot = max(0.01, risk_check["lot_size"])
+
+            # 🔗 Correlation from the closes known at this point in time
+            if last_refresh is None or now - last_refresh >= refresh:
+                history = closes.loc[:now].dropna()
+                if history.shape[1] >= 2 and len(history) > 2:
+                    portfolio.update_correlation(history, lookback)
+                last_refresh = now
+
+            portfolio.reset()
+            for p in open_positions:
+                portfolio.add_position(p["symbol"], "buy" if p["direction"] > 0 else "sell", p["risk"], p["notional"])
+
+            direction = 1.0 if trade["tp"] > trade["entry"] else -1.0
+            price = candidate["entry_fill"]
+            risk_money = abs(price - trade["sl"]) * value_per_price * lot
+            notional = price * value_per_price * lot
+            new_margin = notional / spec["leverage"]
+            check = portfolio.check(symbol, "buy" if direction > 0 else "sell", risk_money, notional,
+                                    equity=equity, margin_used=margin_used, new_margin=new_margin)
+            if not check["valid"]:
+                self.rejections[check["reason"]] += 1
+                continue
+            lot *= check["scale"]
+
+            lot = round(lot / spec["volume_step"]) * spec["volume_step"]
+            if lot < spec["volume_min"]:
+                self.rejections["lot below minimum"] += 1
+                continue
+            lot = min(lot, spec["volume_max"])
+
+            pnl = candidate["pnl_per_unit"] * value_per_price * lot
+            open_positions.append({
+                **candidate,
+                "direction": direction,
+                "lot": lot,
+                "value_per_price": value_per_price,
+                "risk": abs(price - trade["sl"]) * value_per_price * lot,
+                "notional": price * value_per_price * lot,
+                "margin": price * value_per_price * lot / spec["leverage"],
+                "pnl": pnl,
+                "pnl_pips": candidate["pnl_per_unit"] / pip,
+                "risk_pips": abs(price - trade["sl"]) / pip,
+            })
+            cooldowns[key] = now
+            margin_used += open_positions[-1]["margin"]
+            self.equity_curve.append((now, balance, equity, margin_used))
+
+        for position in sorted(open_positions, key=lambda p: p["exit_time"]):
+            balance += position["pnl"]
+            self._record(position)
+            self.equity_curve.append((position["exit_time"], balance, balance, 0.0))
+
+        self.balance = balance
+        return self.tracker
+
+    def _record(self, position: dict):
+        pnl = position["pnl"]
+        self.tracker.record_trade({**position["trade"], "strategy": position["strategy"]}, {
+            "price": position["entry_fill"],
+            "time": str(position["time"]),
+            "result": "win" if pnl > 1e-9 else "loss" if pnl < -1e-9 else "breakeven",
+            "pnl": pnl,
+            "rrr": position["pnl_pips"] / position["risk_pips"] if position["risk_pips"] else 0.0,
+            "exit_price": position["exit_price"],
+            "exit_time": str(position["exit_time"]),
+            "exit_reason": position["exit_reason"],
+        })
+
+    def equity_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.equity_curve, columns=["time", "balance", "equity", "margin"]).set_index("time")
+
+    def get_summary(self) -> str:
+        curve = self.equity_frame()
+        balance = curve["balance"].to_numpy()
+        peak = np.maximum.accumulate(balance)
+        max_dd = float(((peak - balance) / peak).max() * 100) if len(balance) else 0.0
+        final = getattr(self, "balance", self.initial_balance)
+        lines = [
+            "🧺 **Portfolio Backtest**",
+            f"• Balance: {self.initial_balance:.2f} → {final:.2f} ({(final / self.initial_balance - 1) * 100:+.2f}%)",
+            f"• Max Drawdown (closed): {max_dd:.2f}%",
+            f"• Peak Margin Used: {curve['margin'].max() if len(curve) else 0.0:.2f}",
+            "",
+            "🚫 Rejections:",
+        ]
+        for reason, count in self.rejections.most_common():
+            lines.append(f"   - {reason}: {count}")
+        return "\n".join(lines) + "\n\n" + self.tracker.get_summary()
@@ -0,0 +1,195 @@
+# utils/portfolio_risk.py
+
+import math
+import numpy as np
+import pandas as pd
+from utils import clock
+
+
+def split_currencies(symbol: str):
+    """
+    Returns (base, quote) for FX/metal symbols like EURUSDm or XAUUSD.
+    Anything else is treated as a single exposure bucket on its own name.
+    """
+    core = symbol[:6]
+    if len(symbol) >= 6 and core.isalpha() and core.isupper():
+        return core[:3], core[3:]
+    return symbol, None
+
+
+class PortfolioRisk:
+    """
+    Live exposure across all open positions.
+
+    Keeps a signed money-at-risk vector per symbol and a signed notional vector
+    per currency (both in account currency), plus a cached symbol correlation
+    matrix. Checking a new trade only touches one row of the matrix, so the cost
+    is O(symbols) regardless of how many positions are open.
+    """
+
+    def __init__(self, max_total_risk_percent: float = 5.0, max_correlated_risk_percent: float = 3.0,
+                 max_currency_exposure_percent: float = 300.0, min_margin_level_percent: float = 200.0):
+        self.max_total_risk_percent = max_total_risk_percent
+        self.max_correlated_risk_percent = max_correlated_risk_percent
+        self.max_currency_exposure_percent = max_currency_exposure_percent
+        self.min_margin_level_percent = min_margin_level_percent
+
+        self.symbols = {}
+        self.currencies = {}
+        self.symbol_currencies = []
+        self.risk = np.zeros(0)
+        self.exposure = np.zeros(0)
+        self.corr = np.zeros((0, 0))
+        self.corr_updated = 0.0
+        self.variance = 0.0
+
+    # ------------------------------------------------------------------
+    # Index management
+    # ------------------------------------------------------------------
+    def _currency_index(self, currency: str) -> int:
+        if currency not in self.currencies:
+            self.currencies[currency] = len(self.currencies)
+            self.exposure = np.append(self.exposure, 0.0)
+        return self.currencies[currency]
+
+    def _symbol_index(self, symbol: str) -> int:
+        if symbol not in self.symbols:
+            n = len(self.symbols)
+            self.symbols[symbol] = n
+            base, quote = split_currencies(symbol)
+            self.symbol_currencies.append((
+                self._currency_index(base),
+                self._currency_index(quote) if quote else None
+            ))
+            self.risk = np.append(self.risk, 0.0)
+            corr = np.eye(n + 1)
+            corr[:n, :n] = self.corr
+            self.corr = corr
+        return self.symbols[symbol]
+
+    # ------------------------------------------------------------------
+    # Exposure updates
+    # ------------------------------------------------------------------
+    def reset(self):
+        self.risk[:] = 0.0
+        self.exposure[:] = 0.0
+        self.variance = 0.0
+
+    def add_position(self, symbol: str, direction: str, risk_money: float, notional: float):
+        """
+        Adds a position: risk_money is the loss at SL, notional the position value,
+        both in account currency.
+        """
+        i = self._symbol_index(symbol)
+        sign = 1.0 if direction == "buy" else -1.0
+        d = sign * risk_money
+        self.variance += 2 * d * float(self.corr[i] @ self.risk) + d * d * self.corr[i, i]
+        self.risk[i] += d
+
+        base, quote = self.symbol_currencies[i]
+        self.exposure[base] += sign * notional
+        if quote is not None:
+            self.exposure[quote] -= sign * notional
+
+    def _recompute_variance(self):
+        self.variance = float(self.risk @ self.corr @ self.risk)
+
+    def update_correlation(self, closes: pd.DataFrame, lookback: int = 200):
+        """
+        Rebuilds the correlation matrix from a DataFrame of close prices
+        (one column per symbol) using log returns over the last `lookback` bars.
+        """
+        for symbol in closes.columns:
+            self._symbol_index(symbol)
+
+        returns = np.log(closes.astype(float)).diff().iloc[1:].tail(lookback).to_numpy()
+        if len(returns) > 2:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sub = np.corrcoef(returns, rowvar=False)
+            sub = np.nan_to_num(np.atleast_2d(sub), nan=0.0)
+            np.fill_diagonal(sub, 1.0)
+            idx = np.array([self.symbols[s] for s in closes.columns])
+            self.corr[np.ix_(idx, idx)] = sub
+
+        self.corr_updated = clock.time()
+        self._recompute_variance()
+
+    def correlation_age(self) -> float:
+        return clock.time() - self.corr_updated
+
+    # ------------------------------------------------------------------
+    # Pre-trade check
+    # ------------------------------------------------------------------
+    def check(self, symbol: str, direction: str, risk_money: float, notional: float, equity: float,
+              margin_used: float = 0.0, new_margin: float = 0.0) -> dict:
+        """
+        Returns the largest fraction (0..1) of the proposed trade that keeps every
+        portfolio limit satisfied, or valid=False when none of it fits.
+        """
+        if equity <= 0 or risk_money <= 0:
+            return {"valid": False, "scale": 0.0, "reason": "No equity or zero trade risk"}
+
+        i = self._symbol_index(symbol)
+        sign = 1.0 if direction == "buy" else -1.0
+        d = sign * risk_money
+        limits = {}
+
+        # Total gross risk: sum(|r|) with only r[i] changing
+        budget = equity * self.max_total_risk_percent / 100 - (np.abs(self.risk).sum() - abs(self.risk[i]))
+        limits["total risk"] = _linear_cap(self.risk[i] * sign, risk_money, budget)
+
+        # Correlated risk: sqrt(r' C r) with r[i] += s * d, a quadratic in s
+        cap = equity * self.max_correlated_risk_percent / 100
+        cross = float(self.corr[i] @ self.risk)
+        limits["correlated risk"] = _quadratic_cap(d * d * self.corr[i, i], 2 * d * cross, self.variance - cap * cap)
+
+        # Net notional per currency
+        cap = equity * self.max_currency_exposure_percent / 100
+        base, quote = self.symbol_currencies[i]
+        limits["base exposure"] = _linear_cap(self.exposure[base] * sign, notional, cap)
+        if quote is not None:
+            limits["quote exposure"] = _linear_cap(-self.exposure[quote] * sign, notional, cap)
+
+        if new_margin > 0 and self.min_margin_level_percent > 0:
+            limits["margin level"] = (equity * 100 / self.min_margin_level_percent - margin_used) / new_margin
+
+        binding = min(limits, key=limits.get)
+        scale = float(max(0.0, min(1.0, limits[binding])))
+        if scale <= 0:
+            return {"valid": False, "scale": 0.0, "reason": f"Portfolio {binding} limit reached"}
+        return {"valid": True, "scale": scale, "binding": binding if scale < 1.0 else None}
+
+    def get_summary(self, equity: float) -> str:
+        if not len(self.risk) or equity <= 0:
+            return "📉 No portfolio exposure."
+        gross = np.abs(self.risk).sum() / equity * 100
+        correlated = math.sqrt(max(self.variance, 0.0)) / equity * 100
+        top = sorted(self.currencies.items(), key=lambda kv: -abs(self.exposure[kv[1]]))[:4]
+        exposures = ", ".join(f"{ccy} {self.exposure[idx] / equity * 100:+.0f}%" for ccy, idx in top)
+        return f"🧮 Portfolio risk {gross:.2f}% gross, {correlated:.2f}% correlated | exposure: {exposures}"
+
+
+def _linear_cap(current: float, step: float, limit: float) -> float:
+    """
+    Largest s with |current + s * step| <= limit (step > 0).
+    """
+    if step <= 0:
+        return 1.0
+    return (limit - current) / step
+
+
+def _quadratic_cap(a: float, b: float, c: float) -> float:
+    """
+    Largest s with a*s^2 + b*s + c <= 0, or 0 when no positive s qualifies.
+    """
+    if a <= 0:
+        return 1.0
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return 0.0
+    root = math.sqrt(disc)
+    low, high = (-b - root) / (2 * a), (-b + root) / (2 * a)
+    # Only the interval [low, high] is allowed; reducing trades can start above 0
+    if low > 1.0 or high <= 0:
+        return 0.0
+    return high
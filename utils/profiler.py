@@ -0,0 +1,150 @@
+# utils/profiler.py
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+
+# cProfile only sees the thread that enabled it
+_local = threading.local()
+
+
+def profiling() -> bool:
+    """
+    True while the calling thread is inside a profiled job run, so helpers
+    that would hand work to another thread can run it inline instead.
+    """
+    return getattr(_local, "active", False)
+
+
+class CycleProfiler:
+    """
+    On-demand profiling of scheduled jobs.
+
+    While armed, the next N runs of each wrapped job execute under cProfile
+    and tracemalloc. Each run writes:
+      - <ts>_<n>_<job>.prof  pstats dump (flamegraph via `flameprof`, `snakeviz`, `gprof2dot`)
+      - <ts>_<n>_<job>.txt   top functions and allocation sites, plus the
+                             allocation diff against the previous profiled run of
+                             the job, or for the first run against a snapshot taken
+                             just before it (so `cycles: 1` still shows growth)
+    When not armed a wrapped job costs one integer check; tracemalloc is stopped.
+    Jobs run on separate runtime threads, so the run counts, snapshots and
+    tracemalloc start/stop are guarded by a lock; tracemalloc only stops once
+    no profiled run is in progress.
+    """
+
+    def __init__(self, output_dir: str = "profiles", cycles: int = 1, top: int = 25, trace_frames: int = 10):
+        self.output_dir = output_dir
+        self.cycles = cycles
+        self.top = top
+        self.trace_frames = trace_frames
+        self.remaining = {}
+        self.snapshots = {}
+        self.runs = 0
+        self.active = 0
+        # Re-entrant: request() also runs from the signal handler, on whichever thread it interrupts
+        self.lock = threading.RLock()
+
+    def request(self, cycles: int = None, jobs=None):
+        """
+        Arms profiling for the next `cycles` runs of the given (default: all) jobs.
+        """
+        with self.lock:
+            for job in jobs or self.remaining:
+                self.remaining[job] = cycles or self.cycles
+        logging.info(f"🔬 Profiling armed for {cycles or self.cycles} cycle(s): {', '.join(jobs or self.remaining)}")
+
+    def install_signal_handler(self):
+        """
+        SIGUSR1 (POSIX) or SIGBREAK / Ctrl+Break (Windows) arms profiling of all jobs.
+        """
+        sig = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+        if sig is None:
+            return False
+        signal.signal(sig, lambda signum, frame: self.request())
+        return True
+
+    def wrap(self, job: str, fn):
+        with self.lock:
+            self.remaining.setdefault(job, 0)
+
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            if not self.remaining[job]:
+                return fn(*args, **kwargs)
+            return self._profile(job, fn, args, kwargs)
+
+        return wrapped
+
+    def _profile(self, job: str, fn, args, kwargs):
+        with self.lock:
+            armed = self.remaining[job] > 0  # Re-checked: another thread may have taken the last armed run
+            if armed:
+                self.remaining[job] -= 1
+                self.active += 1
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(self.trace_frames)
+                if job not in self.snapshots:
+                    self.snapshots[job] = (_snapshot(), "the start of this cycle")
+        if not armed:
+            return fn(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        profile.enable()
+        _local.active = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.active = False
+            profile.disable()
+            with self.lock:
+                self._write(job, profile, _snapshot())
+                self.active -= 1
+                if not self.active and not any(self.remaining.values()):
+                    tracemalloc.stop()
+                    self.snapshots.clear()
+
+    def _write(self, job: str, profile: cProfile.Profile, snapshot):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.runs += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.output_dir, f"{stamp}_{self.runs:04d}_{job}")
+        profile.dump_stats(base + ".prof")
+
+        report = io.StringIO()
+        report.write(f"=== {job} @ {stamp} ===\n\n--- Top functions by cumulative time ---\n")
+        stats = pstats.Stats(profile, stream=report)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        report.write("\n--- Top functions by own time ---\n")
+        stats.sort_stats("tottime").print_stats(self.top)
+
+        report.write("\n--- Top allocation sites (live) ---\n")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            report.write(f"{stat}\n")
+
+        previous, label = self.snapshots[job]
+        report.write(f"\n--- Allocation growth since {label} ---\n")
+        for stat in snapshot.compare_to(previous, "lineno")[:self.top]:
+            report.write(f"{stat}\n")
+        self.snapshots[job] = (snapshot, "previous profiled cycle")
+
+        current, peak = tracemalloc.get_traced_memory()
+        report.write(f"\nTraced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+
+        with open(base + ".txt", "w") as f:
+            f.write(report.getvalue())
+        logging.info(f"🔬 Profile written: {base}.prof / .txt")
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
@@ -0,0 +1,596 @@
+# utils/replay_broker.py
+
+import sys
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from utils.clock import get_clock
+
+# MetaTrader5 constants the bot uses (same values as the terminal package)
+CONSTANTS = {
+    "TIMEFRAME_M1": 1, "TIMEFRAME_M5": 5, "TIMEFRAME_M15": 15, "TIMEFRAME_M30": 30,
+    "TIMEFRAME_H1": 16385, "TIMEFRAME_H4": 16388, "TIMEFRAME_D1": 16408,
+    "ORDER_TYPE_BUY": 0, "ORDER_TYPE_SELL": 1, "ORDER_TYPE_BUY_LIMIT": 2, "ORDER_TYPE_SELL_LIMIT": 3,
+    "ORDER_TYPE_BUY_STOP": 4, "ORDER_TYPE_SELL_STOP": 5,
+    "ORDER_STATE_PLACED": 1, "ORDER_STATE_CANCELED": 2, "ORDER_STATE_FILLED": 4, "ORDER_STATE_REJECTED": 5,
+    "ORDER_STATE_EXPIRED": 6,
+    "POSITION_TYPE_BUY": 0, "POSITION_TYPE_SELL": 1,
+    "DEAL_TYPE_BUY": 0, "DEAL_TYPE_SELL": 1, "DEAL_ENTRY_IN": 0, "DEAL_ENTRY_OUT": 1, "DEAL_ENTRY_INOUT": 2,
+    "DEAL_ENTRY_OUT_BY": 3,
+    "DEAL_REASON_CLIENT": 0, "DEAL_REASON_EXPERT": 3, "DEAL_REASON_SL": 4, "DEAL_REASON_TP": 5,
+    "DEAL_REASON_SO": 6,
+    "TRADE_ACTION_DEAL": 1, "TRADE_ACTION_PENDING": 5, "TRADE_ACTION_SLTP": 6, "TRADE_ACTION_MODIFY": 7,
+    "TRADE_ACTION_REMOVE": 8,
+    "ORDER_TIME_GTC": 0, "ORDER_TIME_SPECIFIED": 2,
+    "ORDER_FILLING_FOK": 0, "ORDER_FILLING_IOC": 1, "ORDER_FILLING_RETURN": 2,
+    "SYMBOL_FILLING_FOK": 1, "SYMBOL_FILLING_IOC": 2,
+    "SYMBOL_TRADE_MODE_DISABLED": 0, "SYMBOL_TRADE_MODE_LONGONLY": 1, "SYMBOL_TRADE_MODE_SHORTONLY": 2,
+    "SYMBOL_TRADE_MODE_CLOSEONLY": 3, "SYMBOL_TRADE_MODE_FULL": 4,
+    "TRADE_RETCODE_REQUOTE": 10004, "TRADE_RETCODE_DONE": 10009, "TRADE_RETCODE_INVALID": 10013,
+    "TRADE_RETCODE_INVALID_VOLUME": 10014, "TRADE_RETCODE_INVALID_PRICE": 10015, "TRADE_RETCODE_INVALID_STOPS": 10016,
+    "TRADE_RETCODE_INVALID_EXPIRATION": 10022,
+    "TRADE_RETCODE_NO_MONEY": 10019, "TRADE_RETCODE_PRICE_CHANGED": 10020, "TRADE_RETCODE_PRICE_OFF": 10021,
+    "TRADE_RETCODE_POSITION_CLOSED": 10036, "TRADE_RETCODE_INVALID_FILL": 10030,
+}
+TIMEFRAME_SECONDS = {1: 60, 5: 300, 15: 900, 30: 1800, 16385: 3600, 16388: 14400, 16408: 86400}
+TIMEFRAME_NAMES = {1: "M1", 5: "M5", 15: "M15", 30: "M30", 16385: "H1", 16388: "H4", 16408: "D1"}
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+DEFAULT_SPEC = {
+    "contract_size": 100000, "leverage": 100, "volume_min": 0.01, "volume_step": 0.01, "volume_max": 100.0,
+    "stops_level": 0, "spread_points": None,
+}
+DEFAULT_CONTRACT_SIZES = {"XAUUSD": 100}
+
+
+class ReplayBroker:
+    """
+    Local stand-in for the MetaTrader5 package that serves recorded bars and
+    simulates a netting-free (hedging) account, driven by utils.clock.
+
+    Prices come from the base timeframe: the bid at time t is the close of
+    the last base bar completed by t, the ask adds the bar's recorded spread
+    (or spec spread_points). copy_rates_* only return completed bars, so the
+    bot never sees the future. Market orders fill at the current bid/ask,
+    SL/TP are checked against every completed base bar (SL first when both
+    are inside one bar, gaps fill at the bar open). Pending limit/stop
+    orders trigger the same way on the side they fill on (buys on the ask)
+    until their expiration; their position's SL/TP is checked from the next
+    bar on, and no margin is checked at the fill. Money uses contract size
+    with a USD-quoted approximation unless specs say otherwise.
+
+    `source` is a BarStore or {symbol: {timeframe name: DataFrame}}.
+    """
+
+    def __init__(self, source, symbols: list, base_timeframe: str = "M1", balance: float = 10000.0,
+                 specs: dict = None, clock=None):
+        self.source = source
+        self.symbols = list(symbols)
+        self.base = {name: value for value, name in TIMEFRAME_NAMES.items()}[base_timeframe]
+        self.balance = balance
+        self.specs = specs or {}
+        self.clock = clock
+        self.arrays = {}
+        self.positions = {}
+        self.orders = {}
+        self.history_orders = {}
+        self.deals = []
+        self.next_ticket = 1
+        self.synced_to = {}
+        self.orders_synced_to = {}
+        self.error = (1, "Success")
+        for name, value in CONSTANTS.items():
+            setattr(self, name, value)
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+    def _now(self) -> int:
+        return int((self.clock or get_clock()).time())
+
+    def _spec(self, symbol: str) -> dict:
+        spec = {**DEFAULT_SPEC, "contract_size": DEFAULT_CONTRACT_SIZES.get(symbol, DEFAULT_SPEC["contract_size"])}
+        spec = {**spec, **self.specs.get(symbol, {})}
+        if "point" not in spec:
+            spec["point"] = 0.01 if symbol == "XAUUSD" or symbol.endswith("JPY") else 0.00001
+        spec.setdefault("digits", int(round(-np.log10(spec["point"]))))
+        return spec
+
+    def _frame(self, symbol: str, name: str) -> pd.DataFrame:
+        if isinstance(self.source, dict):
+            df = self.source.get(symbol, {}).get(name)
+            return pd.DataFrame() if df is None else df
+        return self.source.frame(symbol, name)
+
+    def _rates(self, symbol: str, timeframe: int):
+        key = (symbol, timeframe)
+        if key not in self.arrays:
+            df = self._frame(symbol, TIMEFRAME_NAMES[timeframe])
+            if df.empty and timeframe != self.base:
+                df = _resample(self._frame(symbol, TIMEFRAME_NAMES[self.base]), TIMEFRAME_SECONDS[timeframe])
+            if df.empty:
+                self.arrays[key] = None
+                return None
+            rates = np.zeros(len(df), dtype=RATES_DTYPE)
+            rates["time"] = df.index.values.astype("datetime64[s]").astype(np.int64)
+            for col in RATES_DTYPE.names[1:]:
+                if col in df:
+                    rates[col] = df[col].to_numpy()
+            self.arrays[key] = rates
+        return self.arrays[key]
+
+    def _completed(self, symbol: str, timeframe: int, until: int = None) -> int:
+        """
+        Number of bars of `timeframe` completed at `until` (default: now).
+        """
+        rates = self._rates(symbol, timeframe)
+        if rates is None:
+            return 0
+        until = self._now() if until is None else until
+        return int(np.searchsorted(rates["time"] + TIMEFRAME_SECONDS[timeframe], until, side="right"))
+
+    def _quote(self, symbol: str):
+        rates = self._rates(symbol, self.base)
+        n = self._completed(symbol, self.base)
+        if rates is None or n == 0:
+            return None
+        bar = rates[n - 1]
+        spec = self._spec(symbol)
+        spread = spec["spread_points"] if spec["spread_points"] is not None else int(bar["spread"])
+        bid = float(bar["close"])
+        return SimpleNamespace(
+            time=int(bar["time"]) + TIMEFRAME_SECONDS[self.base], bid=bid, ask=bid + spread * spec["point"],
+            last=bid, volume=int(bar["tick_volume"]), time_msc=(int(bar["time"]) + TIMEFRAME_SECONDS[self.base]) * 1000,
+            flags=0, volume_real=0.0, spread=spread
+        )
+
+    # ------------------------------------------------------------------
+    # Position bookkeeping
+    # ------------------------------------------------------------------
+    def _value_per_price(self, symbol: str) -> float:
+        return float(self._spec(symbol)["contract_size"])
+
+    def _sync(self):
+        """
+        Triggers pending orders, then applies SL/TP hits, for every base bar
+        completed since the last call.
+        """
+        now = self._now()
+        self._sync_orders(now)
+        for ticket in sorted(self.positions):
+            pos = self.positions[ticket]
+            rates = self._rates(pos.symbol, self.base)
+            start = self.synced_to.get(ticket, 0)
+            end = self._completed(pos.symbol, self.base, now)
+            self.synced_to[ticket] = max(start, end)
+            if end <= start or not (pos.sl or pos.tp):
+                continue
+
+            bars = rates[start:end]
+            point = self._spec(pos.symbol)["point"]
+            spec_spread = self._spec(pos.symbol)["spread_points"]
+            # Buys close on the bid, sells on the ask
+            adj = 0.0 if pos.type == 0 else (bars["spread"] if spec_spread is None else spec_spread) * point
+            high, low, opens = bars["high"] + adj, bars["low"] + adj, bars["open"] + adj
+            if pos.type == 0:
+                sl_hit = (low <= pos.sl) if pos.sl else np.zeros(len(bars), bool)
+                tp_hit = (high >= pos.tp) if pos.tp else np.zeros(len(bars), bool)
+            else:
+                sl_hit = (high >= pos.sl) if pos.sl else np.zeros(len(bars), bool)
+                tp_hit = (low <= pos.tp) if pos.tp else np.zeros(len(bars), bool)
+            hits = sl_hit | tp_hit
+            if not hits.any():
+                continue
+
+            i = int(hits.argmax())
+            is_sl = bool(sl_hit[i])
+            level = pos.sl if is_sl else pos.tp
+            gapped = (opens[i] < level) if (pos.type == 0) == is_sl else (opens[i] > level)
+            price = float(opens[i]) if gapped else level
+            when = int(bars["time"][i]) + TIMEFRAME_SECONDS[self.base]
+            self._close(pos, price, when, self.DEAL_REASON_SL if is_sl else self.DEAL_REASON_TP,
+                        "sl" if is_sl else "tp")
+
+    def _sync_orders(self, now: int):
+        for ticket in sorted(self.orders):
+            order = self.orders[ticket]
+            rates = self._rates(order.symbol, self.base)
+            start = self.orders_synced_to.get(ticket, 0)
+            end = self._completed(order.symbol, self.base, now)
+            self.orders_synced_to[ticket] = max(start, end)
+            bars = rates[start:max(start, end)]
+            if order.type_time == self.ORDER_TIME_SPECIFIED:
+                bars = bars[bars["time"] < order.time_expiration]
+
+            is_buy = order.type in (self.ORDER_TYPE_BUY_LIMIT, self.ORDER_TYPE_BUY_STOP)
+            point = self._spec(order.symbol)["point"]
+            spec_spread = self._spec(order.symbol)["spread_points"]
+            # Buys fill on the ask, sells on the bid
+            adj = (bars["spread"] if spec_spread is None else spec_spread) * point if is_buy else 0.0
+            high, low, opens = bars["high"] + adj, bars["low"] + adj, bars["open"] + adj
+            level = order.price_open
+            if order.type in (self.ORDER_TYPE_BUY_LIMIT, self.ORDER_TYPE_SELL_STOP):
+                hits, gapped = low <= level, opens <= level
+            else:
+                hits, gapped = high >= level, opens >= level
+
+            if len(bars) and hits.any():
+                i = int(hits.argmax())
+                price = float(opens[i]) if gapped[i] else level
+                when = int(bars["time"][i]) + TIMEFRAME_SECONDS[self.base]
+                self._drop_order(ticket, self.ORDER_STATE_FILLED, when)
+                self._open(order.symbol, is_buy, order.volume_current, price, order.sl, order.tp, order.magic,
+                           order.comment, when, ticket=ticket)
+                self.synced_to[ticket] = start + i + 1
+            elif order.type_time == self.ORDER_TIME_SPECIFIED and now >= order.time_expiration:
+                self._drop_order(ticket, self.ORDER_STATE_EXPIRED, order.time_expiration)
+
+    def _drop_order(self, ticket: int, state: int, when: int):
+        order = self.orders.pop(ticket)
+        order.state, order.time_done = state, when
+        self.history_orders[ticket] = order
+        self.orders_synced_to.pop(ticket, None)
+
+    def _open(self, symbol: str, is_buy: bool, volume: float, price: float, sl: float, tp: float, magic: int,
+              comment: str, when: int, ticket: int = None):
+        """
+        Opens a position; a filled pending order keeps its ticket as the
+        position id, as on the terminal.
+        """
+        pos = SimpleNamespace(
+            ticket=ticket or self.next_ticket, identifier=ticket or self.next_ticket, time=when,
+            time_msc=when * 1000, time_update=when, type=0 if is_buy else 1, magic=magic,
+            reason=self.DEAL_REASON_EXPERT, volume=volume, price_open=price, sl=sl or 0.0, tp=tp or 0.0,
+            price_current=price, swap=0.0, profit=0.0, symbol=symbol, comment=comment, external_id=""
+        )
+        if ticket is None:
+            self.next_ticket += 1
+        self.positions[pos.ticket] = pos
+        deal = self._deal(pos, pos.type, self.DEAL_ENTRY_IN, price, when, self.DEAL_REASON_EXPERT, 0.0, comment)
+        return pos, deal
+
+    def _profit(self, pos, price: float) -> float:
+        direction = 1.0 if pos.type == 0 else -1.0
+        return direction * (price - pos.price_open) * self._value_per_price(pos.symbol) * pos.volume
+
+    def _deal(self, pos, deal_type: int, entry: int, price: float, when: int, reason: int, profit: float,
+              comment: str):
+        deal = SimpleNamespace(
+            ticket=self.next_ticket, order=self.next_ticket, time=when, time_msc=when * 1000, type=deal_type,
+            entry=entry, magic=pos.magic, position_id=pos.ticket, reason=reason, volume=pos.volume,
+            price=price, commission=0.0, swap=0.0, profit=profit, fee=0.0, symbol=pos.symbol, comment=comment,
+            external_id=""
+        )
+        self.next_ticket += 1
+        self.deals.append(deal)
+        return deal
+
+    def _close(self, pos, price: float, when: int, reason: int, comment: str):
+        profit = self._profit(pos, price)
+        self.balance += profit
+        del self.positions[pos.ticket]
+        self.synced_to.pop(pos.ticket, None)
+        return self._deal(pos, 1 - pos.type, self.DEAL_ENTRY_OUT, price, when, reason, profit, comment)
+
+    def _margin(self, symbol: str, volume: float, price: float) -> float:
+        spec = self._spec(symbol)
+        return volume * spec["contract_size"] * price / spec["leverage"]
+
+    def _floating(self) -> tuple:
+        profit, margin = 0.0, 0.0
+        for pos in self.positions.values():
+            quote = self._quote(pos.symbol)
+            price = (quote.bid if pos.type == 0 else quote.ask) if quote else pos.price_open
+            pos.price_current = price
+            pos.profit = self._profit(pos, price)
+            profit += pos.profit
+            margin += self._margin(pos.symbol, pos.volume, pos.price_open)
+        return profit, margin
+
+    # ------------------------------------------------------------------
+    # MetaTrader5 API
+    # ------------------------------------------------------------------
+    def initialize(self, *args, **kwargs) -> bool:
+        return True
+
+    def shutdown(self):
+        return None
+
+    def last_error(self):
+        return self.error
+
+    def account_info(self):
+        self._sync()
+        profit, margin = self._floating()
+        equity = self.balance + profit
+        return SimpleNamespace(
+            login=0, server="replay", currency="USD", leverage=int(DEFAULT_SPEC["leverage"]),
+            balance=self.balance, equity=equity, profit=profit, margin=margin, margin_free=equity - margin,
+            margin_level=equity / margin * 100 if margin else 0.0
+        )
+
+    def symbol_info(self, symbol: str):
+        if symbol not in self.symbols:
+            return None
+        spec = self._spec(symbol)
+        quote = self._quote(symbol)
+        tick_size = spec["point"]
+        return SimpleNamespace(
+            name=symbol, visible=True, select=True, trade_mode=self.SYMBOL_TRADE_MODE_FULL,
+            point=spec["point"], digits=spec["digits"], trade_tick_size=tick_size,
+            trade_tick_value=tick_size * spec["contract_size"], trade_contract_size=spec["contract_size"],
+            volume_min=spec["volume_min"], volume_max=spec["volume_max"], volume_step=spec["volume_step"],
+            stops_level=spec["stops_level"], spread=quote.spread if quote else 0,
+            filling_mode=self.SYMBOL_FILLING_FOK | self.SYMBOL_FILLING_IOC,
+            bid=quote.bid if quote else 0.0, ask=quote.ask if quote else 0.0, time=quote.time if quote else 0,
+            currency_base=symbol[:3], currency_profit=symbol[3:6], description=symbol
+        )
+
+    def symbols_get(self, group: str = None):
+        return tuple(self.symbol_info(symbol) for symbol in self.symbols)
+
+    def symbol_select(self, symbol: str, enable: bool = True) -> bool:
+        return symbol in self.symbols
+
+    def symbol_info_tick(self, symbol: str):
+        return self._quote(symbol) if symbol in self.symbols else None
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int):
+        rates = self._rates(symbol, timeframe)
+        if rates is None:
+            return None
+        end = self._completed(symbol, timeframe) - start_pos
+        return rates[max(0, end - count):max(0, end)].copy()
+
+    def copy_rates_from(self, symbol: str, timeframe: int, date_from, count: int):
+        rates = self._rates(symbol, timeframe)
+        if rates is None:
+            return None
+        until = min(int(pd.Timestamp(date_from).timestamp()), self._now())
+        end = int(np.searchsorted(rates["time"], until, side="right"))
+        end = min(end, self._completed(symbol, timeframe))
+        return rates[max(0, end - count):end].copy()
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from, date_to):
+        rates = self._rates(symbol, timeframe)
+        if rates is None:
+            return None
+        start = int(np.searchsorted(rates["time"], int(pd.Timestamp(date_from).timestamp()), side="left"))
+        end = int(np.searchsorted(rates["time"], int(pd.Timestamp(date_to).timestamp()), side="right"))
+        end = min(end, self._completed(symbol, timeframe))
+        return rates[start:max(start, end)].copy()
+
+    def positions_get(self, symbol: str = None, ticket: int = None, group: str = None):
+        self._sync()
+        self._floating()
+        return tuple(
+            SimpleNamespace(**vars(pos)) for t, pos in sorted(self.positions.items())
+            if (symbol is None or pos.symbol == symbol) and (ticket is None or t == ticket)
+        )
+
+    def positions_total(self) -> int:
+        self._sync()
+        return len(self.positions)
+
+    def orders_get(self, symbol: str = None, ticket: int = None, group: str = None):
+        self._sync()
+        return tuple(
+            SimpleNamespace(**vars(order)) for t, order in sorted(self.orders.items())
+            if (symbol is None or order.symbol == symbol) and (ticket is None or t == ticket)
+        )
+
+    def orders_total(self) -> int:
+        self._sync()
+        return len(self.orders)
+
+    def history_deals_get(self, date_from=None, date_to=None, group: str = None, position: int = None,
+                          ticket: int = None):
+        self._sync()
+        lo = 0 if date_from is None else int(pd.Timestamp(date_from).timestamp())
+        hi = self._now() if date_to is None else int(pd.Timestamp(date_to).timestamp())
+        return tuple(
+            d for d in self.deals
+            if (position is not None and d.position_id == position)
+            or (ticket is not None and d.ticket == ticket)
+            or (position is None and ticket is None and lo <= d.time <= hi)
+        )
+
+    def history_orders_get(self, date_from=None, date_to=None, group: str = None, ticket: int = None,
+                           position: int = None):
+        self._sync()
+        return tuple(
+            SimpleNamespace(**vars(order)) for t, order in sorted(self.history_orders.items())
+            if (ticket is None or t == ticket) and (position is None or t == position)
+        )
+
+    def order_calc_margin(self, order_type: int, symbol: str, volume: float, price: float):
+        return self._margin(symbol, volume, price) if symbol in self.symbols else None
+
+    def order_check(self, request: dict):
+        self._sync()
+        retcode, comment = self._validate(request)
+        profit, margin = self._floating()
+        equity = self.balance + profit
+        if retcode == 0 and request.get("action") == self.TRADE_ACTION_DEAL and "position" not in request:
+            margin += self._margin(request["symbol"], request["volume"], request.get("price") or 0.0)
+        return SimpleNamespace(
+            retcode=retcode, comment=comment, balance=self.balance, equity=equity, profit=profit,
+            margin=margin, margin_free=equity - margin, margin_level=equity / margin * 100 if margin else 0.0,
+            request=request
+        )
+
+    def _validate(self, request: dict) -> tuple:
+        action = request.get("action")
+        if action == self.TRADE_ACTION_SLTP:
+            return (0, "Done") if request.get("position") in self.positions else (self.TRADE_RETCODE_POSITION_CLOSED, "Position closed")
+        if action in (self.TRADE_ACTION_MODIFY, self.TRADE_ACTION_REMOVE):
+            order = self.orders.get(request.get("order"))
+            if order is None:
+                return self.TRADE_RETCODE_INVALID, "Invalid order"
+            return (0, "Done") if action == self.TRADE_ACTION_REMOVE else self._validate_pending(order.symbol, order.type, request)
+        if action not in (self.TRADE_ACTION_DEAL, self.TRADE_ACTION_PENDING) or request.get("symbol") not in self.symbols:
+            return self.TRADE_RETCODE_INVALID, "Invalid request"
+        if "position" in request:
+            return (0, "Done") if request["position"] in self.positions else (self.TRADE_RETCODE_POSITION_CLOSED, "Position closed")
+
+        spec = self._spec(request["symbol"])
+        volume = request.get("volume", 0.0)
+        steps = volume / spec["volume_step"]
+        if volume < spec["volume_min"] or volume > spec["volume_max"] or abs(steps - round(steps)) > 1e-6:
+            return self.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume"
+        if action == self.TRADE_ACTION_PENDING:
+            return self._validate_pending(request["symbol"], request.get("type"), request)
+
+        quote = self._quote(request["symbol"])
+        if quote is None:
+            return self.TRADE_RETCODE_PRICE_OFF, "No quotes"
+        is_buy = request.get("type") == self.ORDER_TYPE_BUY
+        price = quote.ask if is_buy else quote.bid
+        close_price = quote.bid if is_buy else quote.ask
+        distance = spec["stops_level"] * spec["point"]
+        sl, tp = request.get("sl") or 0.0, request.get("tp") or 0.0
+        if is_buy and ((sl and sl > close_price - distance) or (tp and tp < close_price + distance)):
+            return self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops"
+        if not is_buy and ((sl and sl < close_price + distance) or (tp and tp > close_price - distance)):
+            return self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops"
+
+        profit, margin = self._floating()
+        if self.balance + profit - margin < self._margin(request["symbol"], volume, price):
+            return self.TRADE_RETCODE_NO_MONEY, "No money"
+        return 0, "Done"
+
+    def _validate_pending(self, symbol: str, order_type: int, request: dict) -> tuple:
+        quote = self._quote(symbol)
+        if quote is None:
+            return self.TRADE_RETCODE_PRICE_OFF, "No quotes"
+        spec = self._spec(symbol)
+        distance = spec["stops_level"] * spec["point"]
+        price = request.get("price") or 0.0
+        placement = {
+            self.ORDER_TYPE_BUY_LIMIT: price <= quote.ask - distance,
+            self.ORDER_TYPE_SELL_LIMIT: price >= quote.bid + distance,
+            self.ORDER_TYPE_BUY_STOP: price >= quote.ask + distance,
+            self.ORDER_TYPE_SELL_STOP: price <= quote.bid - distance,
+        }
+        if order_type not in placement:
+            return self.TRADE_RETCODE_INVALID, "Invalid order type"
+        if price <= 0 or not placement[order_type]:
+            return self.TRADE_RETCODE_INVALID_PRICE, "Invalid price"
+        is_buy = order_type in (self.ORDER_TYPE_BUY_LIMIT, self.ORDER_TYPE_BUY_STOP)
+        sl, tp = request.get("sl") or 0.0, request.get("tp") or 0.0
+        if is_buy and ((sl and sl > price - distance) or (tp and tp < price + distance)):
+            return self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops"
+        if not is_buy and ((sl and sl < price + distance) or (tp and tp > price - distance)):
+            return self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops"
+        if request.get("type_time") == self.ORDER_TIME_SPECIFIED and _epoch(request.get("expiration")) <= self._now():
+            return self.TRADE_RETCODE_INVALID_EXPIRATION, "Invalid expiration"
+        return 0, "Done"
+
+    def order_send(self, request: dict):
+        self._sync()
+        retcode, comment = self._validate(request)
+        result = SimpleNamespace(retcode=retcode or self.TRADE_RETCODE_DONE, comment=comment, order=0, deal=0,
+                                 volume=request.get("volume", 0.0), price=0.0, bid=0.0, ask=0.0, request=request)
+        if retcode:
+            return result
+
+        now = self._now()
+        if request["action"] == self.TRADE_ACTION_SLTP:
+            pos = self.positions[request["position"]]
+            pos.sl = request.get("sl", pos.sl) or 0.0
+            pos.tp = request.get("tp", pos.tp) or 0.0
+            pos.time_update = now
+            result.order = pos.ticket
+            return result
+        if request["action"] in (self.TRADE_ACTION_PENDING, self.TRADE_ACTION_MODIFY, self.TRADE_ACTION_REMOVE):
+            result.order = self._pending(request, now)
+            return result
+
+        quote = self._quote(request["symbol"])
+        result.bid, result.ask = quote.bid, quote.ask
+        if "position" in request:
+            pos = self.positions[request["position"]]
+            price = quote.bid if pos.type == 0 else quote.ask
+            deal = self._close(pos, price, now, self.DEAL_REASON_EXPERT, request.get("comment", ""))
+            result.order, result.deal, result.price, result.volume = deal.order, deal.ticket, price, pos.volume
+            return result
+
+        is_buy = request["type"] == self.ORDER_TYPE_BUY
+        price = quote.ask if is_buy else quote.bid
+        pos, deal = self._open(request["symbol"], is_buy, request["volume"], price, request.get("sl"),
+                               request.get("tp"), request.get("magic", 0), request.get("comment", ""), now)
+        self.synced_to[pos.ticket] = self._completed(pos.symbol, self.base, now)
+        result.order, result.deal, result.price = pos.ticket, deal.ticket, price
+        return result
+
+    def _pending(self, request: dict, now: int) -> int:
+        """
+        Places, modifies or removes a pending order; returns its ticket.
+        """
+        if request["action"] == self.TRADE_ACTION_REMOVE:
+            self._drop_order(request["order"], self.ORDER_STATE_CANCELED, now)
+            return request["order"]
+
+        type_time = request.get("type_time", self.ORDER_TIME_GTC)
+        expiration = _epoch(request.get("expiration")) if type_time == self.ORDER_TIME_SPECIFIED else 0
+        if request["action"] == self.TRADE_ACTION_MODIFY:
+            order = self.orders[request["order"]]
+            order.price_open = request["price"]
+            order.sl, order.tp = request.get("sl") or 0.0, request.get("tp") or 0.0
+            order.type_time, order.time_expiration = type_time, expiration
+            return order.ticket
+
+        order = SimpleNamespace(
+            ticket=self.next_ticket, time_setup=now, time_setup_msc=now * 1000, time_done=0,
+            time_expiration=expiration, type=request["type"], type_time=type_time, state=self.ORDER_STATE_PLACED,
+            magic=request.get("magic", 0), position_id=0, volume_initial=request["volume"],
+            volume_current=request["volume"], price_open=request["price"], sl=request.get("sl") or 0.0,
+            tp=request.get("tp") or 0.0, price_current=request["price"], symbol=request["symbol"],
+            comment=request.get("comment", ""), external_id=""
+        )
+        self.next_ticket += 1
+        self.orders[order.ticket] = order
+        self.orders_synced_to[order.ticket] = self._completed(order.symbol, self.base, now)
+        return order.ticket
+
+
+def _epoch(value) -> int:
+    """
+    Order expirations come as epoch seconds or datetimes.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    return int(pd.Timestamp(value).timestamp())
+
+
+def _resample(df: pd.DataFrame, seconds: int) -> pd.DataFrame:
+    if df.empty:
+        return df
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last"}
+    agg.update({col: "sum" for col in ("tick_volume", "real_volume") if col in df})
+    if "spread" in df:
+        agg["spread"] = "max"
+    return df.resample(f"{seconds}s", label="left", closed="left").agg(agg).dropna(subset=["open"])
+
+
+def install(broker: ReplayBroker) -> types.ModuleType:
+    """
+    Registers the broker as the `MetaTrader5` module. Must run before the bot's
+    modules are imported, since they bind `mt5` at import time.
+    """
+    module = types.ModuleType("MetaTrader5")
+    for name in dir(broker):
+        value = getattr(broker, name)
+        if not name.startswith("_") and (name.isupper() or callable(value)):
+            setattr(module, name, value)
+    module.broker = broker
+    sys.modules["MetaTrader5"] = module
+    return module
@@ -1,7 +1,7 @@
 # utils/risk_engine.py
 
 import logging
-from utils.helpers import round_safe
+from utils.helpers import round_safe, pip_size
 
 
 def calculate_lot_size(balance: float, risk_percentage: float, stop_loss_pips: float, pip_value: float) -> float:
@@ -17,6 +17,16 @@ def calculate_lot_size(balance: float, risk_percentage: float, stop_loss_pips: f
     return round_safe(lot_size, 2)
 
 
+def pip_value_per_lot(symbol: str, tick_value: float, tick_size: float) -> float:
+    """
+    Money value of one pip for one lot, in account currency.
+    tick_value/tick_size come from mt5.symbol_info (trade_tick_value, trade_tick_size).
+    """
+    if tick_size <= 0:
+        return 0.0
+    return tick_value * pip_size(symbol) / tick_size
+
+
 def is_valid_risk_reward(risk_pips: float, reward_pips: float, min_rr: float = 1.5) -> bool:
     """
     Validate if the Reward:Risk ratio is acceptable.
@@ -44,9 +54,11 @@ def evaluate_trade_risk(
 ) -> dict:
     """
     Evaluate the trade's risk, return decision, lot size, and reasoning.
+    pip_value is the money value of one pip per lot (see pip_value_per_lot).
     """
-    sl_pips = abs(entry - sl) / pip_value
-    tp_pips = abs(tp - entry) / pip_value
+    pip = pip_size(symbol)
+    sl_pips = abs(entry - sl) / pip
+    tp_pips = abs(tp - entry) / pip
 
     if verbose:
         logging.info(f"[RiskEngine] SL Pips: {sl_pips:.2f}, TP Pips: {tp_pips:.2f}")
@@ -85,4 +97,5 @@ def evaluate_trade_risk(
         "sl_pips": round_safe(sl_pips, 1),
         "tp_pips": round_safe(tp_pips, 1),
         "rrr": round_safe(tp_pips / sl_pips, 2),
+        "risk_amount": round_safe(lot_size * sl_pips * pip_value, 2),
     }
@@ -0,0 +1,107 @@
+# utils/state_store.py
+
+import json
+import logging
+import os
+
+
+class StateStore:
+    """
+    Crash-safe persistence for engine state.
+
+    A full snapshot is written atomically (temp file + fsync + os.replace).
+    Changes between snapshots are appended to a journal, one JSON event per
+    line, so nothing recorded since the last snapshot is lost on a crash.
+    Components register a section with an export and a restore callable.
+    """
+
+    def __init__(self, path: str = "state", name: str = "engine_state", enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.snapshot_path = os.path.join(path, f"{name}.json")
+        self.journal_path = os.path.join(path, f"{name}.journal")
+        self.sections = {}
+        self.handlers = {}
+
+    def register(self, section: str, export, restore):
+        """
+        export() -> JSON-serialisable value, restore(value) -> None.
+        """
+        self.sections[section] = (export, restore)
+
+    def on_event(self, kind: str, handler):
+        """
+        handler(event: dict) re-applies a journaled event after a restart.
+        """
+        self.handlers[kind] = handler
+
+    def journal(self, kind: str, **data):
+        if not self.enabled:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        line = json.dumps({"kind": kind, **data}, default=str)
+        with open(self.journal_path, "a") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def save(self):
+        """
+        Writes a full snapshot and truncates the journal it supersedes.
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        state = {}
+        for section, (export, _) in self.sections.items():
+            try:
+                state[section] = export()
+            except Exception as e:
+                logging.error(f"❌ Failed to export state section '{section}': {e}")
+
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        # Events up to here are now part of the snapshot
+        open(self.journal_path, "w").close()
+
+    def load(self) -> bool:
+        """
+        Restores registered sections from the snapshot, then replays the journal.
+        Returns True if any state was found.
+        """
+        found = False
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r") as f:
+                    state = json.load(f)
+                found = True
+            except (OSError, ValueError) as e:
+                logging.error(f"❌ Could not read state snapshot: {e}")
+                state = {}
+
+            for section, (_, restore) in self.sections.items():
+                if section in state:
+                    try:
+                        restore(state[section])
+                    except Exception as e:
+                        logging.error(f"❌ Failed to restore state section '{section}': {e}")
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    handler = self.handlers.get(event.get("kind"))
+                    if handler:
+                        handler(event)
+                        found = True
+
+        return found
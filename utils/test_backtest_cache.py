@@ -0,0 +1,99 @@
+# utils/test_backtest_cache.py
+#
+# Backtest results are reused only while the strategy code, run parameters
+# and bars are unchanged, and the store stays within its size budget.
+
+import importlib.util
+import sys
+
+import pytest
+
+from utils.backtest_cache import BacktestCache, sweep
+from utils.backtester import Backtester
+
+STRATEGY = '''
+REQUIREMENTS = {{"bars": 60, "fair_value_gaps": False, "volume_series": False}}
+
+
+def check_trade_opportunity(chart_data):
+    candles = chart_data["candles"]
+    close = candles[-1]["close"]
+    if candles[-3]["close"] < candles[-2]["close"] < close:
+        return {{"symbol": "EURUSD", "entry": close, "sl": close - {risk}, "tp": close + 2 * {risk},
+                "strategy": __name__}}
+    return None
+'''
+
+
+def write_strategy(tmp_path, name: str, risk: float = 0.0010):
+    path = tmp_path / f"{name}.py"
+    path.write_text(STRATEGY.format(risk=risk))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def bars(synthetic_bars):
+    return synthetic_bars(n=300, seed=5, base=1.08)
+
+
+def test_second_run_is_served_from_cache(tmp_path, bars):
+    strategy = write_strategy(tmp_path, "bt_cache_momentum")
+    cache = BacktestCache(str(tmp_path / "cache"))
+
+    first = cache.run(Backtester(strategy, "EURUSD", "M5", bars))
+    backtester = Backtester(strategy, "EURUSD", "M5", bars)
+    second = cache.run(backtester, spread_pips=0.0)
+
+    assert not first["cached"] and second["cached"]
+    assert first["metrics"]["trades"] > 0
+    assert second["trades"] == first["trades"] and second["metrics"] == first["metrics"]
+    assert backtester.tracker.trades == first["trades"]
+
+
+def test_key_follows_code_parameters_and_data(tmp_path, bars):
+    strategy = write_strategy(tmp_path, "bt_cache_keyed")
+
+    def key_for(strategy=strategy, bars=bars, params=None):
+        return BacktestCache(str(tmp_path)).key(Backtester(strategy, "EURUSD", "M5", bars),
+                                                params or {"spread_pips": 0.0})
+
+    key = key_for()
+    assert key_for() == key
+    assert key_for(params={"spread_pips": 1.0}) != key
+    changed = bars.copy()
+    changed.iloc[-1, changed.columns.get_loc("close")] += 0.0001
+    assert key_for(bars=changed) != key
+    assert key_for(strategy=write_strategy(tmp_path, "bt_cache_keyed", risk=0.0020)) != key
+
+
+def test_eviction_keeps_the_store_within_budget(tmp_path):
+    cache = BacktestCache(str(tmp_path), max_size_mb=0.05)
+    payload = {"trades": [{"pnl": 1.0, "note": "x" * 10000}], "metrics": {}, "meta": {}}
+    keys = [f"{i:02x}" + "0" * 62 for i in range(20)]
+    for key in keys:
+        cache.put(key, payload)
+
+    sizes = sum(size for _, size, _ in cache._entries())
+    assert sizes <= cache.max_bytes
+    assert cache.evicted > 0
+    assert cache.get(keys[-1]) is not None
+    assert cache.get(keys[0]) is None
+
+
+def test_sweep_recomputes_only_changed_strategies(tmp_path, bars):
+    steady = write_strategy(tmp_path, "bt_cache_steady")
+    edited = write_strategy(tmp_path, "bt_cache_edited")
+    source = {"EURUSD": bars}
+    periods = [(None, "2024-03-04 12:00"), ("2024-03-04 12:00", None)]
+
+    first = sweep([steady, edited], ["EURUSD"], "M5", source, periods, cache=BacktestCache(str(tmp_path / "c")))
+    edited = write_strategy(tmp_path, "bt_cache_edited", risk=0.0015)
+    second = sweep([steady, edited], ["EURUSD"], "M5", source, periods, cache=BacktestCache(str(tmp_path / "c")))
+
+    assert not any(cell["cached"] for cell in first)
+    assert [(cell["strategy"], cell["cached"]) for cell in second] == [
+        ("bt_cache_steady", True), ("bt_cache_edited", False)] * 2
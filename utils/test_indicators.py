@@ -0,0 +1,105 @@
+# utils/test_indicators.py
+#
+# Streaming indicators fed bar by bar must agree with the batch `ta`
+# computations over the same series, also across an export/restore.
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.indicators import ATR, EMA, RSI, IndicatorSet, RollingStats, RollingVWAP
+
+ta = pytest.importorskip("ta")
+
+
+@pytest.fixture
+def df(synthetic_bars) -> pd.DataFrame:
+    return synthetic_bars(seed=3, base=2050.0, volatility=0.0005, wick=0.4)
+
+
+def stream(indicator, *columns) -> np.ndarray:
+    values = [indicator.update(*row) for row in zip(*columns)]
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def assert_matches(streamed, batch, rtol=1e-9):
+    batch = np.asarray(batch, dtype=float)
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batch))
+    np.testing.assert_allclose(streamed, batch, rtol=rtol, equal_nan=True)
+
+
+def test_ema_matches_ta(df):
+    for period in (9, 20, 50):
+        expected = ta.trend.EMAIndicator(df["close"], period).ema_indicator()
+        assert_matches(stream(EMA(period), df["close"]), expected, rtol=1e-12)
+
+
+def test_rsi_matches_ta(df):
+    expected = ta.momentum.RSIIndicator(df["close"], 14).rsi()
+    assert_matches(stream(RSI(14), df["close"]), expected, rtol=1e-12)
+
+
+def test_atr_matches_ta(df):
+    expected = ta.volatility.AverageTrueRange(df["high"], df["low"], df["close"], 14).average_true_range()
+    streamed = stream(ATR(14), df["high"], df["low"], df["close"])
+    # ta reports 0 until the first full window
+    assert_matches(np.nan_to_num(streamed, nan=0.0), expected, rtol=1e-12)
+
+
+def test_rolling_stats_match_bollinger(df):
+    for column in ("tick_volume", "close"):
+        bands = ta.volatility.BollingerBands(df[column], window=20, window_dev=1)
+        stats = RollingStats(20)
+        values = [stats.update(v) for v in df[column]]
+        means = np.array([np.nan if m is None else m for m, _ in values])
+        stds = np.array([np.nan if s is None else s for _, s in values])
+        assert_matches(means, bands.bollinger_mavg())
+        assert_matches(stds, bands.bollinger_hband() - bands.bollinger_mavg(), rtol=1e-6)
+
+
+def test_vwap_matches_ta(df):
+    expected = ta.volume.VolumeWeightedAveragePrice(
+        df["high"], df["low"], df["close"], df["tick_volume"], window=14
+    ).volume_weighted_average_price()
+    streamed = stream(RollingVWAP(14), df["high"], df["low"], df["close"], df["tick_volume"])
+    assert_matches(streamed, expected)
+
+
+def test_indicator_set_resumes_from_export(df):
+    whole = IndicatorSet()
+    whole.update(df)
+
+    split = IndicatorSet()
+    # Overlapping windows, the way consecutive live fetches arrive; the forming bar is held back
+    split.update(df.iloc[:400], until=int(df.index[398].timestamp()))
+    restored = IndicatorSet.restore(json.loads(json.dumps(split.export())))
+    assert restored.update(df.iloc[300:700]) == 301
+    assert restored.update(df.iloc[600:]) == 300
+
+    assert restored.values() == pytest.approx(whole.values(), rel=1e-9)
+    assert restored.values()["time"] == int(df.index[-1].timestamp())
+
+
+def test_tr_mean_matches_rolling_true_range(df):
+    tr = pd.concat([df["high"] - df["low"], (df["high"] - df["close"].shift()).abs(),
+                    (df["low"] - df["close"].shift()).abs()], axis=1).max(axis=1)
+    indicators = IndicatorSet()
+    streamed = []
+    for i in range(len(df)):
+        indicators.update(df.iloc[max(0, i - 499):i + 1])
+        streamed.append(indicators.values()["tr_mean_14"])
+    assert_matches(np.array([np.nan if v is None else v for v in streamed]), tr.rolling(14).mean())
+
+
+def test_indicator_set_starts_over_after_a_gap(df):
+    # A checkpoint taken at bar 99, restored against a fetch starting at bar 300
+    stale = IndicatorSet()
+    stale.update(df.iloc[:100])
+    stale = IndicatorSet.restore(json.loads(json.dumps(stale.export())))
+    assert stale.update(df.iloc[300:600]) == 300
+
+    fresh = IndicatorSet()
+    fresh.update(df.iloc[300:600])
+    assert stale.values() == fresh.values()